@@ -0,0 +1,87 @@
+"""Benchmark compression ratio and CPU cost of storing command output.
+
+Generates synthetic `show running-config` and `show tech-support` style output and reports, for each zlib
+level, the compression ratio and the milliseconds of CPU spent per MB to compress and decompress it.
+
+Run inside the development environment, for example:
+
+    invoke exec --command "python benchmarks/compression.py"
+"""
+
+import argparse
+import random
+import time
+import zlib
+
+import nautobot
+
+nautobot.setup()
+
+from device_broker import compression  # noqa: E402  # pylint: disable=wrong-import-position
+
+
+def running_config(interfaces):
+    """Return a running-config with `interfaces` interface stanzas and a few hundred global lines."""
+    rng = random.Random(interfaces)  # noqa: S311
+    lines = ["!", "version 17.9", "service timestamps debug datetime msec", "hostname edge-rtr-01", "!"]
+    for index in range(interfaces):
+        lines += [
+            f"interface GigabitEthernet1/0/{index}",
+            f" description to-access-{rng.randint(1, 400):03d} port {rng.randint(1, 48)}",
+            f" switchport access vlan {rng.choice((10, 20, 30, 110, 120))}",
+            " switchport mode access",
+            " spanning-tree portfast",
+            " no shutdown",
+            "!",
+        ]
+    for index in range(300):
+        lines.append(f"access-list 110 permit tcp 10.{index % 256}.0.0 0.0.255.255 any eq {rng.choice((22, 443, 161))}")
+    return "\n".join(lines) + "\nend\n"
+
+
+def tech_support(sections):
+    """Return tech-support style output: repeated show commands with counters that vary per section."""
+    rng = random.Random(sections)  # noqa: S311
+    blocks = []
+    for index in range(sections):
+        blocks.append(f"------------------ show interfaces GigabitEthernet1/0/{index} ------------------")
+        blocks.append(f"GigabitEthernet1/0/{index} is up, line protocol is up (connected)")
+        blocks.append(f"  Hardware is Gigabit Ethernet, address is 00a1.{rng.randint(0, 0xFFFF):04x}.{index:04x}")
+        blocks.append(f"  5 minute input rate {rng.randint(0, 10**6)} bits/sec, {rng.randint(0, 5000)} packets/sec")
+        blocks.append(f"     {rng.randint(0, 10**9)} packets input, {rng.randint(0, 10**12)} bytes, 0 no buffer")
+        blocks.append(f"     {rng.randint(0, 10**9)} packets output, {rng.randint(0, 10**12)} bytes, 0 underruns")
+        blocks.append("     0 output errors, 0 collisions, 0 interface resets")
+    return "\n".join(blocks) + "\n"
+
+
+def measure(data, level, rounds):
+    """Return the compression ratio and CPU milliseconds per MB to compress and decompress `data`."""
+    megabytes = len(data) / 1_000_000
+    start = time.process_time()
+    for _ in range(rounds):
+        compressed = zlib.compress(data, level)
+    compress_ms = (time.process_time() - start) * 1000 / rounds / megabytes
+    start = time.process_time()
+    for _ in range(rounds):
+        zlib.decompress(compressed)
+    decompress_ms = (time.process_time() - start) * 1000 / rounds / megabytes
+    return len(data) / len(compressed), compress_ms, decompress_ms
+
+
+def main():
+    """Run the benchmark and print one row per sample and zlib level."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5, help="Repetitions per measurement.")
+    args = parser.parse_args()
+
+    samples = {"running-config": running_config(2_000), "tech-support": tech_support(5_000)}
+    print(f"{'sample':<16}{'size MB':>9}{'level':>7}{'ratio':>8}{'compress ms/MB':>16}{'decompress ms/MB':>18}")
+    for name, text in samples.items():
+        data = text.encode("utf-8")
+        for level in (1, compression.COMPRESSION_LEVEL, 9):
+            ratio, compress_ms, decompress_ms = measure(data, level, args.rounds)
+            print(f"{name:<16}{len(data) / 1e6:>9.2f}{level:>7}{ratio:>8.1f}{compress_ms:>16.1f}{decompress_ms:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark the per-device overhead of resolving and connecting platform drivers.
+
+Compares the previous `get_platform_driver`, which built a new factory class for every device and
+looked the NAPALM driver up on every connection, with the memoized driver registry. Device I/O is
+stubbed out so only the driver plumbing is measured.
+
+Run inside the development environment, for example:
+
+    invoke exec --command "python benchmarks/driver_factory.py --devices 10000"
+"""
+
+import argparse
+import time
+from typing import Optional
+from unittest.mock import patch
+
+import nautobot
+
+nautobot.setup()
+
+import napalm  # noqa: E402  # pylint: disable=wrong-import-position
+
+from device_broker import utils  # noqa: E402  # pylint: disable=wrong-import-position
+
+_real_get_napalm_driver = napalm.get_network_driver
+
+
+class _StubConnection:  # pylint: disable=too-few-public-methods
+    """Stand-in for a Netmiko or NAPALM connection object."""
+
+    def __init__(self, *args, **kwargs):
+        """Accept any connection arguments."""
+
+    def open(self):
+        """Pretend to open the session."""
+
+
+def _stub_get_napalm_driver(name):
+    """Keep the real import-and-lookup cost but return a connection stub."""
+    _real_get_napalm_driver(name)
+    return _StubConnection
+
+
+def legacy_get_platform_driver(platform, method="netmiko"):
+    """The pre-registry implementation: a fresh closure and class per call, NAPALM lookup per connection."""
+    device_type = getattr(platform, "network_driver", None)
+    if not device_type:
+        return None
+    method_normalized = (method or "netmiko").lower()
+
+    class LegacyNapalmDriverWrapper(utils.NapalmDriverWrapper):
+        """NAPALM wrapper resolving the driver class on every connect."""
+
+        def connect(self):
+            driver_cls = napalm.get_network_driver(self.napalm_driver_name)
+            self.connection = driver_cls(hostname=self.host, optional_args=None)
+            self.connection.open()
+            return self
+
+    def driver_factory(host, credentials, timeout: Optional[int] = None):
+        if method_normalized == "napalm":
+            wrapper = LegacyNapalmDriverWrapper(device_type, host, credentials, timeout=timeout)
+        else:
+            wrapper = utils.NetmikoDriverWrapper(device_type, host, credentials, timeout=timeout)
+        return wrapper.connect()
+
+    return type("DynamicDriver", (), {"connect": staticmethod(driver_factory)})
+
+
+def measure(get_driver, devices, method):
+    """Return the mean microseconds per device to resolve a driver and open a (stubbed) connection."""
+    platform = type("Platform", (), {"network_driver": "eos" if method == "napalm" else "arista_eos"})()
+    credentials = {"username": "admin", "password": "admin"}
+    start = time.perf_counter()
+    for index in range(devices):
+        get_driver(platform, method=method).connect(f"10.0.{index // 256 % 256}.{index % 256}", credentials)
+    return (time.perf_counter() - start) / devices * 1_000_000
+
+
+def main():
+    """Run the benchmark and print a before/after table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=10_000, help="Number of devices to simulate.")
+    args = parser.parse_args()
+
+    with patch("netmiko.ConnectHandler", _StubConnection), patch.object(
+        napalm, "get_network_driver", _stub_get_napalm_driver
+    ):
+        print(f"Per-device driver overhead over {args.devices} devices (microseconds)")
+        print(f"{'method':<10}{'before':>12}{'after':>12}{'speedup':>10}")
+        for method in ("netmiko", "napalm"):
+            before = measure(legacy_get_platform_driver, args.devices, method)
+            after = measure(utils.get_platform_driver, args.devices, method)
+            print(f"{method:<10}{before:>12.2f}{after:>12.2f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
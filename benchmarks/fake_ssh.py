@@ -0,0 +1,130 @@
+"""Fake Cisco IOS-style SSH devices for end-to-end benchmarks.
+
+Starts one asyncssh listener per device on consecutive loopback addresses (127.1.0.1, 127.1.0.2, ...),
+all on the same port. Every device accepts any username and password, answers with an `<name>#`
+prompt, supports `configure terminal` / `end`, and replies to every other command with
+`--output-size` bytes of text after waiting `--latency` seconds.
+
+Prints `ready` on stdout once every listener is up, then serves until interrupted:
+
+    python benchmarks/fake_ssh.py --devices 100 --port 8022 --latency 0.05 --output-size 2000
+
+Requires the `asyncssh` package (installed with the `scrapli` extra).
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import resource
+
+import asyncssh
+
+# First address handed out to fake devices; 127.0.0.0/8 is routed to the loopback interface on Linux.
+FIRST_ADDRESS = ipaddress.IPv4Address("127.1.0.1")
+
+
+def device_addresses(count):
+    """Return the loopback addresses of `count` fake devices, in order."""
+    return [str(FIRST_ADDRESS + index) for index in range(count)]
+
+
+def make_output(size):
+    """Return about `size` bytes of `show`-style output, in 64-character lines."""
+    line = "GigabitEthernet1/0/1 is up, line protocol is up (connected)  \r\n"
+    return line * max(1, round(size / len(line)))
+
+
+class FakeDeviceServer(asyncssh.SSHServer):
+    """Accept any credentials."""
+
+    def begin_auth(self, username):
+        """Require authentication, so clients go through their normal password flow."""
+        return True
+
+    def password_auth_supported(self):
+        """Offer password authentication."""
+        return True
+
+    def validate_password(self, username, password):
+        """Accept any password."""
+        return True
+
+
+def make_session_handler(hostname, latency, output):
+    """Return an asyncssh process handler emulating an IOS command line for `hostname`."""
+
+    async def handle(process):
+        mode = ""
+        process.stdout.write(f"\r\n{hostname}#")
+        try:
+            while True:
+                line = await process.stdin.readline()
+                if not line:
+                    break
+                command = line.strip()
+                if command and latency:
+                    await asyncio.sleep(latency)
+                if command == "configure terminal":
+                    mode = "(config)"
+                    process.stdout.write("Enter configuration commands, one per line.  End with CNTL/Z.\r\n")
+                elif command == "end":
+                    mode = ""
+                elif command == "exit":
+                    if not mode:
+                        break
+                    mode = ""
+                elif command and not mode and not command.startswith("terminal"):
+                    process.stdout.write(output)
+                # Like IOS, every prompt starts on a fresh line, even in reply to an empty line.
+                process.stdout.write(f"\r\n{hostname}{mode}#")
+        except (asyncssh.BreakReceived, asyncssh.TerminalSizeChanged, BrokenPipeError, ConnectionError):
+            pass
+        process.exit(0)
+
+    return handle
+
+
+async def serve(count, port, latency, output_size):
+    """Start `count` fake devices and serve until cancelled."""
+    host_key = asyncssh.generate_private_key("ssh-ed25519")
+    output = make_output(output_size)
+    servers = []
+    for index, address in enumerate(device_addresses(count)):
+        servers.append(
+            await asyncssh.listen(
+                address,
+                port,
+                server_factory=FakeDeviceServer,
+                server_host_keys=[host_key],
+                process_factory=make_session_handler(f"fake-{index}", latency, output),
+                line_editor=True,
+            )
+        )
+    print("ready", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for server in servers:
+            server.close()
+
+
+def main():
+    """Parse arguments and serve the fake devices."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=10, help="Number of fake devices.")
+    parser.add_argument("--port", type=int, default=8022, help="TCP port every device listens on.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering a command.")
+    parser.add_argument("--output-size", type=int, default=1000, help="Bytes of output returned per command.")
+    args = parser.parse_args()
+
+    # Each device holds a listening socket, plus one per open session.
+    _, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard_limit, hard_limit))
+    try:
+        asyncio.run(serve(args.devices, args.port, args.latency, args.output_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
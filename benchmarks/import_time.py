@@ -0,0 +1,67 @@
+"""Benchmark the import time of the Device Broker job module and check that it loads no connection library.
+
+Nautobot imports `device_broker.jobs` at startup to register the app's jobs, in the web server, on
+every Celery worker and whenever jobs are discovered. Each measurement runs `nautobot.setup()` in a
+fresh interpreter with `python -X importtime` and reports:
+
+- the cumulative import time of `device_broker.utils`, the driver module the job module imports
+  (Nautobot loads job modules itself, so `-X importtime` does not report `device_broker.jobs`),
+- which connection libraries (Netmiko, NAPALM, Scrapli, Paramiko) were imported by startup,
+- for comparison, what importing Netmiko and NAPALM costs on top, as `device_broker.utils` did before
+  their imports were deferred to the first connection.
+
+Exits non-zero if importing the job module imported a connection library.
+
+Run inside the development environment, for example:
+
+    invoke exec --command "python benchmarks/import_time.py --runs 5"
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+# Connection libraries that must only be imported when a device is first connected to.
+BACKENDS = ("netmiko", "napalm", "scrapli", "paramiko")
+
+SETUP = "import sys; import nautobot; nautobot.setup(); assert 'device_broker.jobs' in sys.modules"
+
+
+def import_times(code):
+    """Run `code` in a fresh interpreter and return the cumulative import time of every module imported, in seconds."""
+    completed = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times.setdefault(name.strip(), int(cumulative) / 1_000_000)
+    return times
+
+
+def main():
+    """Run the benchmark and print the median of every measurement."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters per measurement.")
+    args = parser.parse_args()
+
+    utils, loaded, eager = [], set(), []
+    for _ in range(args.runs):
+        times = import_times(SETUP)
+        utils.append(times["device_broker.utils"])
+        loaded |= {backend for backend in BACKENDS if backend in times}
+        times = import_times(f"{SETUP}; import netmiko, napalm")
+        eager.append(times.get("netmiko", 0.0) + times.get("napalm", 0.0))
+
+    print(f"Median over {args.runs} fresh interpreters (seconds)")
+    print(f"{'import device_broker.utils':<40}{statistics.median(utils):>10.3f}")
+    print(f"{'netmiko + napalm, no longer imported':<40}{statistics.median(eager):>10.3f}")
+    print(f"Connection libraries imported at startup: {', '.join(sorted(loaded)) or 'none'}")
+    return 1 if loaded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""Benchmark end-to-end DeviceBrokerJob throughput against local fake SSH devices.
+
+Starts `benchmarks/fake_ssh.py` in a subprocess, creates one Nautobot device per fake device inside a
+transaction that is rolled back afterwards, and runs `DeviceBrokerJob` against the first 10, 100 and
+1,000 of them (by default). For every run it reports devices per second, the p50 and p99 per-device
+session duration and the peak RSS of this process.
+
+The job runs in this process rather than on a Celery worker, so the numbers exclude Celery overhead.
+Peak RSS is the high-water mark since the process started, so runs are made smallest first.
+
+Run inside the development environment, for example:
+
+    invoke benchmark --devices 10,100,1000 --latency 0.05
+"""
+
+import argparse
+import contextlib
+import functools
+import logging
+import math
+import os
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import nautobot
+
+nautobot.setup()
+
+# pylint: disable=wrong-import-position
+from django.contrib.contenttypes.models import ContentType  # noqa: E402
+from django.db import transaction  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from nautobot.dcim.models import Device, DeviceType, Location, LocationType, Manufacturer, Platform  # noqa: E402
+from nautobot.extras.models import (  # noqa: E402
+    FileProxy,
+    JobResult,
+    Role,
+    Secret,
+    SecretsGroup,
+    SecretsGroupAssociation,
+    Status,
+)
+from nautobot.ipam.models import IPAddress, Namespace, Prefix  # noqa: E402
+from netmiko import ConnectHandler  # noqa: E402
+
+from device_broker.jobs import DeviceBrokerJob  # noqa: E402
+from device_broker.models import DeviceCommandResult  # noqa: E402
+
+FAKE_SSH = Path(__file__).with_name("fake_ssh.py")
+
+
+class Rollback(Exception):
+    """Raised to roll back the benchmark data."""
+
+
+def create_devices(addresses):
+    """Create one device per fake device address on a `cisco_ios` platform, returned in address order."""
+    # The fake devices accept any credentials.
+    os.environ["BENCHMARK_USERNAME"] = os.environ["BENCHMARK_PASSWORD"] = "benchmark"  # noqa: S105
+    status = Status.objects.get(name="Active")
+    location_type = LocationType.objects.create(name="Benchmark Site")
+    location_type.content_types.add(ContentType.objects.get_for_model(Device))
+    location = Location.objects.create(name="Benchmark Site 1", location_type=location_type, status=status)
+    platform = Platform.objects.create(name="Benchmark IOS", network_driver="cisco_ios")
+    manufacturer = Manufacturer.objects.create(name="Benchmark Manufacturer")
+    device_type = DeviceType.objects.create(manufacturer=manufacturer, model="Benchmark Model")
+    role = Role.objects.create(name="Benchmark Role")
+    role.content_types.add(ContentType.objects.get_for_model(Device))
+    secrets_group = SecretsGroup.objects.create(name="Benchmark Credentials")
+    for secret_type in ("username", "password"):
+        secret = Secret.objects.create(
+            name=f"Benchmark {secret_type}",
+            provider="environment-variable",
+            parameters={"variable": f"BENCHMARK_{secret_type.upper()}"},
+        )
+        SecretsGroupAssociation.objects.create(
+            secrets_group=secrets_group, secret=secret, access_type="SSH", secret_type=secret_type
+        )
+
+    namespace = Namespace.objects.get(name="Global")
+    Prefix.objects.create(prefix="127.1.0.0/16", namespace=namespace, status=status)
+    devices = []
+    for index, address in enumerate(addresses):
+        device = Device.objects.create(
+            name=f"benchmark-{index:05d}",
+            device_type=device_type,
+            role=role,
+            location=location,
+            platform=platform,
+            secrets_group=secrets_group,
+            status=status,
+        )
+        device.primary_ip4 = IPAddress.objects.create(address=f"{address}/32", namespace=namespace, status=status)
+        device.save()
+        devices.append(device)
+    return devices
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of the sorted list `values`."""
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def run_job(devices, args):
+    """Run DeviceBrokerJob against `devices`; return the summary, wall time and per-device session durations."""
+    job = DeviceBrokerJob()
+    job.logger = logging.getLogger("device_broker.benchmark")
+    job.job_result = JobResult.objects.create(name="Device Broker throughput benchmark")
+    start = time.perf_counter()
+    summary = job.run(
+        devices=devices,
+        platform=None,
+        location=None,
+        config_mode=False,
+        commands="\n".join(args.command),
+        connection_method=args.method,
+        max_workers=args.max_workers,
+    )
+    elapsed = time.perf_counter() - start
+    durations = dict(
+        DeviceCommandResult.objects.filter(job_result=job.job_result)
+        .values_list("device", "session_duration")
+        .distinct()
+    )
+    for file_proxy in FileProxy.objects.filter(job_result=job.job_result):
+        file_proxy.file.delete(save=False)
+    return summary, elapsed, sorted(duration for duration in durations.values() if duration is not None)
+
+
+def start_fake_devices(count, args):
+    """Start the fake SSH devices in a subprocess and wait until they accept connections."""
+    server = subprocess.Popen(  # noqa: S603  # pylint: disable=consider-using-with
+        [
+            sys.executable,
+            str(FAKE_SSH),
+            f"--devices={count}",
+            f"--port={args.port}",
+            f"--latency={args.latency}",
+            f"--output-size={args.output_size}",
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    if server.stdout.readline().strip() != "ready":
+        server.kill()
+        raise RuntimeError("The fake SSH devices failed to start.")
+    return server
+
+
+def main():
+    """Run the benchmark and print one row per device count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", default="10,100,1000", help="Comma-separated device counts to run.")
+    parser.add_argument(
+        "--method", default="netmiko", choices=("netmiko", "scrapli", "simulated"), help="Connection method."
+    )
+    parser.add_argument("--max-workers", type=int, default=100, help="Job max_workers value.")
+    parser.add_argument(
+        "--command", action="append", help="Command to run, repeatable (default: show version, show interfaces)."
+    )
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake device response latency in seconds.")
+    parser.add_argument("--output-size", type=int, default=2000, help="Bytes of output per command.")
+    parser.add_argument("--port", type=int, default=8022, help="TCP port of the fake devices.")
+    args = parser.parse_args()
+    args.command = args.command or ["show version", "show interfaces"]
+    counts = sorted(int(count) for count in args.devices.split(","))
+
+    _, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard_limit, hard_limit))
+    logging.getLogger("device_broker.benchmark").addHandler(logging.NullHandler())
+    logging.getLogger("device_broker.benchmark").propagate = False
+
+    from fake_ssh import device_addresses, make_output  # pylint: disable=import-outside-toplevel,import-error
+
+    server = start_fake_devices(counts[-1], args)
+    # Platform records carry no SSH port, so point the connection libraries at the fake devices' port.
+    patches = [patch("netmiko.ConnectHandler", functools.partial(ConnectHandler, port=args.port))]
+    if args.method == "scrapli":
+        from scrapli import AsyncScrapli  # pylint: disable=import-outside-toplevel
+
+        patches.append(patch("scrapli.AsyncScrapli", functools.partial(AsyncScrapli, port=args.port)))
+    elif args.method == "simulated":
+        # Simulated devices answer like the fake devices, without SSH, to measure the job's own overhead.
+        simulation = {
+            "connect_latency": args.latency,
+            "command_latency": args.latency,
+            "default_output": make_output(args.output_size),
+        }
+        patches.append(override_settings(PLUGINS_CONFIG={"device_broker": {"simulation": simulation}}))
+    try:
+        with contextlib.ExitStack() as stack, transaction.atomic():
+            for patcher in patches:
+                stack.enter_context(patcher)
+            devices = create_devices(device_addresses(counts[-1]))
+            print(
+                f"method={args.method} max_workers={args.max_workers} latency={args.latency}s "
+                f"output={args.output_size}B commands={len(args.command)}"
+            )
+            print(
+                f"{'devices':>8}{'failed':>8}{'seconds':>10}{'devices/s':>11}{'p50 s':>9}{'p99 s':>9}{'peak RSS MB':>13}"
+            )
+            for count in counts:
+                summary, elapsed, durations = run_job(devices[:count], args)
+                peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                print(
+                    f"{count:>8}{summary['failed']:>8}{elapsed:>10.2f}{count / elapsed:>11.1f}"
+                    f"{percentile(durations, 0.5) if durations else 0:>9.3f}"
+                    f"{percentile(durations, 0.99) if durations else 0:>9.3f}{peak_rss:>13.1f}"
+                )
+            raise Rollback
+    except Rollback:
+        pass
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
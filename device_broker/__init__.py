@@ -20,9 +20,16 @@ class DeviceBrokerConfig(NautobotAppConfig):
     required_settings = []
     min_version = "2.3.1"
     max_version = "2.9999"
-    default_settings = {}
+    default_settings = {
+        "credential_cache_ttl": 300,
+    }
     caching_config = {}
     docs_view_name = "plugins:device_broker:docs"
 
+    def ready(self):
+        """Connect signal handlers once the app registry is ready."""
+        super().ready()
+        from device_broker import signals  # noqa: F401  # pylint: disable=import-outside-toplevel,unused-import
+
 
 config = DeviceBrokerConfig  # pylint:disable=invalid-name
@@ -0,0 +1 @@
+"""REST API module for device_broker app."""
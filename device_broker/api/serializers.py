@@ -0,0 +1,19 @@
+"""API serializers for device_broker."""
+
+from nautobot.apps.api import BaseModelSerializer
+from rest_framework import serializers
+
+from device_broker import models
+
+
+class DeviceCommandResultSerializer(BaseModelSerializer):  # pylint: disable=too-many-ancestors
+    """DeviceCommandResult Serializer, returning the output decompressed."""
+
+    output = serializers.CharField(read_only=True)
+    output_digest = serializers.CharField(source="command_output.digest", read_only=True)
+
+    class Meta:
+        """Meta attributes."""
+
+        model = models.DeviceCommandResult
+        exclude = ["command_output"]
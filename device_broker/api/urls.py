@@ -0,0 +1,12 @@
+"""Django API urlpatterns declaration for device_broker app."""
+
+from nautobot.apps.api import OrderedDefaultRouter
+
+from device_broker.api import views
+
+router = OrderedDefaultRouter()
+# add the name of your api endpoint, usually hyphenated model name in plural, e.g. "my-model-classes"
+router.register("device-command-results", views.DeviceCommandResultViewSet)
+
+app_name = "device_broker-api"
+urlpatterns = router.urls
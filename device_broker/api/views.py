@@ -0,0 +1,14 @@
+"""API views for device_broker."""
+
+from nautobot.apps.api import ReadOnlyModelViewSet
+
+from device_broker import filters, models
+from device_broker.api import serializers
+
+
+class DeviceCommandResultViewSet(ReadOnlyModelViewSet):  # pylint: disable=too-many-ancestors
+    """Read-only API ViewSet for DeviceCommandResult, which is only ever written by the Device Broker job."""
+
+    queryset = models.DeviceCommandResult.objects.select_related("device", "job_result", "command_output")
+    serializer_class = serializers.DeviceCommandResultSerializer
+    filterset_class = filters.DeviceCommandResultFilterSet
@@ -0,0 +1,174 @@
+"""Device Broker caches for values that are expensive to resolve per device."""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Shared-cache key bumped whenever secrets change, so every process drops its cached credentials.
+CREDENTIAL_GENERATION_KEY = "device_broker:credential_cache:generation"
+
+# Prefix of the shared-cache keys holding the command outputs cached for each device.
+OUTPUT_CACHE_KEY_PREFIX = "device_broker:output_cache"
+
+OUTPUT_CACHE_DEFAULTS = {
+    "ttl": 300,
+    # A command is cached only if it matches one of these and none of the exclusions.
+    "read_only_patterns": [r"^show\s", r"^display\s"],
+    "exclude_patterns": [r"\|\s*(redirect|tee|append|save)\b", r"^show\s+clock\b"],
+}
+
+
+class CredentialCache:
+    """Process-local, TTL-bounded cache of credentials resolved from a SecretsGroup.
+
+    Entries are keyed by `(secrets_group_pk, access_type)`. Resolved secret values never leave the
+    process; only a generation counter is kept in Django's shared cache. Signal handlers bump it when a
+    SecretsGroup, SecretsGroupAssociation or Secret changes, which invalidates the entries held by every
+    process, including Celery workers that did not see the signal.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache with zeroed counters."""
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def generation() -> int:
+        """Return the current invalidation generation shared by all processes."""
+        return cache.get(CREDENTIAL_GENERATION_KEY, 0)
+
+    def get(self, key, generation: int) -> Optional[dict]:
+        """Return a copy of the credentials cached for `key` in `generation`, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, entry_generation, value = entry
+                if expires > time.monotonic() and entry_generation == generation:
+                    self.hits += 1
+                    return dict(value)
+                del self._entries[key]
+            self.misses += 1
+        return None
+
+    def set(self, key, value: dict, ttl: int, generation: int):
+        """Cache a copy of `value` under `key` for `ttl` seconds.
+
+        `generation` must be read before the value was resolved, so a concurrent invalidation wins.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, generation, dict(value))
+
+    def invalidate(self):
+        """Drop cached credentials in this and every other process."""
+        with self._lock:
+            self._entries.clear()
+        try:
+            cache.incr(CREDENTIAL_GENERATION_KEY)
+        except ValueError:
+            cache.set(CREDENTIAL_GENERATION_KEY, 1, timeout=None)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current number of entries."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+credential_cache = CredentialCache()
+
+
+def normalize_command(command: str) -> str:
+    """Return `command` with surrounding whitespace removed and inner whitespace collapsed to single spaces."""
+    return " ".join(command.split())
+
+
+class OutputCache:
+    """Outputs of read-only commands, shared by every process through Django's cache.
+
+    All outputs cached for a device live under one key, as a mapping of `(connection_method,
+    normalized_command)` to `(expires, output)`, so a device is looked up with one cache round trip
+    and invalidated by deleting one key. A device is served from the cache only when every command of
+    the run is read-only and has an unexpired output; otherwise a session runs all of them and refreshes
+    the cached outputs.
+    """
+
+    def __init__(self, method: str, commands: list[str], **options):
+        """Initialize the cache for one run.
+
+        Args:
+            method (str): Connection method of the run; outputs are only shared between runs using the same one.
+            commands (list[str]): Commands the run executes, in order.
+            **options: Overrides of `OUTPUT_CACHE_DEFAULTS`.
+        """
+        self.method = method
+        self.options = {**OUTPUT_CACHE_DEFAULTS, **options}
+        self._read_only = [re.compile(pattern, re.IGNORECASE) for pattern in self.options["read_only_patterns"]]
+        self._excluded = [re.compile(pattern, re.IGNORECASE) for pattern in self.options["exclude_patterns"]]
+        self.commands = [normalize_command(command) for command in commands]
+        self.servable = bool(self.commands) and all(self.is_read_only(command) for command in self.commands)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls, method: str, commands: list[str]) -> OutputCache:
+        """Build the cache from `PLUGINS_CONFIG["device_broker"]["output_cache"]`."""
+        return cls(method, commands, **(settings.PLUGINS_CONFIG.get("device_broker", {}).get("output_cache") or {}))
+
+    def is_read_only(self, command: str) -> bool:
+        """Whether the output of `command` may be cached."""
+        command = normalize_command(command)
+        return any(pattern.search(command) for pattern in self._read_only) and not any(
+            pattern.search(command) for pattern in self._excluded
+        )
+
+    @staticmethod
+    def key(device_pk) -> str:
+        """Return the shared-cache key holding the outputs cached for the device `device_pk`."""
+        return f"{OUTPUT_CACHE_KEY_PREFIX}:{device_pk}"
+
+    def get(self, device_pk) -> Optional[list[str]]:
+        """Return the cached output of every command of the run, in order, or None unless all are cached."""
+        if not self.servable or self.options["ttl"] <= 0:
+            return None
+        entries = cache.get(self.key(device_pk)) or {}
+        now = time.time()
+        outputs = []
+        for command in self.commands:
+            entry = entries.get((self.method, command))
+            if entry is None or entry[0] <= now:
+                self.misses += 1
+                return None
+            outputs.append(entry[1])
+        self.hits += 1
+        return outputs
+
+    def set(self, device_pk, outputs: list[tuple[str, str]]):
+        """Cache the outputs of the read-only commands among the `(command, output)` pairs of a device session."""
+        if self.options["ttl"] <= 0:
+            return
+        now = time.time()
+        expires = now + self.options["ttl"]
+        fresh = {
+            (self.method, normalize_command(command)): (expires, output)
+            for command, output in outputs
+            if self.is_read_only(command)
+        }
+        if not fresh:
+            return
+        key = self.key(device_pk)
+        # Concurrent runs may overwrite each other's additions; that only costs a later cache miss.
+        entries = {name: entry for name, entry in (cache.get(key) or {}).items() if entry[0] > now}
+        entries.update(fresh)
+        cache.set(key, entries, timeout=self.options["ttl"])
+
+    @classmethod
+    def invalidate(cls, device_pk):
+        """Drop every output cached for the device `device_pk`, e.g. after its configuration changed."""
+        cache.delete(cls.key(device_pk))
@@ -0,0 +1,29 @@
+"""Choice sets for device_broker."""
+
+from nautobot.apps.choices import ChoiceSet
+
+
+class DeviceCommandResultStatusChoices(ChoiceSet):
+    """Outcome of running a command on a device."""
+
+    STATUS_SUCCESS = "success"
+    STATUS_FAILED = "failed"
+    STATUS_SKIPPED = "skipped"
+
+    CHOICES = (
+        (STATUS_SUCCESS, "Success"),
+        (STATUS_FAILED, "Failed"),
+        (STATUS_SKIPPED, "Skipped"),
+    )
+
+
+class CommandOutputCompressionChoices(ChoiceSet):
+    """How a CommandOutput is stored."""
+
+    COMPRESSION_NONE = "none"
+    COMPRESSION_ZLIB = "zlib"
+
+    CHOICES = (
+        (COMPRESSION_NONE, "None"),
+        (COMPRESSION_ZLIB, "zlib"),
+    )
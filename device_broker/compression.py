@@ -0,0 +1,41 @@
+"""Device Broker compression of stored command output."""
+
+from __future__ import annotations
+
+import hashlib
+import zlib
+
+from device_broker.choices import CommandOutputCompressionChoices
+
+# Outputs smaller than this many bytes are stored as-is; zlib barely shrinks them and costs CPU on every read.
+MIN_COMPRESS_SIZE = 256
+
+# zlib level 6 is zlib's default trade-off; see benchmarks/compression.py for ratio and CPU cost per level.
+COMPRESSION_LEVEL = 6
+
+
+def output_digest(text: str) -> str:
+    """Return the SHA-256 hex digest identifying command output by its content."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def compress_output(text: str) -> tuple[bytes, str]:
+    """Encode command output for storage, compressing it when that saves space.
+
+    Returns:
+        tuple: The stored bytes and the `CommandOutputCompressionChoices` value used.
+    """
+    data = (text or "").encode("utf-8")
+    if len(data) >= MIN_COMPRESS_SIZE:
+        compressed = zlib.compress(data, COMPRESSION_LEVEL)
+        if len(compressed) < len(data):
+            return compressed, CommandOutputCompressionChoices.COMPRESSION_ZLIB
+    return data, CommandOutputCompressionChoices.COMPRESSION_NONE
+
+
+def decompress_output(data, compression: str) -> str:
+    """Decode command output stored by `compress_output`."""
+    data = bytes(data or b"")
+    if compression == CommandOutputCompressionChoices.COMPRESSION_ZLIB:
+        data = zlib.decompress(data)
+    return data.decode("utf-8")
@@ -0,0 +1,94 @@
+"""Device Broker delta mode, which reports only the command outputs that changed since the previous run.
+
+The SHA-256 digest of every successful output is compared with the DeviceCommandDigest stored for the
+same device and command by earlier runs, and replaces it. Results are compared in batches as they
+stream out of the execution engine, with one query to read the stored digests of a batch and at most
+two to write them back.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Optional
+
+from django.utils import timezone
+
+from device_broker.compression import output_digest
+from device_broker.execution import DeviceResult
+from device_broker.models import DeviceCommandDigest
+
+# Number of device results compared per batch.
+DELTA_BATCH_SIZE = 500
+
+COMMAND_MAX_LENGTH = DeviceCommandDigest._meta.get_field("command").max_length
+
+
+class DeltaFilter:
+    """Compare the outputs of successful device results with the previous run's, in batches, and count the changes."""
+
+    def __init__(self, batch_size: int = DELTA_BATCH_SIZE):
+        """Initialize with zeroed counters.
+
+        Args:
+            batch_size (int): Number of device results compared per batch.
+        """
+        self.batch_size = batch_size
+        self.compared = 0
+        self.changed = 0
+
+    def changes(self, results: Iterable[DeviceResult]) -> Iterator[tuple[DeviceResult, Optional[list]]]:
+        """Yield every result, in order, with its `(command, output)` pairs that changed since the previous run.
+
+        Results that did not succeed, or have no device, are not compared and come with None.
+        """
+        batch = []
+        for result in results:
+            batch.append(result)
+            if len(batch) >= self.batch_size:
+                yield from self._compare(batch)
+                batch = []
+        if batch:
+            yield from self._compare(batch)
+
+    @staticmethod
+    def comparable(result: DeviceResult) -> bool:
+        """Whether the outputs of `result` are compared: only successful results of a device are."""
+        return result.device is not None and result.status == DeviceResult.SUCCESS
+
+    def _compare(self, batch: list[DeviceResult]) -> Iterator[tuple[DeviceResult, Optional[list]]]:
+        """Compare one batch of results with the stored digests and store the new ones."""
+        compared = [result for result in batch if self.comparable(result)]
+        stored = {}
+        if compared:
+            rows = DeviceCommandDigest.objects.filter(
+                device_id__in={result.device.pk for result in compared},
+                command__in={command[:COMMAND_MAX_LENGTH] for result in compared for command, _ in result.outputs},
+            )
+            stored = {(row.device_id, row.command): row for row in rows}
+
+        now = timezone.now()
+        updated, created = {}, {}
+        for result in batch:
+            if not self.comparable(result):
+                yield result, None
+                continue
+            changed = []
+            for command, output in result.outputs:
+                key, digest = (result.device.pk, command[:COMMAND_MAX_LENGTH]), output_digest(output)
+                self.compared += 1
+                row = stored.get(key)
+                if row is not None and row.digest == digest:
+                    continue
+                changed.append((command, output))
+                if row is None:
+                    row = stored[key] = created[key] = DeviceCommandDigest(device_id=key[0], command=key[1])
+                elif key not in created:
+                    updated[key] = row
+                row.digest, row.last_changed = digest, now
+            self.changed += len(changed)
+            yield result, changed
+
+        if updated:
+            DeviceCommandDigest.objects.bulk_update(updated.values(), ["digest", "last_changed"])
+        if created:
+            # Another job may store the same device's digests concurrently; its digests win.
+            DeviceCommandDigest.objects.bulk_create(created.values(), ignore_conflicts=True)
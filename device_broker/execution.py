@@ -0,0 +1,287 @@
+"""Device Broker execution engine for running per-device work concurrently."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, Optional
+
+from device_broker.choices import DeviceCommandResultStatusChoices
+from device_broker.metrics import PhaseTimer
+
+# How long the dispatcher waits for a worker before replaying queued log records.
+FLUSH_INTERVAL = 0.5
+
+
+class DeviceTarget:  # pylint: disable=too-few-public-methods
+    """Everything needed to talk to one device, resolved on the job thread before any I/O starts.
+
+    Worker threads only ever see a DeviceTarget, never a live ORM instance, so they cannot trigger
+    lazy database queries from outside the job's thread.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        device,
+        name,
+        host=None,
+        credentials=None,
+        driver=None,
+        skip_reason=None,
+        timer=None,
+        limits=(),
+        timeout=None,
+        command_timeout=None,
+        cached_outputs=None,
+        error=None,
+    ):
+        """Initialize the DeviceTarget.
+
+        Args:
+            device: Device the target was resolved from.
+            name (str): Display name of the device, used in logs and results.
+            host (str | None): Host IP address or hostname to connect to.
+            credentials (dict | None): Mapping of secret_type -> secret value.
+            driver: Driver factory returned by `get_platform_driver`.
+            skip_reason (str | None): Why the device will not be contacted, if it was skipped.
+            timer (PhaseTimer | None): Timer for the phases of the device session, created if not given.
+            limits (tuple[ConnectionLimit, ...]): Rate limits and concurrency caps the session must respect.
+            timeout (float | None): Connection timeout derived for this device, or None for the job's.
+            command_timeout (float | None): Command timeout derived for this device, or None for the driver's.
+            cached_outputs (list[str] | None): Cached output of every command, if the device needs no session.
+            error (Exception | None): Why the device could not be prepared; it fails without a session.
+        """
+        self.device = device
+        self.name = name
+        self.host = host
+        self.credentials = credentials
+        self.driver = driver
+        self.skip_reason = skip_reason
+        self.timer = timer or PhaseTimer()
+        self.limits = limits
+        self.timeout = timeout
+        self.command_timeout = command_timeout
+        self.cached_outputs = cached_outputs
+        self.error = error
+
+
+class DeviceResult:  # pylint: disable=too-few-public-methods
+    """Outcome of processing one device."""
+
+    SUCCESS = DeviceCommandResultStatusChoices.STATUS_SUCCESS
+    FAILED = DeviceCommandResultStatusChoices.STATUS_FAILED
+    SKIPPED = DeviceCommandResultStatusChoices.STATUS_SKIPPED
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self, name, status, text, device=None, outputs=None, started=None, duration=None, timings=None, reason=None
+    ):
+        """Initialize the DeviceResult.
+
+        Args:
+            name (str): Display name of the device.
+            status (str): One of `SUCCESS`, `FAILED` or `SKIPPED`.
+            text (str): Formatted result reported for the device.
+            device: Device the result belongs to, if it should be recorded per command.
+            outputs (list[tuple[str, str]] | None): `(command, output)` pairs to record.
+            started (datetime | None): When the device session started.
+            duration (float | None): Seconds spent on the device session.
+            timings (dict | None): Seconds spent in each phase of the device session.
+            reason (str | None): Why the device failed, one of `metrics.FAILURE_REASONS`.
+        """
+        self.name = name
+        self.status = status
+        self.text = text
+        self.device = device
+        self.outputs = outputs or []
+        self.started = started
+        self.duration = duration
+        self.timings = timings or {}
+        self.reason = reason
+
+
+class QueuedLogger:
+    """Logger stand-in that buffers records from worker threads for replay on the job's thread.
+
+    Nautobot's database log handler only records entries emitted from the thread running the Celery
+    task, so worker threads log through this queue and the dispatcher flushes it into `Job.logger`.
+    """
+
+    def __init__(self):
+        """Initialize an empty record queue."""
+        self._records = queue.SimpleQueue()
+
+    def log(self, level, msg, *args, **kwargs):
+        """Queue a record at the given level."""
+        self._records.put((level, msg, args, kwargs))
+
+    def debug(self, msg, *args, **kwargs):
+        """Queue a DEBUG record."""
+        self.log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        """Queue an INFO record."""
+        self.log(logging.INFO, msg, *args, **kwargs)
+
+    def warning(self, msg, *args, **kwargs):
+        """Queue a WARNING record."""
+        self.log(logging.WARNING, msg, *args, **kwargs)
+
+    def error(self, msg, *args, **kwargs):
+        """Queue an ERROR record."""
+        self.log(logging.ERROR, msg, *args, **kwargs)
+
+    def flush(self, logger):
+        """Replay all queued records onto `logger` in the order they were emitted."""
+        while True:
+            try:
+                level, msg, args, kwargs = self._records.get_nowait()
+            except queue.Empty:
+                return
+            logger.log(level, msg, *args, **kwargs)
+
+
+def _dispatch(submit, items, limit, on_error, on_flush, retry=None):  # pylint: disable=too-many-arguments,too-many-branches
+    """Drive `submit` over `items`, keeping at most `limit` in flight, and yield results in input order.
+
+    At most `2 * limit` items are in flight, waiting to be retried or waiting to be yielded at any time,
+    so arbitrarily long iterables are processed with bounded memory.
+
+    When `retry(item, result, attempt)` returns a delay, the item is requeued instead of yielded. It is
+    submitted again once the delay has passed and no fresh item can be started, so retries wait behind
+    the rest of the work without holding a worker while they back off.
+    """
+    window = 2 * limit
+    items = iter(items)
+    in_flight = {}
+    finished = {}
+    retries = []
+    submitted = 0
+    next_to_yield = 0
+    exhausted = False
+
+    while True:
+        while len(in_flight) < limit:
+            if not exhausted and len(in_flight) + len(finished) + len(retries) < window:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted = True
+                else:
+                    in_flight[submit(item)] = (submitted, item, 1)
+                    submitted += 1
+                    continue
+            if retries and retries[0][0] <= time.monotonic():
+                _, index, item, attempt = heapq.heappop(retries)
+                in_flight[submit(item)] = (index, item, attempt)
+                continue
+            break
+
+        if next_to_yield in finished:
+            yield finished.pop(next_to_yield)
+            next_to_yield += 1
+            continue
+        if not in_flight and not retries:
+            break
+
+        timeout = FLUSH_INTERVAL
+        if retries:
+            timeout = min(timeout, max(0.0, retries[0][0] - time.monotonic()))
+        if in_flight:
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+        else:
+            time.sleep(timeout)
+            done = ()
+        for future in done:
+            index, item, attempt = in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                result = on_error(item, exc)
+            delay = retry(item, result, attempt) if retry else None
+            if delay is None:
+                finished[index] = result
+            else:
+                heapq.heappush(retries, (time.monotonic() + delay, index, item, attempt + 1))
+        if on_flush:
+            on_flush()
+
+    if on_flush:
+        on_flush()
+
+
+def run_concurrently(
+    func: Callable,
+    items: Iterable,
+    max_workers: int,
+    on_error: Callable,
+    on_flush: Optional[Callable] = None,
+    retry: Optional[Callable] = None,
+) -> Iterator:
+    """Apply `func` to every item on a bounded thread pool, yielding results in input order.
+
+    Items are pulled from `items` lazily on the calling thread, as worker slots free up.
+
+    Args:
+        func: Callable run in a worker thread for each item. Must not use the Django ORM.
+        items: Iterable of work items; consumed on the calling thread.
+        max_workers: Number of worker threads.
+        on_error: Called as `on_error(item, exc)` when `func` raises; its return value is yielded in place of the result.
+        on_flush: Called on the calling thread whenever the dispatcher wakes up, e.g. to flush a QueuedLogger.
+        retry: Called on the calling thread as `retry(item, result, attempt)` with every result (or `on_error`
+            value); returns the seconds after which to run the item again, or None to yield the result.
+
+    Yields:
+        The final result of `func` (or `on_error`) for each item, in the order the items were provided.
+    """
+    max_workers = max(1, int(max_workers or 1))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="device-broker") as pool:
+        yield from _dispatch(lambda item: pool.submit(func, item), items, max_workers, on_error, on_flush, retry)
+
+
+def run_async(
+    coro_func: Callable,
+    items: Iterable,
+    concurrency: int,
+    on_error: Callable,
+    on_flush: Optional[Callable] = None,
+    retry: Optional[Callable] = None,
+) -> Iterator:
+    """Run the coroutine `coro_func(item)` for every item on one event loop, yielding results in input order.
+
+    The event loop runs in a dedicated thread so that the calling thread stays free for Django ORM access
+    (which refuses to run inside an event loop) and for replaying worker log records.
+
+    Args:
+        coro_func: Coroutine function awaited for each item. Must not use the Django ORM.
+        items: Iterable of work items; consumed on the calling thread.
+        concurrency: Maximum number of coroutines running at once.
+        on_error: Called as `on_error(item, exc)` when the coroutine raises; its return value is yielded in place of the result.
+        on_flush: Called on the calling thread whenever the dispatcher wakes up, e.g. to flush a QueuedLogger.
+        retry: Called on the calling thread as `retry(item, result, attempt)` with every result (or `on_error`
+            value); returns the seconds after which to run the item again, or None to yield the result.
+
+    Yields:
+        The final result of `coro_func` (or `on_error`) for each item, in the order the items were provided.
+    """
+    concurrency = max(1, int(concurrency or 1))
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="device-broker-loop", daemon=True)
+    thread.start()
+    try:
+        yield from _dispatch(
+            lambda item: asyncio.run_coroutine_threadsafe(coro_func(item), loop),
+            items,
+            concurrency,
+            on_error,
+            on_flush,
+            retry,
+        )
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
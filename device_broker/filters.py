@@ -0,0 +1,48 @@
+"""Filtering for device_broker."""
+
+import django_filters
+from nautobot.apps.filters import BaseFilterSet, MultiValueCharFilter, NaturalKeyOrPKMultipleChoiceFilter, SearchFilter
+from nautobot.dcim.models import Device, Location, Platform
+from nautobot.extras.models import JobResult
+
+from device_broker import choices, models
+
+
+class DeviceCommandResultFilterSet(BaseFilterSet):
+    """Filter for DeviceCommandResult."""
+
+    q = SearchFilter(
+        filter_predicates={
+            "command": "icontains",
+            "device__name": "icontains",
+        },
+    )
+    device = NaturalKeyOrPKMultipleChoiceFilter(
+        to_field_name="name",
+        queryset=Device.objects.all(),
+        label="Device (name or ID)",
+    )
+    location = NaturalKeyOrPKMultipleChoiceFilter(
+        field_name="device__location",
+        to_field_name="name",
+        queryset=Location.objects.all(),
+        label="Location (name or ID)",
+    )
+    platform = NaturalKeyOrPKMultipleChoiceFilter(
+        field_name="device__platform",
+        to_field_name="name",
+        queryset=Platform.objects.all(),
+        label="Platform (name or ID)",
+    )
+    job_result = django_filters.ModelMultipleChoiceFilter(
+        queryset=JobResult.objects.all(),
+        label="Job result (ID)",
+    )
+    status = django_filters.MultipleChoiceFilter(choices=choices.DeviceCommandResultStatusChoices)
+    output_digest = MultiValueCharFilter(field_name="command_output__digest", label="Output digest (SHA-256)")
+
+    class Meta:
+        """Meta attributes for filter."""
+
+        model = models.DeviceCommandResult
+        fields = ["id", "command", "status", "started", "session_duration", "created"]
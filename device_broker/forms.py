@@ -0,0 +1,29 @@
+"""Forms for device_broker."""
+
+from django import forms
+from nautobot.apps.forms import DynamicModelMultipleChoiceField, NautobotFilterForm, StaticSelect2Multiple
+from nautobot.dcim.models import Device, Location, Platform
+
+from device_broker import choices, models
+
+
+class DeviceCommandResultFilterForm(NautobotFilterForm):
+    """Filter form to filter searches."""
+
+    model = models.DeviceCommandResult
+    field_order = ["q", "device", "location", "platform", "command", "status"]
+
+    q = forms.CharField(
+        required=False,
+        label="Search",
+        help_text="Search within device name or command.",
+    )
+    device = DynamicModelMultipleChoiceField(queryset=Device.objects.all(), to_field_name="name", required=False)
+    location = DynamicModelMultipleChoiceField(queryset=Location.objects.all(), to_field_name="name", required=False)
+    platform = DynamicModelMultipleChoiceField(queryset=Platform.objects.all(), to_field_name="name", required=False)
+    command = forms.CharField(required=False)
+    status = forms.MultipleChoiceField(
+        choices=choices.DeviceCommandResultStatusChoices,
+        required=False,
+        widget=StaticSelect2Multiple(),
+    )
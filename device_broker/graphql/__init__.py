@@ -0,0 +1 @@
+"""GraphQL module for device_broker app."""
@@ -0,0 +1,31 @@
+"""GraphQL types for device_broker."""
+
+import graphene
+from nautobot.apps.graphql import OptimizedNautobotObjectType
+
+from device_broker import filters, models
+
+
+class DeviceCommandResultType(OptimizedNautobotObjectType):
+    """GraphQL type for DeviceCommandResult, returning the output decompressed."""
+
+    output = graphene.String()
+    output_digest = graphene.String()
+
+    class Meta:
+        """Meta attributes."""
+
+        model = models.DeviceCommandResult
+        filterset_class = filters.DeviceCommandResultFilterSet
+        exclude = ["command_output"]
+
+    def resolve_output(self, info):  # pylint: disable=unused-argument
+        """Return the decompressed command output."""
+        return self.output
+
+    def resolve_output_digest(self, info):  # pylint: disable=unused-argument
+        """Return the SHA-256 digest of the command output."""
+        return self.command_output.digest
+
+
+graphql_types = [DeviceCommandResultType]
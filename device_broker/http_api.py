@@ -0,0 +1,363 @@
+"""Device Broker driver wrapper for devices with an HTTP API: Arista eAPI, Cisco NX-API and RESTCONF.
+
+All the commands of a session are sent in one JSON-RPC request (eAPI, NX-API) or, for RESTCONF, where
+commands are resource paths, as one GET per path over the same connection. Outputs are the JSON
+returned by the device, pretty-printed. Connections use HTTP/1.1 keep-alive; when a session ends, its
+connection is parked in a per-process pool and reused by the next session to the same host, which
+saves the TCP and TLS handshakes of retries and of runs in quick succession.
+
+The protocol of each device follows its Platform's network driver. Settings come from
+`PLUGINS_CONFIG["device_broker"]["http_api"]`, overriding `HTTP_API_DEFAULTS`.
+"""
+
+from __future__ import annotations
+
+import base64
+import collections
+import functools
+import http.client
+import json
+import ssl
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+
+HTTP_API_DEFAULTS = {
+    "scheme": "https",
+    "port": None,
+    "verify": True,
+    # Protocol per network driver; other drivers use `default_protocol`.
+    "protocols": {"arista_eos": "eapi", "cisco_nxos": "nxapi"},
+    "default_protocol": "restconf",
+    "restconf_root": "/restconf/data",
+    # Seconds to wait for the response to all of a session's commands when no command timeout is derived.
+    "read_timeout": 120.0,
+    "idle_timeout": 30.0,
+    "max_idle_per_host": 2,
+    # Idle connections hold a file descriptor each, so only the most recently used hosts keep theirs.
+    "max_hosts": 32,
+}
+
+# Exceptions showing that a connection taken from the pool was closed by the device while it was idle.
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+def get_http_api_settings() -> dict:
+    """Return the HTTP API settings, `HTTP_API_DEFAULTS` overridden by the app configuration."""
+    return {**HTTP_API_DEFAULTS, **(settings.PLUGINS_CONFIG.get("device_broker", {}).get("http_api") or {})}
+
+
+def get_http_api_port(options: Optional[dict] = None) -> int:
+    """Return the TCP port HTTP API sessions connect to: the `port` setting, or the default port of the scheme."""
+    options = options or get_http_api_settings()
+    return options["port"] or (443 if options["scheme"] == "https" else 80)
+
+
+@functools.lru_cache(maxsize=None)
+def _ssl_context(verify: bool) -> ssl.SSLContext:
+    """Return the TLS context shared by every HTTPS connection; loading CA certificates per connection is slow."""
+    context = ssl.create_default_context()
+    if not verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+class HttpApiError(RuntimeError):
+    """The device answered with an HTTP error status or a JSON-RPC error."""
+
+
+class HttpApiAuthenticationError(HttpApiError):
+    """The device rejected the credentials."""
+
+
+class KeepAlivePool:
+    """Idle keep-alive connections per host, handed to later sessions to the same host in this process.
+
+    At most `max_idle_per_host` connections are kept per host and `max_hosts` hosts are tracked; the
+    least recently used host's connections are closed first. Connections idle for longer than
+    `idle_timeout` seconds are closed, for every host, whenever the pool is used, as devices close
+    them on their side.
+    """
+
+    def __init__(self):
+        """Initialize an empty pool."""
+        self._idle = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, idle_timeout: float) -> list:
+        """Remove the connections idle for `idle_timeout` seconds or more from every host and return them.
+
+        Must be called with the lock held.
+        """
+        cutoff = time.monotonic() - idle_timeout
+        expired = []
+        for key in list(self._idle):
+            idle = self._idle[key]
+            # Connections are appended as they are parked, so the expired ones come first.
+            fresh = next((index for index, (_, since) in enumerate(idle) if since > cutoff), len(idle))
+            expired.extend(candidate for candidate, _ in idle[:fresh])
+            del idle[:fresh]
+            if not idle:
+                del self._idle[key]
+        return expired
+
+    def get(self, key, idle_timeout: float) -> Optional[http.client.HTTPConnection]:
+        """Return an idle connection to `key`, or None if there is none fresh enough."""
+        connection = None
+        with self._lock:
+            expired = self._expire(idle_timeout)
+            idle = self._idle.get(key)
+            if idle:
+                connection, _ = idle.pop()
+                if not idle:
+                    del self._idle[key]
+        for candidate in expired:
+            candidate.close()
+        return connection
+
+    def put(  # pylint: disable=too-many-arguments
+        self,
+        key,
+        connection: http.client.HTTPConnection,
+        max_idle_per_host: int,
+        max_hosts: int,
+        idle_timeout: float,
+    ):
+        """Park an idle connection to `key` for reuse, closing whatever expired or no longer fits in the pool."""
+        with self._lock:
+            evicted = self._expire(idle_timeout)
+            idle = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            idle.append((connection, time.monotonic()))
+            evicted.extend(candidate for candidate, _ in idle[: max(0, len(idle) - max_idle_per_host)])
+            del idle[: max(0, len(idle) - max_idle_per_host)]
+            while len(self._idle) > max_hosts:
+                _, oldest = self._idle.popitem(last=False)
+                evicted.extend(candidate for candidate, _ in oldest)
+        for candidate in evicted:
+            candidate.close()
+
+    def clear(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, collections.OrderedDict()
+        for connections in idle.values():
+            for connection, _ in connections:
+                connection.close()
+
+
+keep_alive_pool = KeepAlivePool()
+
+
+class HttpApiDriverWrapper:
+    """Wrapper for devices managed over an HTTP API instead of an SSH CLI."""
+
+    label = "HTTP API (eAPI, NX-API, RESTCONF)"
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        network_driver: str,
+        host: str,
+        credentials: dict,
+        timeout: Optional[float] = None,
+        command_timeout: Optional[float] = None,
+    ):
+        """Initialize the HTTP API driver wrapper.
+
+        Args:
+            network_driver: The Platform's network driver, which selects the protocol.
+            host: Target hostname or IP address.
+            credentials: Mapping with "username" and "password".
+            timeout: TCP connection timeout in seconds.
+            command_timeout: Seconds to wait per command; a session's wait is this times its number of requests.
+        """
+        self.options = get_http_api_settings()
+        self.protocol = self.options["protocols"].get(network_driver, self.options["default_protocol"])
+        self.host = host
+        self.credentials = credentials
+        self.timeout = timeout
+        self.command_timeout = command_timeout
+        self.connection = None
+        self.reused = False
+        # Whether the session's connection came from the pool, so connecting measured no device latency.
+        self.pooled = False
+        self.key = (self.options["scheme"], host, get_http_api_port(self.options))
+
+    def _open(self) -> http.client.HTTPConnection:
+        """Open a new connection to the device, including the TLS handshake for HTTPS."""
+        scheme, host, port = self.key
+        if scheme == "https":
+            context = _ssl_context(bool(self.options["verify"]))
+            connection = http.client.HTTPSConnection(host, port, timeout=self.timeout, context=context)
+        else:
+            connection = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        connection.connect()
+        return connection
+
+    def connect(self):
+        """Take an idle connection to the device from the pool, or open one.
+
+        Returns:
+            HttpApiDriverWrapper: Returns self for method chaining.
+        """
+        self.connection = keep_alive_pool.get(self.key, self.options["idle_timeout"])
+        self.pooled = self.reused = self.connection is not None
+        if self.connection is None:
+            self.connection = self._open()
+        return self
+
+    def _request(self, method: str, path: str, body=None, requests: int = 1, content_type: str = "application/json"):
+        """Send one request and return its decoded JSON body.
+
+        A connection taken from the pool may have been closed by the device while idle; the request is
+        then sent once more on a new connection.
+
+        Args:
+            method: HTTP method.
+            path: Request path.
+            body: JSON-serializable request body, if any.
+            requests: Number of commands the response waits for, to scale the command timeout.
+            content_type: Content type of the body, also sent as the accepted response type.
+        """
+        credentials = f"{self.credentials.get('username', '')}:{self.credentials.get('password', '')}"
+        headers = {
+            "Authorization": "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii"),
+            "Accept": content_type,
+        }
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = content_type
+        wait = self.command_timeout * requests if self.command_timeout is not None else self.options["read_timeout"]
+        try:
+            try:
+                response = self._send(method, path, payload, headers, wait)
+            except STALE_CONNECTION_ERRORS:
+                if not self.reused:
+                    raise
+                self.connection.close()
+                self.connection, self.reused = self._open(), False
+                response = self._send(method, path, payload, headers, wait)
+            self.reused = False
+            data = response.read()
+        except Exception:
+            # A request that failed part way leaves the connection unusable, so it must not be pooled.
+            self.connection.close()
+            raise
+        if response.will_close:
+            self.connection.close()
+        if response.status in (401, 403):
+            raise HttpApiAuthenticationError(f"HTTP {response.status} {response.reason}")
+        if response.status >= 400:
+            raise HttpApiError(f"HTTP {response.status} {response.reason}: {data.decode('utf-8', 'replace')[:200]}")
+        return json.loads(data) if data else {}
+
+    def _send(self, method, path, payload, headers, wait):  # pylint: disable=too-many-arguments
+        """Send the request and return the response once its headers arrive within `wait` seconds."""
+        self.connection.timeout = wait
+        if self.connection.sock is not None:
+            self.connection.sock.settimeout(wait)
+        self.connection.request(method, path, body=payload, headers=headers)
+        return self.connection.getresponse()
+
+    @staticmethod
+    def _check(reply: dict):
+        """Return the result of a JSON-RPC reply, raising HttpApiError if it is an error."""
+        if "error" in reply:
+            error = reply["error"]
+            raise HttpApiError(f"{error.get('message', 'error')} (code {error.get('code')})")
+        return reply.get("result")
+
+    def _eapi(self, cmds: list[str], output_format: str) -> list:
+        """Run commands with one eAPI `runCmds` call and return the result of each."""
+        body = {
+            "jsonrpc": "2.0",
+            "method": "runCmds",
+            "params": {"version": 1, "cmds": cmds, "format": output_format},
+            "id": "device-broker",
+        }
+        return self._check(self._request("POST", "/command-api", body, requests=len(cmds)))
+
+    def _nxapi(self, cmds: list[str]) -> list:
+        """Run commands with one NX-API JSON-RPC batch and return the result of each."""
+        body = [
+            {"jsonrpc": "2.0", "method": "cli", "params": {"cmd": cmd, "version": 1}, "id": index}
+            for index, cmd in enumerate(cmds, start=1)
+        ]
+        replies = self._request("POST", "/ins", body, requests=len(cmds), content_type="application/json-rpc")
+        # NX-API answers a batch of one with a single object instead of a list.
+        replies = replies if isinstance(replies, list) else [replies]
+        replies = sorted(replies, key=lambda reply: reply.get("id", 0))
+        return [(self._check(reply) or {}).get("body") for reply in replies]
+
+    def send_command(self, cmd: str) -> str:
+        """Run one command and return its JSON output."""
+        return self.send_commands([cmd])[0]
+
+    def send_commands(self, cmds: list[str]) -> list[str]:
+        """Run several commands and return their JSON outputs, in order.
+
+        eAPI and NX-API run all of them in one request. For RESTCONF each command is a resource path
+        below `restconf_root`, fetched with one GET per path over the same connection.
+
+        Args:
+            cmds: The commands, or RESTCONF paths, to run.
+
+        Returns:
+            The output of each command, as indented JSON.
+        """
+        if not cmds:
+            return []
+        if self.protocol == "eapi":
+            results = self._eapi(cmds, "json")
+        elif self.protocol == "nxapi":
+            results = self._nxapi(cmds)
+        else:
+            root = self.options["restconf_root"].rstrip("/")
+            results = [
+                self._request("GET", f"{root}/{cmd.strip().lstrip('/')}", content_type="application/yang-data+json")
+                for cmd in cmds
+            ]
+        return [json.dumps(result, indent=2, sort_keys=True) for result in results]
+
+    def send_config(self, cmds: list[str], exit_config_mode: bool = True, save: bool = False) -> str:
+        """Push configuration lines in one request and return the device output.
+
+        Args:
+            cmds: The configuration lines to send.
+            exit_config_mode: Unused; every request leaves configuration mode when it completes.
+            save: Save the running configuration afterwards, in the same request.
+
+        Returns:
+            The device output for the configuration lines, and the save if requested.
+
+        Raises:
+            NotImplementedError: For RESTCONF, which has no CLI configuration lines.
+        """
+        save_cmds = ["copy running-config startup-config"] if save else []
+        if self.protocol == "eapi":
+            results = self._eapi(["configure", *cmds, "end", *save_cmds], "text")
+            return "".join(result.get("output", "") for result in results)
+        if self.protocol == "nxapi":
+            results = self._nxapi(["configure terminal", *cmds, "end", *save_cmds])
+            return "\n".join(json.dumps(result, sort_keys=True) for result in results if result)
+        raise NotImplementedError("Configuration lines are not supported over RESTCONF")
+
+    def disconnect(self):
+        """End the session, parking the connection in the pool if the device keeps it open."""
+        connection, self.connection = self.connection, None
+        if connection is None:
+            return
+        if connection.sock is None:
+            connection.close()
+            return
+        keep_alive_pool.put(
+            self.key,
+            connection,
+            self.options["max_idle_per_host"],
+            self.options["max_hosts"],
+            self.options["idle_timeout"],
+        )
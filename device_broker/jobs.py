@@ -1,19 +1,169 @@
 """Device Broker Jobs module for executing commands on network devices."""
 
-from django.db.models import Q
+import functools
+import itertools
+import math
+import time
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.utils import timezone
 from nautobot.apps.jobs import (
     BooleanVar,
     ChoiceVar,
     IntegerVar,
     Job,
+    JSONVar,
     MultiObjectVar,
     ObjectVar,
     TextVar,
     register_jobs,
 )
 from nautobot.dcim.models import Device, Location, Platform
+from nautobot.extras.choices import JobResultStatusChoices
+from nautobot.extras.models import DynamicGroup, JobResult
+
+from device_broker.cache import OutputCache, credential_cache
+from device_broker.delta import DeltaFilter
+from device_broker.execution import DeviceResult, DeviceTarget, QueuedLogger, run_async, run_concurrently
+from device_broker.http_api import get_http_api_port
+from device_broker.limits import RateLimiter, limited, limited_async
+from device_broker.metrics import PhaseTimer, failure_reason
+from device_broker.preflight import get_preflight_settings, sweep
+from device_broker.results import ResultSink
+from device_broker.retry import RetryPolicy
+from device_broker.targeting import device_filter_query, dynamic_group_query
+from device_broker.timeouts import AdaptiveTimeouts
+from device_broker.utils import driver_registry, get_group_credentials, get_platform_driver
+
+# Seconds between checks on the status of shard sub-jobs.
+SHARD_POLL_INTERVAL = 5
+
+# Number of devices fetched from the database per query while streaming a run's devices.
+DEVICE_CHUNK_SIZE = 2000
+
+# Columns loaded for each device and its related objects: only those needed to connect and report.
+DEVICE_FIELDS = (
+    "id",
+    "name",
+    "location",
+    "location__name",
+    "platform",
+    "platform__name",
+    "platform__network_driver",
+    "primary_ip4",
+    "primary_ip4__host",
+    "primary_ip4__mask_length",
+    "primary_ip6",
+    "primary_ip6__host",
+    "primary_ip6__mask_length",
+    "secrets_group",
+    "secrets_group__name",
+    # Used to display devices without a name.
+    "device_type",
+    "virtual_chassis",
+    "vc_position",
+    "device_broker_latency__id",
+    "device_broker_latency__device",
+    "device_broker_latency__connect_samples",
+    "device_broker_latency__command_samples",
+)
+
+# Name of the file attached to each JobResult with the full per-device output.
+RESULTS_FILENAME = "device-broker-results.txt"
+
+# Name of the file attached to each JobResult with phase timings per platform and location.
+TIMINGS_FILENAME = "device-broker-timings.csv"
+
+
+def _device_host(device):
+    """Return the address used to reach `device`: its primary IP, or its name if it has none."""
+    return str(device.primary_ip.address.ip) if device.primary_ip else device.name
+
+
+def _device_result(target, status, text, outputs, started=None, start=None, reason=None):  # pylint: disable=too-many-arguments
+    """Build the DeviceResult for `target`, timing its session from the `time.monotonic()` value `start`."""
+    return DeviceResult(
+        target.name,
+        status,
+        text,
+        device=target.device,
+        outputs=outputs,
+        started=started,
+        duration=None if start is None else round(time.monotonic() - start, 3),
+        timings=dict(target.timer.durations),
+        reason=reason,
+    )
+
+
+def _shard_timeout(shard_size, job_kwargs):
+    """Return the seconds the parent of a sharded run waits for its shards before reporting them as unfinished.
+
+    The `shard_timeout` setting if set, otherwise enough time for every device of a shard to use its
+    full connection timeout on every attempt, one device after another.
+    """
+    timeout = settings.PLUGINS_CONFIG.get("device_broker", {}).get("shard_timeout")
+    if timeout:
+        return int(timeout)
+    return shard_size * (job_kwargs["connection_timeout"] or 30) * (job_kwargs["max_attempts"] or 1)
 
-from device_broker.utils import get_group_credentials, get_platform_driver
+
+def _connect_timeout(target, connection_timeout, logger):
+    """Return the connection timeout of `target`: the one derived from its latency history, at most the job's."""
+    if target.timeout is None:
+        return connection_timeout
+    timeout = min(target.timeout, connection_timeout) if connection_timeout else target.timeout
+    if timeout != connection_timeout:
+        logger.info(
+            "Device %s: connection timeout %.1fs derived from its latency history (job input %ss).",
+            target.name,
+            timeout,
+            connection_timeout,
+        )
+    return timeout
+
+
+def _format_outputs(name, outputs, header=""):
+    """Return the result text of a device from its `(command, output)` pairs."""
+    return f"{name}{header}:\n" + "\n".join(f"Command: {cmd}\nOutput:\n{output}" for cmd, output in outputs)
+
+
+def _prepared_result(target, commands_list, logger):
+    """Return the result of a target that needs no session: skipped, failed to prepare or served from cache, else None."""
+    if target.error is not None:
+        return _device_result(
+            target,
+            DeviceResult.FAILED,
+            f"{target.name}: Error - {target.error}",
+            [(cmd, f"Error - {target.error}") for cmd in commands_list],
+            reason=failure_reason(target.error, target.timer.current),
+        )
+    if target.skip_reason:
+        return _device_result(
+            target,
+            DeviceResult.SKIPPED,
+            f"{target.name}: {target.skip_reason}",
+            [(cmd, target.skip_reason) for cmd in commands_list],
+        )
+    if target.cached_outputs is not None:
+        logger.info("Device %s served from the output cache.", target.name)
+        outputs = list(zip(commands_list, target.cached_outputs))
+        return _device_result(
+            target, DeviceResult.SUCCESS, _format_outputs(target.name, outputs, " (cached output)"), outputs
+        )
+    return None
+
+
+def _delta_result(result, changed):
+    """Narrow a successful device result to the `(command, output)` pairs that changed since the previous run."""
+    if not changed:
+        result.text = f"{result.name}: no changes since the previous run."
+    else:
+        result.text = _format_outputs(
+            result.name, changed, f" ({len(changed)} of {len(result.outputs)} outputs changed)"
+        )
+    result.outputs = changed
+    return result
 
 
 class DeviceBrokerJob(Job):
@@ -28,7 +178,25 @@ class DeviceBrokerJob(Job):
     devices = MultiObjectVar(Device, required=False, description="Select specific devices (optional).")
     platform = ObjectVar(Platform, required=False, description="Filter devices by platform (optional).")
     location = ObjectVar(Location, required=False, description="Filter devices by location (optional).")
+    dynamic_groups = MultiObjectVar(
+        DynamicGroup,
+        required=False,
+        query_params={"content_type": "dcim.device"},
+        label="Dynamic Groups",
+        description="Select the member devices of these dynamic groups (optional).",
+    )
+    device_filter = JSONVar(
+        required=False,
+        label="Device Filter",
+        description='Select the devices matching these device filters, e.g. {"role": ["core"], "location": ["Region 1"]}.',
+    )
     config_mode = BooleanVar(required=True, label="Enter configuration mode?", default=False)
+    save_config = BooleanVar(
+        required=False,
+        default=False,
+        label="Save configuration?",
+        description="Save the running configuration after a configuration mode run (Netmiko only).",
+    )
     commands = TextVar(required=True, label="List of Commands", description="Enter one command per line.")
     connection_timeout = IntegerVar(
         required=False,
@@ -37,23 +205,88 @@ class DeviceBrokerJob(Job):
         description="TCP connection timeout for device sessions.",
     )
     connection_method = ChoiceVar(
-        choices=[("netmiko", "Netmiko"), ("napalm", "NAPALM")],
+        choices=driver_registry.choices(),
         default="netmiko",
         label="Connection Method",
         description="Choose the transport library used to connect to devices.",
     )
+    max_workers = IntegerVar(
+        required=False,
+        default=10,
+        min_value=1,
+        label="Max Workers",
+        description="Number of devices to process concurrently. Scrapli (asyncio) can run thousands on one worker.",
+    )
+    shard_size = IntegerVar(
+        required=False,
+        default=0,
+        min_value=0,
+        label="Shard Size",
+        description="Split runs larger than this many devices into sub-jobs spread across Celery workers (0 disables).",
+    )
+    max_attempts = IntegerVar(
+        required=False,
+        default=1,
+        min_value=1,
+        label="Max Attempts",
+        description="Attempts per device when connecting fails transiently; retries run after the rest of the work.",
+    )
+    preflight = BooleanVar(
+        required=False,
+        default=False,
+        label="TCP pre-flight check?",
+        description="Probe every device's management port first and skip the devices that do not answer.",
+    )
+    use_output_cache = BooleanVar(
+        required=False,
+        default=False,
+        label="Use cached outputs?",
+        description="Answer read-only commands from outputs cached by recent runs instead of connecting.",
+    )
+    delta_only = BooleanVar(
+        required=False,
+        default=False,
+        label="Only report changes?",
+        description="Record and report only the command outputs that changed since the previous run on each device.",
+    )
+
+    def _get_devices(self, devices, platform, location, dynamic_groups=None, device_filter=None):  # pylint: disable=too-many-arguments
+        """Select the devices matching any of the provided sources in a single query, sorted by name.
 
-    def _get_devices(self, devices, platform, location):
-        """Merge device lists from the selected sources, deduplicate."""
-        queryset = Device.objects.all()
+        Dynamic groups and the device filter expression are compiled into the same query, see
+        `device_broker.targeting`.
+
+        Returns a lazy QuerySet; callers stream it with `iterator(chunk_size=DEVICE_CHUNK_SIZE)`, so
+        devices are fetched in chunks as the run proceeds rather than all up front. Only `DEVICE_FIELDS`
+        are loaded, and the related objects used while preparing each device are fetched with its chunk,
+        so processing a device does not issue further queries.
+        """
         filters = Q()
+        if isinstance(devices, QuerySet):
+            # Compiled into a subquery, so the selected devices are not loaded to read their primary keys.
+            filters |= Q(pk__in=devices.values("pk"))
+        elif devices:
+            filters |= Q(pk__in=[device.pk for device in devices])
         if platform:
             filters |= Q(platform=platform)
         if location:
             filters |= Q(location=location)
-        filtered_devices = queryset.filter(filters).distinct() if filters else Device.objects.none()
-        all_devices = set(devices or []) | set(filtered_devices)
-        return list(all_devices)
+        for group in dynamic_groups or ():
+            filters |= dynamic_group_query(group)
+        if device_filter:
+            filters |= device_filter_query(device_filter)
+        if not filters:
+            return Device.objects.none()
+        # Matching through a primary key subquery keeps each device to one row, whichever joins the sources need.
+        return (
+            Device.objects.filter(pk__in=Device.objects.filter(filters).values("pk"))
+            .select_related(
+                "platform", "location", "primary_ip4", "primary_ip6", "secrets_group", "device_broker_latency"
+            )
+            .prefetch_related("secrets_group__secrets_group_associations__secret", "tags")
+            .only(*DEVICE_FIELDS)
+            .order_by("name", "pk")
+        )
 
     def run(
         self,
@@ -64,6 +297,15 @@ class DeviceBrokerJob(Job):
         commands,
         connection_timeout=30,
         connection_method="netmiko",
+        max_workers=10,
+        shard_size=0,
+        save_config=False,
+        preflight=False,
+        max_attempts=1,
+        use_output_cache=False,
+        delta_only=False,
+        dynamic_groups=None,
+        device_filter=None,
         **kwargs,
     ):  # pylint: disable=too-many-arguments,arguments-differ
         """Execute commands on selected devices using their platform drivers.
@@ -75,87 +317,567 @@ class DeviceBrokerJob(Job):
             config_mode: Whether to enter configuration mode
             commands: Commands to execute on devices
             connection_timeout (int): TCP connection timeout in seconds (default 30)
-            connection_method (str): "netmiko" or "napalm" (default "netmiko")
+            connection_method (str): "netmiko", "napalm", "scrapli", "simulated", "http_api" or a method registered
+                through an entry point (default "netmiko")
+            max_workers (int): Number of devices to process concurrently (default 10)
+            shard_size (int): Split the run into sub-jobs of this many devices, 0 to disable (default 0)
+            save_config (bool): Save the running configuration after a configuration mode run (default False)
+            preflight (bool): Skip devices whose management port does not accept a TCP connection (default False)
+            max_attempts (int): Attempts per device when connecting fails transiently (default 1, no retries)
+            use_output_cache (bool): Serve devices whose read-only commands all have cached outputs without
+                connecting, and cache the outputs of this run (default False)
+            delta_only (bool): Record and report only the outputs that changed since the previous run (default False)
+            dynamic_groups: Dynamic groups whose member devices to target
+            device_filter (dict): DeviceFilterSet expression selecting devices to target
             **kwargs: Additional keyword arguments
 
         Returns:
-            str: Formatted results from all device command executions
+            dict: Number of devices processed by status, and the phase timings of their sessions. The
+                full output of every device, in device selection order, and the phase timings per
+                platform and location are attached to the JobResult as files.
         """
-        results = []
         commands_list = [cmd.strip() for cmd in commands.strip().splitlines() if cmd.strip()]
-        devices_to_run = self._get_devices(devices, platform, location)
-        if not devices_to_run:
+        devices_to_run = self._get_devices(devices, platform, location, dynamic_groups, device_filter)
+        if not devices_to_run.exists():
             self.logger.warning("No devices matched the provided filters.")
             return "No devices to execute against."
 
-        for device in devices_to_run:
-            result = self._process_device(
-                device,
-                commands_list,
-                config_mode,
-                connection_timeout=connection_timeout,
-                connection_method=connection_method,
+        # Optional integer inputs left empty arrive as None.
+        shard_size = shard_size or 0
+        with ResultSink(self.job_result) as sink:
+            total = devices_to_run.count() if shard_size else 0
+            if total > shard_size:
+                job_kwargs = {
+                    "config_mode": config_mode,
+                    "commands": commands,
+                    "connection_timeout": connection_timeout,
+                    "connection_method": connection_method,
+                    "max_workers": max_workers,
+                    "save_config": save_config,
+                    "preflight": preflight,
+                    "max_attempts": max_attempts,
+                    "use_output_cache": use_output_cache,
+                    "delta_only": delta_only,
+                }
+                self._run_sharded(devices_to_run, total, shard_size, commands_list, job_kwargs, sink)
+            else:
+                self._execute(
+                    devices_to_run,
+                    commands_list,
+                    config_mode,
+                    connection_timeout,
+                    connection_method,
+                    max_workers,
+                    sink,
+                    save_config=save_config,
+                    preflight=preflight,
+                    max_attempts=max_attempts,
+                    use_output_cache=use_output_cache,
+                    delta_only=delta_only,
+                )
+            file_proxy = sink.save(RESULTS_FILENAME)
+            self.logger.info("Created file [%s](%s)", file_proxy.name, file_proxy.file.url)
+            timings_file = sink.save_timings(TIMINGS_FILENAME)
+            self.logger.info("Created file [%s](%s)", timings_file.name, timings_file.file.url)
+            summary = sink.summary()
+
+        means = sink.timings.phase_means()
+        if means:
+            self.logger.info(
+                "Mean time per device: %s.", ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in means.items())
+            )
+        failures = sink.timings.failure_counts()
+        if failures:
+            self.logger.warning(
+                "Failures by reason: %s.", ", ".join(f"{reason} {count}" for reason, count in sorted(failures.items()))
             )
-            if result:
-                results.append(result)
 
-        return "\n\n".join(results)
+        self.logger.info(
+            "Processed %d devices: %d succeeded, %d failed, %d skipped.",
+            summary["devices"],
+            summary[DeviceResult.SUCCESS],
+            summary[DeviceResult.FAILED],
+            summary[DeviceResult.SKIPPED],
+        )
+        return summary
 
-    def _process_device(  # pylint: disable=too-many-arguments
+    def _execute(  # pylint: disable=too-many-arguments
         self,
-        device,
+        devices_to_run,
         commands_list,
         config_mode,
         connection_timeout,
         connection_method,
+        max_workers,
+        sink,
+        save_config=False,
+        preflight=False,
+        max_attempts=1,
+        use_output_cache=False,
+        delta_only=False,
     ):
-        """Process a single device and execute commands.
+        """Run the commands against `devices_to_run` on this worker, writing each result to `sink` as it completes."""
+        cache_stats = credential_cache.stats()
+        output_cache = OutputCache.from_settings(connection_method, commands_list) if use_output_cache else None
+        worker_logger = QueuedLogger()
+        limiter = RateLimiter.from_settings(self.logger)
+        timeouts = AdaptiveTimeouts.from_settings()
+        if preflight and connection_method == "simulated":
+            # A simulated run must not touch the network, so its devices are never probed.
+            self.logger.info("Pre-flight check skipped: simulated runs do not contact devices.")
+            preflight = False
+        unreachable = (
+            self._preflight(devices_to_run.iterator(chunk_size=DEVICE_CHUNK_SIZE), connection_method)
+            if preflight
+            else {}
+        )
+        targets = (
+            self._prepare_device(device, connection_method, limiter, timeouts, unreachable, output_cache)
+            for device in devices_to_run.iterator(chunk_size=DEVICE_CHUNK_SIZE)
+        )
+        if driver_registry.is_async(connection_method):
+            engine, process = run_async, limited_async(self._process_device_async)
+        else:
+            engine, process = run_concurrently, limited(self._process_device)
+        results = engine(
+            lambda target: process(
+                target,
+                commands_list,
+                config_mode,
+                connection_timeout=connection_timeout,
+                save_config=save_config,
+                logger=worker_logger,
+            ),
+            targets,
+            max_workers,
+            on_error=lambda target, exc: _device_result(
+                target,
+                DeviceResult.FAILED,
+                f"{target.name}: Error - {exc}",
+                [(cmd, f"Error - {exc}") for cmd in commands_list],
+                reason=failure_reason(exc, target.timer.current),
+            ),
+            on_flush=lambda: worker_logger.flush(self.logger),
+            retry=functools.partial(self._retry_delay, RetryPolicy.from_settings(max_attempts)),
+        )
+        delta = DeltaFilter() if delta_only else None
+        compared = delta.changes(results) if delta else ((result, None) for result in results)
+        for result, changed in compared:
+            if result.device is not None and result.status == DeviceResult.SUCCESS:
+                if config_mode:
+                    OutputCache.invalidate(result.device.pk)
+                elif output_cache is not None and "commands" in result.timings:
+                    # Only results of a live session have timed commands; cached results are not stored again.
+                    output_cache.set(result.device.pk, result.outputs)
+            sink.add(result if changed is None else _delta_result(result, changed))
+
+        new_stats = credential_cache.stats()
+        self.logger.info(
+            "Credential cache: %d hits, %d misses, %d cached entries.",
+            new_stats["hits"] - cache_stats["hits"],
+            new_stats["misses"] - cache_stats["misses"],
+            new_stats["size"],
+        )
+        if output_cache is not None:
+            self.logger.info("Output cache: %d hits, %d misses.", output_cache.hits, output_cache.misses)
+        if delta is not None:
+            self.logger.info(
+                "Delta: %d of %d command outputs changed since the previous run.", delta.changed, delta.compared
+            )
+
+    def _run_sharded(self, devices_to_run, total, shard_size, commands_list, job_kwargs, sink):  # pylint: disable=too-many-arguments
+        """Fan a large run out across Celery workers and merge the shard results into `sink` in device order.
+
+        The first shard is processed by this job while the others run as sub-jobs of the same Job, each
+        targeting an explicit list of devices with sharding disabled. Sub-jobs need free worker slots, so
+        sharding only helps when the Celery pool has more than one slot. Only the primary keys of the
+        other shards' devices are read here.
 
         Args:
-            device: Device object to process
+            devices_to_run: Ordered QuerySet of devices to process
+            total (int): Number of devices in `devices_to_run`
+            shard_size (int): Maximum number of devices per shard
             commands_list: List of commands to execute
-            config_mode: Whether to enter configuration mode
-            connection_timeout (int): TCP connection timeout in seconds
-            connection_method (str): "netmiko" or "napalm"
+            job_kwargs (dict): Remaining job inputs, forwarded unchanged to every shard
+            sink (ResultSink): Sink receiving the results of every shard
+        """
+        count = math.ceil(total / shard_size)
+        self.logger.info("Splitting %d devices into %d shards of up to %d.", total, count, shard_size)
+
+        pks = devices_to_run.prefetch_related(None).values_list("pk", flat=True)[shard_size:]
+        pks = iter(pks.iterator(chunk_size=DEVICE_CHUNK_SIZE))
+        child_results = []
+        for index in range(2, count + 1):
+            shard = [str(pk) for pk in itertools.islice(pks, shard_size)]
+            child = JobResult.enqueue_job(
+                self.job_model,
+                self.user,
+                task_queue=self.celery_kwargs.get("queue"),
+                devices=shard,
+                platform=None,
+                location=None,
+                dynamic_groups=None,
+                device_filter=None,
+                shard_size=0,
+                **job_kwargs,
+            )
+            self.logger.info(
+                "Dispatched shard %d/%d (%d devices) as job result %s.", index, count, len(shard), child.pk
+            )
+            child_results.append(child)
+
+        self._execute(
+            devices_to_run[:shard_size],
+            commands_list,
+            job_kwargs["config_mode"],
+            job_kwargs["connection_timeout"],
+            job_kwargs["connection_method"],
+            job_kwargs["max_workers"],
+            sink,
+            save_config=job_kwargs["save_config"],
+            preflight=job_kwargs["preflight"],
+            max_attempts=job_kwargs["max_attempts"],
+            use_output_cache=job_kwargs["use_output_cache"],
+            delta_only=job_kwargs["delta_only"],
+        )
+
+        timeout = _shard_timeout(shard_size, job_kwargs)
+        deadline = time.monotonic() + timeout
+        pending = {child.pk for child in child_results}
+        while pending:
+            finished = JobResult.objects.filter(pk__in=pending, status__in=JobResultStatusChoices.READY_STATES)
+            pending -= set(finished.values_list("pk", flat=True))
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                break
+            time.sleep(min(SHARD_POLL_INTERVAL, remaining))
+
+        for index, child in enumerate(child_results, start=2):
+            child.refresh_from_db()
+            if child.pk in pending:
+                self.logger.error(
+                    "Shard %d (job result %s) did not finish within %ds (status %s).",
+                    index,
+                    child.pk,
+                    timeout,
+                    child.status,
+                )
+                sink.add_text(f"Shard {index}: timed out after {timeout}s - see job result {child.pk}")
+                continue
+            results_file = child.files.filter(name=RESULTS_FILENAME).first()
+            if child.status == JobResultStatusChoices.STATUS_SUCCESS and results_file:
+                with results_file.file.open("rb") as fileobj:
+                    sink.merge(child.result, fileobj)
+            else:
+                self.logger.error("Shard %d (job result %s) finished with status %s.", index, child.pk, child.status)
+                sink.add_text(f"Shard {index}: {child.status} - see job result {child.pk}")
+
+    def _retry_delay(self, policy, target, result, attempt):
+        """Return the seconds after which to retry `target` once `result` is known, or None to keep the result.
+
+        Runs on the job's thread, so it logs directly to the job logger.
+        """
+        if result.status != DeviceResult.FAILED:
+            return None
+        delay = policy.delay(result.reason, target.timer.current, attempt)
+        if delay is not None:
+            # The failed attempt's phases are already in `result`; the next attempt is timed on its own.
+            target.timer = PhaseTimer()
+            self.logger.warning(
+                "Device %s failed (%s) on attempt %d of %d, retrying in %.1fs.",
+                target.name,
+                result.reason,
+                attempt,
+                policy.max_attempts,
+                delay,
+            )
+        return delay
+
+    def _preflight(self, devices, connection_method="netmiko"):
+        """Probe the management port of every device with a platform and return the ones that did not answer.
+
+        HTTP API sessions are probed on the API port unless the `ports` setting names one for the driver.
+
+        Returns:
+            dict: Mapping of device pk to the TCP port that did not answer.
+        """
+        options = get_preflight_settings()
+        port = get_http_api_port() if connection_method == "http_api" else options["port"]
+        addresses = {
+            device.pk: (_device_host(device), options["ports"].get(device.platform.network_driver, port))
+            for device in devices
+            if device.platform
+        }
+        start = time.monotonic()
+        unreachable = sweep(addresses, options["timeout"], options["concurrency"])
+        self.logger.info(
+            "Pre-flight: %d of %d devices did not answer on their management port (%.1fs).",
+            len(unreachable),
+            len(addresses),
+            time.monotonic() - start,
+        )
+        return {pk: addresses[pk][1] for pk in unreachable}
+
+    def _prepare_device(  # pylint: disable=too-many-arguments
+        self, device, connection_method, limiter=None, timeouts=None, unreachable=None, output_cache=None
+    ):
+        """Resolve the platform driver, credentials and host for a device.
+
+        Runs on the job's thread so that all database access happens before work is handed to the pool.
+
+        Args:
+            device: Device object to prepare
+            connection_method (str): "netmiko", "napalm", "scrapli", "simulated", "http_api" or from an entry point
+            limiter (RateLimiter | None): Configured limits, matched against the device
+            timeouts (AdaptiveTimeouts | None): Derives the device's timeouts from its latency history
+            unreachable (dict | None): Ports that did not answer the pre-flight check, by device pk
+            output_cache (OutputCache | None): Cache answering the run's commands without a session, if enabled
 
         Returns:
-            str or None: Result string if device processed, None if skipped
+            DeviceTarget: Connection details for the device, a target with `skip_reason` set, or a target
+                with `error` set if preparing it raised, e.g. because a secret could not be retrieved
         """
-        self.logger.info("Processing device: %s", device.display)
+        name = device.display
+        timer = PhaseTimer()
+        try:
+            return self._resolve_target(
+                device, name, timer, connection_method, limiter, timeouts, unreachable, output_cache
+            )
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self.logger.error("Failed to prepare device %s: %s", name, exc)
+            return DeviceTarget(device, name, timer=timer, error=exc)
+
+    def _resolve_target(  # pylint: disable=too-many-arguments
+        self, device, name, timer, connection_method, limiter, timeouts, unreachable, output_cache
+    ):
+        """Build the DeviceTarget of `device` for `_prepare_device`, which handles any exception it raises."""
         if not device.platform:
-            self.logger.error("Device %s has no platform defined. Skipping.", device.display)
-            return f"{device.display}: No platform defined, skipped."
+            self.logger.error("Device %s has no platform defined. Skipping.", name)
+            return DeviceTarget(device, name, skip_reason="No platform defined, skipped.")
+
+        cached_outputs = output_cache.get(device.pk) if output_cache else None
+        if cached_outputs is not None:
+            return DeviceTarget(device, name, cached_outputs=cached_outputs)
+
+        if unreachable and device.pk in unreachable:
+            port = unreachable[device.pk]
+            self.logger.warning("Device %s did not answer on TCP port %d. Skipping.", name, port)
+            return DeviceTarget(device, name, skip_reason=f"Unreachable: no answer on TCP port {port}, skipped.")
 
         if hasattr(device, "secrets_group") and device.secrets_group:
-            creds = get_group_credentials(device)
+            with timer.phase("credentials"):
+                creds = get_group_credentials(device)
         else:
-            self.logger.error("Device %s has no secrets group. Skipping.", device.display)
-            return f"{device.display}: No secrets group, skipped."
+            self.logger.error("Device %s has no secrets group. Skipping.", name)
+            return DeviceTarget(device, name, skip_reason="No secrets group, skipped.")
 
         driver = get_platform_driver(device.platform, method=connection_method)
         if driver is None:
-            self.logger.error("No driver found for platform: %s. Skipping device %s.", device.platform, device.display)
-            return f"{device.display}: No platform driver, skipped."
+            self.logger.error("No driver found for platform: %s. Skipping device %s.", device.platform, name)
+            return DeviceTarget(device, name, skip_reason="No platform driver, skipped.", timer=timer)
+
+        host = _device_host(device)
+        limits = limiter.limits_for(device) if limiter else ()
+        timeout, command_timeout = timeouts.timeouts_for(device) if timeouts else (None, None)
+        return DeviceTarget(
+            device,
+            name,
+            host=host,
+            credentials=creds,
+            driver=driver,
+            timer=timer,
+            limits=limits,
+            timeout=timeout,
+            command_timeout=command_timeout,
+        )
 
+    def _process_device(  # pylint: disable=too-many-arguments
+        self,
+        target,
+        commands_list,
+        config_mode,
+        connection_timeout,
+        save_config=False,
+        logger=None,
+    ):
+        """Connect to a prepared device and execute commands.
+
+        Safe to call from a worker thread: it only performs device I/O and logs through `logger`.
+
+        Args:
+            target (DeviceTarget): Prepared connection details for the device
+            commands_list: List of commands to execute
+            config_mode: Whether to enter configuration mode
+            connection_timeout (int): TCP connection timeout in seconds; a timeout derived for the target may be shorter
+            save_config (bool): Save the running configuration after a configuration mode run
+            logger: Logger to use, defaults to the job logger
+
+        Returns:
+            DeviceResult: Outcome and formatted output for the device
+        """
+        logger = logger or self.logger
+        result = _prepared_result(target, commands_list, logger)
+        if result is not None:
+            return result
+
+        logger.info("Processing device: %s", target.name)
+        started, start = timezone.now(), time.monotonic()
+        connection = None
         try:
-            connection = driver.connect(
-                host=str(device.primary_ip.address.ip) if device.primary_ip else device.name,
-                credentials=creds,
-                timeout=connection_timeout,
+            with target.timer.phase("connect"):
+                connection = target.driver.connect(
+                    host=target.host,
+                    credentials=target.credentials,
+                    timeout=_connect_timeout(target, connection_timeout, logger),
+                    command_timeout=target.command_timeout,
+                )
+            if getattr(connection, "pooled", False) is True:
+                # A connection reused from a pool measures no connect latency, so it must not become a sample.
+                target.timer.discard("connect")
+            if config_mode:
+                with target.timer.phase("config"):
+                    output = connection.send_config(commands_list, save=save_config)
+                logger.info("Device %s configuration applied (%d characters of output).", target.name, len(output))
+                with target.timer.phase("disconnect"):
+                    connection.disconnect()
+                connection = None
+                label = f"Configuration ({len(commands_list)} lines)"
+                return _device_result(
+                    target,
+                    DeviceResult.SUCCESS,
+                    f"{target.name}:\n{label}\nOutput:\n{output}",
+                    [(label, output)],
+                    started,
+                    start,
+                )
+
+            with target.timer.phase("commands"):
+                outputs = list(zip(commands_list, connection.send_commands(commands_list)))
+            for cmd, output in outputs:
+                logger.info(
+                    "Device %s command '%s' completed (%d characters of output).", target.name, cmd, len(output)
+                )
+            with target.timer.phase("disconnect"):
+                connection.disconnect()
+            connection = None
+            return _device_result(
+                target,
+                DeviceResult.SUCCESS,
+                _format_outputs(target.name, outputs),
+                outputs,
+                started,
+                start,
+            )
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            logger.error("Exception processing device %s: %s", target.name, exc)
+            return _device_result(
+                target,
+                DeviceResult.FAILED,
+                f"{target.name}: Error - {exc}",
+                [(cmd, f"Error - {exc}") for cmd in commands_list],
+                started,
+                start,
+                reason=failure_reason(exc, target.timer.current),
             )
+        finally:
+            if connection is not None:
+                try:
+                    connection.disconnect()
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    logger.debug("Failed to disconnect from device %s: %s", target.name, exc)
+
+    async def _process_device_async(  # pylint: disable=too-many-arguments
+        self,
+        target,
+        commands_list,
+        config_mode,
+        connection_timeout,
+        save_config=False,
+        logger=None,
+    ):
+        """Asyncio counterpart of `_process_device` for asynchronous drivers (see `DriverRegistry.is_async`).
+
+        Args:
+            target (DeviceTarget): Prepared connection details for the device
+            commands_list: List of commands to execute
+            config_mode: Whether to enter configuration mode
+            connection_timeout (int): TCP connection timeout in seconds; a timeout derived for the target may be shorter
+            save_config (bool): Save the running configuration after a configuration mode run
+            logger: Logger to use, defaults to the job logger
+
+        Returns:
+            DeviceResult: Outcome and formatted output for the device
+        """
+        logger = logger or self.logger
+        result = _prepared_result(target, commands_list, logger)
+        if result is not None:
+            return result
+
+        logger.info("Processing device: %s", target.name)
+        started, start = timezone.now(), time.monotonic()
+        connection = None
+        try:
+            with target.timer.phase("connect"):
+                connection = await target.driver.connect(
+                    host=target.host,
+                    credentials=target.credentials,
+                    timeout=_connect_timeout(target, connection_timeout, logger),
+                    command_timeout=target.command_timeout,
+                )
+            if getattr(connection, "pooled", False) is True:
+                # A connection reused from a pool measures no connect latency, so it must not become a sample.
+                target.timer.discard("connect")
             if config_mode:
-                connection.enter_config_mode()
-
-            command_results = []
-            for cmd in commands_list:
-                output = connection.send_command(cmd)
-                self.logger.info("Device %s Command '%s' Output:\n%s", device.display, cmd, output)
-                command_results.append(f"Command: {cmd}\nOutput:\n{output}")
-            connection.disconnect()
-            return f"{device.display}:\n" + "\n".join(command_results)
+                with target.timer.phase("config"):
+                    output = await connection.send_config(commands_list, save=save_config)
+                logger.info("Device %s configuration applied (%d characters of output).", target.name, len(output))
+                with target.timer.phase("disconnect"):
+                    await connection.disconnect()
+                connection = None
+                label = f"Configuration ({len(commands_list)} lines)"
+                return _device_result(
+                    target,
+                    DeviceResult.SUCCESS,
+                    f"{target.name}:\n{label}\nOutput:\n{output}",
+                    [(label, output)],
+                    started,
+                    start,
+                )
+
+            with target.timer.phase("commands"):
+                outputs = list(zip(commands_list, await connection.send_commands(commands_list)))
+            for cmd, output in outputs:
+                logger.info(
+                    "Device %s command '%s' completed (%d characters of output).", target.name, cmd, len(output)
+                )
+            with target.timer.phase("disconnect"):
+                await connection.disconnect()
+            connection = None
+            return _device_result(
+                target,
+                DeviceResult.SUCCESS,
+                _format_outputs(target.name, outputs),
+                outputs,
+                started,
+                start,
+            )
         except Exception as exc:  # pylint: disable=broad-exception-caught
-            self.logger.error("Exception processing device %s: %s", device.display, exc)
-            return f"{device.display}: Error - {str(exc)}"
+            logger.error("Exception processing device %s: %s", target.name, exc)
+            return _device_result(
+                target,
+                DeviceResult.FAILED,
+                f"{target.name}: Error - {exc}",
+                [(cmd, f"Error - {exc}") for cmd in commands_list],
+                started,
+                start,
+                reason=failure_reason(exc, target.timer.current),
+            )
+        finally:
+            if connection is not None:
+                try:
+                    await connection.disconnect()
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    logger.debug("Failed to disconnect from device %s: %s", target.name, exc)
 
 
 name = "Device Broker"  # pylint: disable=invalid-name
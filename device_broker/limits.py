@@ -0,0 +1,208 @@
+"""Device Broker rate limits and concurrency caps on device sessions.
+
+Limits are configured in `PLUGINS_CONFIG["device_broker"]["rate_limits"]`, each scoped to a Location
+(including every location below it), a Platform or a Tag, for example a tag applied to the devices that
+authenticate against one TACACS+ server::
+
+    "rate_limits": [
+        {"location": "EMEA", "rate": 20, "burst": 40},
+        {"platform": "Cisco IOS", "max_concurrent": 50},
+        {"tag": "tacacs-lon", "rate": 5, "max_concurrent": 25},
+    ]
+
+`rate` is the number of sessions started per second, with up to `burst` started at once, and
+`max_concurrent` is the number of sessions open at the same time. A device matching several limits is
+held to all of them. Limits are enforced per job process, so each shard of a sharded run applies them
+separately.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+from nautobot.dcim.models import Location, Platform
+from nautobot.extras.models import Tag
+
+# Keys that scope a limit, and the model each one names.
+LIMIT_SCOPES = {"location": Location, "platform": Platform, "tag": Tag}
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate` tokens per second, holding up to `burst` tokens."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """Initialize a full bucket.
+
+        Args:
+            rate (float): Tokens added per second.
+            burst (int): Maximum number of tokens held.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds the caller must wait before using it.
+
+        The balance may go negative, which queues callers in the order they reserved.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+
+class ConnectionLimit:
+    """One configured limit, shared by every session it applies to during a run."""
+
+    def __init__(
+        self,
+        label: str,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_concurrent: Optional[int] = None,
+    ):
+        """Initialize the limit.
+
+        Args:
+            label (str): Human-readable scope of the limit, e.g. "location EMEA".
+            rate (float | None): Sessions started per second, or None for no rate limit.
+            burst (int | None): Sessions that may start at once, defaults to 1.
+            max_concurrent (int | None): Sessions open at the same time, or None for no cap.
+        """
+        self.label = label
+        self.bucket = TokenBucket(rate, burst or 1) if rate else None
+        self.max_concurrent = max_concurrent
+        self.semaphore = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        self._async_semaphore = None
+
+    @property
+    def async_semaphore(self) -> Optional[asyncio.Semaphore]:
+        """Return the asyncio counterpart of the concurrency cap, created on the event loop that first uses it."""
+        if self.max_concurrent and self._async_semaphore is None:
+            self._async_semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._async_semaphore
+
+
+class RateLimiter:
+    """The limits configured for a run, and which of them apply to each device."""
+
+    def __init__(self, limits: list[tuple[str, set, ConnectionLimit]]):
+        """Initialize the limiter.
+
+        Args:
+            limits: `(scope, keys, limit)` triples; a device matches when its location pk, platform name
+                or one of its tag names (depending on `scope`) is in `keys`.
+        """
+        self.limits = limits
+
+    @classmethod
+    def from_settings(cls, logger=None) -> RateLimiter:
+        """Build the limiter from `PLUGINS_CONFIG["device_broker"]["rate_limits"]`.
+
+        Location limits are resolved to the location and all of its descendants here, so matching a
+        device needs no further queries.
+
+        Raises:
+            ValueError: If a limit does not name exactly one of `LIMIT_SCOPES`.
+        """
+        limits = []
+        for config in settings.PLUGINS_CONFIG.get("device_broker", {}).get("rate_limits") or []:
+            scopes = [scope for scope in LIMIT_SCOPES if scope in config]
+            if len(scopes) != 1:
+                raise ValueError(f"Rate limit {config!r} must name exactly one of: {', '.join(LIMIT_SCOPES)}")
+            scope = scopes[0]
+            name = config[scope]
+            objects = LIMIT_SCOPES[scope].objects.filter(name=name)
+            if scope == "location":
+                keys = set()
+                for location in objects:
+                    keys.update(location.descendants(include_self=True).values_list("pk", flat=True))
+            else:
+                keys = {name} if objects.exists() else set()
+            if not keys and logger:
+                logger.warning("Rate limit for %s %s matches no %s and is ignored.", scope, name, scope)
+            limit = ConnectionLimit(
+                f"{scope} {name}", config.get("rate"), config.get("burst"), config.get("max_concurrent")
+            )
+            limits.append((scope, keys, limit))
+        return cls(limits)
+
+    def limits_for(self, device) -> tuple[ConnectionLimit, ...]:
+        """Return the limits that apply to `device`, in configuration order."""
+        if not self.limits:
+            return ()
+        tags = None
+        matched = []
+        for scope, keys, limit in self.limits:
+            if scope == "location":
+                match = device.location_id in keys
+            elif scope == "platform":
+                match = device.platform is not None and device.platform.name in keys
+            else:
+                if tags is None:
+                    tags = {tag.name for tag in device.tags.all()}
+                match = not tags.isdisjoint(keys)
+            if match:
+                matched.append(limit)
+        return tuple(matched)
+
+
+def limited(func):
+    """Wrap a per-target function so that it runs within the target's limits.
+
+    Concurrency caps are acquired in configuration order, which every session shares, so sessions
+    cannot deadlock, then one token is taken from each rate-limited bucket. The time spent waiting is
+    recorded as the target's "throttle" phase.
+    """
+
+    @functools.wraps(func)
+    def wrapper(target, *args, **kwargs):
+        if not target.limits:
+            return func(target, *args, **kwargs)
+        acquired = []
+        try:
+            with target.timer.phase("throttle"):
+                for limit in target.limits:
+                    if limit.max_concurrent:
+                        limit.semaphore.acquire()
+                        acquired.append(limit)
+                time.sleep(max(limit.bucket.reserve() if limit.bucket else 0.0 for limit in target.limits))
+            return func(target, *args, **kwargs)
+        finally:
+            for limit in reversed(acquired):
+                limit.semaphore.release()
+
+    return wrapper
+
+
+def limited_async(coro_func):
+    """Asyncio counterpart of `limited`, for coroutine functions run on one event loop."""
+
+    @functools.wraps(coro_func)
+    async def wrapper(target, *args, **kwargs):
+        if not target.limits:
+            return await coro_func(target, *args, **kwargs)
+        acquired = []
+        try:
+            with target.timer.phase("throttle"):
+                for limit in target.limits:
+                    if limit.max_concurrent:
+                        await limit.async_semaphore.acquire()
+                        acquired.append(limit)
+                await asyncio.sleep(max(limit.bucket.reserve() if limit.bucket else 0.0 for limit in target.limits))
+            return await coro_func(target, *args, **kwargs)
+        finally:
+            for limit in reversed(acquired):
+                limit.async_semaphore.release()
+
+    return wrapper
@@ -0,0 +1,280 @@
+"""Device Broker per-phase timing instrumentation and Prometheus metrics.
+
+Each device session is timed per phase with a `PhaseTimer`. Results are aggregated per platform and
+location into a `PhaseStats` table that is attached to the JobResult, and per platform into counters
+kept in Django's cache, which is shared by Celery workers and the web service. The generators in
+`metrics` read those counters when Nautobot's `/metrics` endpoint is scraped.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import csv
+import io
+import time
+
+from django.core.cache import cache
+from nautobot.dcim.models import Platform
+from prometheus_client.core import CounterMetricFamily, HistogramMetricFamily
+
+# Phases of a device session, in the order they happen.
+PHASES = ("credentials", "throttle", "connect", "commands", "config", "disconnect")
+
+# Reasons a device is counted as failed, see `failure_reason`.
+FAILURE_REASONS = ("timeout", "authentication", "connection", "command", "other")
+
+# Upper bounds, in seconds, of the connect latency histogram buckets.
+CONNECT_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Prefix of the shared cache keys holding the counters; values are integers, durations in milliseconds.
+METRICS_KEY_PREFIX = "device_broker:metrics"
+
+
+class PhaseTimer:
+    """Monotonic timers for the phases of one device session.
+
+    `current` is the phase that was running when the session failed, or None if every phase completed.
+    """
+
+    def __init__(self):
+        """Initialize with no phases timed."""
+        self.durations = {}
+        self.current = None
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as phase `name`, adding to any time already recorded for it."""
+        self.current = name
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.monotonic() - start
+        self.current = None
+
+    def discard(self, name: str):
+        """Forget the time recorded for phase `name`, e.g. when it did no work worth measuring."""
+        self.durations.pop(name, None)
+
+
+def failure_reason(exc: Exception, phase: str | None) -> str:
+    """Classify why a device failed from the exception raised and the phase it was raised in.
+
+    Driver libraries use their own exception hierarchies, so timeouts and authentication failures are
+    recognised by exception class name as well as by type.
+
+    Returns:
+        str: One of `FAILURE_REASONS`.
+    """
+    name = type(exc).__name__.lower()
+    if isinstance(exc, TimeoutError) or "timeout" in name:
+        return "timeout"
+    if "auth" in name:
+        return "authentication"
+    if phase == "connect":
+        return "connection"
+    if phase in ("commands", "config"):
+        return "command"
+    return "other"
+
+
+class PhaseStats:
+    """Phase durations and failures of device sessions, aggregated per platform and location.
+
+    Stats can be converted to and from plain data with `as_dict` and `update`, so sub-jobs can return
+    them in their result and the parent job can fold them into its own table.
+    """
+
+    CSV_HEADER = ("platform", "location", "phase", "devices", "mean_seconds", "max_seconds", "total_seconds")
+
+    def __init__(self):
+        """Initialize empty stats."""
+        self.phases = {}
+        self.failures = {}
+
+    def add(self, platform: str, location: str, durations: dict, reason: str | None = None):
+        """Record the phase `durations` of one device session and, if it failed, why."""
+        for phase, seconds in durations.items():
+            self._add_phase((platform, location, phase), 1, seconds, seconds)
+        if reason:
+            key = (platform, location, reason)
+            self.failures[key] = self.failures.get(key, 0) + 1
+
+    def _add_phase(self, key, count, total, maximum):
+        """Fold `count` sessions taking `total` seconds, at most `maximum` each, into the row for `key`."""
+        row = self.phases.setdefault(key, [0, 0.0, 0.0])
+        row[0] += count
+        row[1] += total
+        row[2] = max(row[2], maximum)
+
+    def update(self, data: dict):
+        """Fold in stats previously exported with `as_dict`."""
+        for platform, location, phase, count, total, maximum in data.get("phases", []):
+            self._add_phase((platform, location, phase), count, total, maximum)
+        for platform, location, reason, count in data.get("failures", []):
+            key = (platform, location, reason)
+            self.failures[key] = self.failures.get(key, 0) + count
+
+    def as_dict(self) -> dict:
+        """Return the stats as JSON-serializable data."""
+        return {
+            "phases": [
+                [*key, count, round(total, 3), round(maximum, 3)]
+                for key, (count, total, maximum) in self.phases.items()
+            ],
+            "failures": [[*key, count] for key, count in self.failures.items()],
+        }
+
+    def phase_means(self) -> dict:
+        """Return the mean seconds per device of each phase across all platforms and locations."""
+        totals = {}
+        for (_, _, phase), (count, total, _) in self.phases.items():
+            phase_count, phase_total = totals.get(phase, (0, 0.0))
+            totals[phase] = (phase_count + count, phase_total + total)
+        return {phase: totals[phase][1] / totals[phase][0] for phase in PHASES if phase in totals}
+
+    def failure_counts(self) -> dict:
+        """Return the number of failed devices per reason across all platforms and locations."""
+        counts = {}
+        for (_, _, reason), count in self.failures.items():
+            counts[reason] = counts.get(reason, 0) + count
+        return counts
+
+    def to_csv(self) -> str:
+        """Return the per platform, location and phase table as CSV, sorted by platform and location."""
+        order = {phase: index for index, phase in enumerate(PHASES)}
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.CSV_HEADER)
+        for (platform, location, phase), (count, total, maximum) in sorted(
+            self.phases.items(), key=lambda item: (item[0][0], item[0][1], order.get(item[0][2], len(order)))
+        ):
+            writer.writerow(
+                (platform, location, phase, count, f"{total / count:.3f}", f"{maximum:.3f}", f"{total:.3f}")
+            )
+        return buffer.getvalue()
+
+
+def _key(*parts) -> str:
+    """Return the shared cache key for a counter."""
+    return ":".join((METRICS_KEY_PREFIX, *(str(part) for part in parts)))
+
+
+class MetricsBatch:
+    """Per-platform counters for a batch of device sessions, added to the shared counters by `publish`.
+
+    Counters are batched so that a run costs a few cache round trips per platform rather than per device.
+    """
+
+    def __init__(self):
+        """Initialize an empty batch."""
+        self.counters = {}
+
+    def _incr(self, key: str, value: int):
+        """Add `value` to the batched counter `key`."""
+        if value:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def add(self, platform_pk, durations: dict, commands: int, reason: str | None = None):
+        """Record one device session on the platform with primary key `platform_pk`.
+
+        Args:
+            platform_pk: Primary key of the device's platform.
+            durations (dict): Seconds spent in each phase.
+            commands (int): Number of commands run in the session.
+            reason (str | None): Failure reason from `failure_reason`, if the session failed.
+        """
+        for phase, seconds in durations.items():
+            self._incr(_key("phase_ms", platform_pk, phase), round(seconds * 1000))
+        if "connect" in durations:
+            connect = durations["connect"]
+            self._incr(_key("connect_bucket", platform_pk, bisect.bisect_left(CONNECT_BUCKETS, connect)), 1)
+            self._incr(_key("connect_count", platform_pk), 1)
+        self._incr(_key("commands", platform_pk), commands)
+        if reason:
+            self._incr(_key("failures", platform_pk, reason), 1)
+
+    def publish(self):
+        """Add the batched counters to the shared counters and empty the batch."""
+        for key, value in self.counters.items():
+            cache.add(key, 0, timeout=None)
+            try:
+                cache.incr(key, value)
+            except ValueError:
+                # The key was evicted between add() and incr().
+                cache.set(key, value, timeout=None)
+        self.counters = {}
+
+
+def _platform_counters(*names):
+    """Return `(platforms, values)`: every platform as `(pk, name)` and the shared counters for `names`."""
+    platforms = list(Platform.objects.order_by("name").values_list("pk", "name"))
+    keys = []
+    for pk, _ in platforms:
+        for name in names:
+            if name == "connect_bucket":
+                keys += [_key(name, pk, index) for index in range(len(CONNECT_BUCKETS) + 1)]
+            elif name == "phase_ms":
+                keys += [_key(name, pk, phase) for phase in PHASES]
+            elif name == "failures":
+                keys += [_key(name, pk, reason) for reason in FAILURE_REASONS]
+            else:
+                keys.append(_key(name, pk))
+    return platforms, cache.get_many(keys)
+
+
+def metric_connect_latency():
+    """Yield the histogram of device connect latency per platform."""
+    family = HistogramMetricFamily(
+        "device_broker_connect_seconds", "Time taken to open a device session.", labels=["platform"]
+    )
+    platforms, values = _platform_counters("connect_bucket", "connect_count", "phase_ms")
+    for pk, name in platforms:
+        count = values.get(_key("connect_count", pk), 0)
+        if not count:
+            continue
+        buckets, cumulative = [], 0
+        for index, bound in enumerate(CONNECT_BUCKETS):
+            cumulative += values.get(_key("connect_bucket", pk, index), 0)
+            buckets.append((str(bound), cumulative))
+        buckets.append(("+Inf", count))
+        family.add_metric([name], buckets, values.get(_key("phase_ms", pk, "connect"), 0) / 1000)
+    yield family
+
+
+def metric_commands():
+    """Yield the number of commands run and the time spent running them per platform.
+
+    Commands per second is `rate(device_broker_commands_total[5m])`, or the ratio of the two counters
+    for the throughput of a single device session.
+    """
+    commands = CounterMetricFamily("device_broker_commands", "Commands run on devices.", labels=["platform"])
+    seconds = CounterMetricFamily(
+        "device_broker_phase_seconds", "Time spent in each phase of device sessions.", labels=["platform", "phase"]
+    )
+    platforms, values = _platform_counters("commands", "phase_ms")
+    for pk, name in platforms:
+        if values.get(_key("commands", pk)):
+            commands.add_metric([name], values[_key("commands", pk)])
+        for phase in PHASES:
+            if values.get(_key("phase_ms", pk, phase)):
+                seconds.add_metric([name, phase], values[_key("phase_ms", pk, phase)] / 1000)
+    yield commands
+    yield seconds
+
+
+def metric_failures():
+    """Yield the number of failed devices per platform and reason."""
+    family = CounterMetricFamily(
+        "device_broker_device_failures", "Devices that failed, by reason.", labels=["platform", "reason"]
+    )
+    platforms, values = _platform_counters("failures")
+    for pk, name in platforms:
+        for reason in FAILURE_REASONS:
+            if values.get(_key("failures", pk, reason)):
+                family.add_metric([name, reason], values[_key("failures", pk, reason)])
+    yield family
+
+
+metrics = [metric_connect_latency, metric_commands, metric_failures]
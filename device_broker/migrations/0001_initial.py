@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:50
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("dcim", "0001_initial_part_1"),
+        ("extras", "0001_initial_part_1"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeviceCommandResult",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True
+                    ),
+                ),
+                ("command", models.CharField(max_length=255)),
+                ("output", models.TextField(blank=True)),
+                ("status", models.CharField(max_length=16)),
+                ("started", models.DateTimeField(blank=True, null=True)),
+                ("duration", models.FloatField(blank=True, null=True)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                (
+                    "device",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="device_command_results",
+                        to="dcim.device",
+                    ),
+                ),
+                (
+                    "job_result",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="device_command_results",
+                        to="extras.jobresult",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created", "device", "command"],
+                "indexes": [models.Index(fields=["device", "command", "created"], name="device_broker_dcr_lookup_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:55
+
+import zlib
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+# The encoding of the stored output is inlined, so this migration keeps working as the app's code changes.
+MIN_COMPRESS_SIZE = 256
+COMPRESSION_LEVEL = 6
+
+
+def compress_output(text):
+    """Encode output as `(bytes, compression)`, compressing it with zlib when that saves space."""
+    data = (text or "").encode("utf-8")
+    if len(data) >= MIN_COMPRESS_SIZE:
+        compressed = zlib.compress(data, COMPRESSION_LEVEL)
+        if len(compressed) < len(data):
+            return compressed, "zlib"
+    return data, "none"
+
+
+def decompress_output(data, compression):
+    """Decode output encoded by `compress_output`."""
+    data = bytes(data or b"")
+    if compression == "zlib":
+        data = zlib.decompress(data)
+    return data.decode("utf-8")
+
+
+def compress_existing_output(apps, schema_editor):
+    """Move existing plain-text output into the compressed column."""
+    DeviceCommandResult = apps.get_model("device_broker", "DeviceCommandResult")
+    batch = []
+    for row in DeviceCommandResult.objects.only("pk", "output").iterator(chunk_size=BATCH_SIZE):
+        row.output_data, row.compression = compress_output(row.output)
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            DeviceCommandResult.objects.bulk_update(batch, ["output_data", "compression"])
+            batch = []
+    DeviceCommandResult.objects.bulk_update(batch, ["output_data", "compression"])
+
+
+def decompress_existing_output(apps, schema_editor):
+    """Move compressed output back into the plain-text column."""
+    DeviceCommandResult = apps.get_model("device_broker", "DeviceCommandResult")
+    batch = []
+    for row in DeviceCommandResult.objects.only("pk", "output_data", "compression").iterator(chunk_size=BATCH_SIZE):
+        row.output = decompress_output(row.output_data, row.compression)
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            DeviceCommandResult.objects.bulk_update(batch, ["output"])
+            batch = []
+    DeviceCommandResult.objects.bulk_update(batch, ["output"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("device_broker", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="devicecommandresult",
+            name="compression",
+            field=models.CharField(default="none", editable=False, max_length=8),
+        ),
+        migrations.AddField(
+            model_name="devicecommandresult",
+            name="output_data",
+            field=models.BinaryField(blank=True, default=b""),
+        ),
+        migrations.RunPython(compress_existing_output, decompress_existing_output),
+        migrations.RemoveField(
+            model_name="devicecommandresult",
+            name="output",
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:03
+
+import hashlib
+import uuid
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+# The decoding and digest of the stored output are inlined, so this migration keeps working as the app's code changes.
+def decompress_output(data, compression):
+    """Decode output stored as bytes compressed with zlib or not at all."""
+    data = bytes(data or b"")
+    if compression == "zlib":
+        data = zlib.decompress(data)
+    return data.decode("utf-8")
+
+
+def output_digest(text):
+    """Return the SHA-256 hex digest identifying output by its content."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def move_output_to_command_output(apps, schema_editor):
+    """Store each distinct output once as a CommandOutput and point the results at it."""
+    CommandOutput = apps.get_model("device_broker", "CommandOutput")
+    DeviceCommandResult = apps.get_model("device_broker", "DeviceCommandResult")
+    rows = DeviceCommandResult.objects.only("pk", "output_data", "compression")
+    pks = {}
+    batch = []
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        text = decompress_output(row.output_data, row.compression)
+        digest = output_digest(text)
+        if digest not in pks:
+            # The stored bytes are already in the CommandOutput encoding, so they are copied as-is.
+            pks[digest] = CommandOutput.objects.create(
+                digest=digest, size=len(text.encode("utf-8")), data=row.output_data, compression=row.compression
+            ).pk
+        row.command_output_id = pks[digest]
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            DeviceCommandResult.objects.bulk_update(batch, ["command_output"])
+            batch = []
+    DeviceCommandResult.objects.bulk_update(batch, ["command_output"])
+
+
+def copy_output_back(apps, schema_editor):
+    """Copy each result's shared CommandOutput back into its own columns."""
+    DeviceCommandResult = apps.get_model("device_broker", "DeviceCommandResult")
+    rows = DeviceCommandResult.objects.select_related("command_output").only(
+        "pk", "command_output__data", "command_output__compression"
+    )
+    batch = []
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        row.output_data = row.command_output.data
+        row.compression = row.command_output.compression
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            DeviceCommandResult.objects.bulk_update(batch, ["output_data", "compression"])
+            batch = []
+    DeviceCommandResult.objects.bulk_update(batch, ["output_data", "compression"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("device_broker", "0002_compress_output"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CommandOutput",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True
+                    ),
+                ),
+                ("digest", models.CharField(editable=False, max_length=64, unique=True)),
+                ("size", models.PositiveIntegerField(default=0, editable=False)),
+                ("data", models.BinaryField(blank=True, default=b"")),
+                ("compression", models.CharField(default="none", editable=False, max_length=8)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.AddField(
+            model_name="devicecommandresult",
+            name="command_output",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="device_command_results",
+                to="device_broker.commandoutput",
+            ),
+        ),
+        migrations.RunPython(move_output_to_command_output, copy_output_back),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("device_broker", "0003_command_output"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="devicecommandresult",
+            name="compression",
+        ),
+        migrations.RemoveField(
+            model_name="devicecommandresult",
+            name="output_data",
+        ),
+        migrations.AlterField(
+            model_name="devicecommandresult",
+            name="command_output",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="device_command_results",
+                to="device_broker.commandoutput",
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:26
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dcim", "0062_module_data_migration"),
+        ("device_broker", "0004_remove_inline_output"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeviceLatency",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True
+                    ),
+                ),
+                ("connect_samples", models.JSONField(default=list)),
+                ("command_samples", models.JSONField(default=list)),
+                (
+                    "device",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="device_broker_latency",
+                        to="dcim.device",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "device latencies",
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:35
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dcim", "0062_module_data_migration"),
+        ("device_broker", "0005_device_latency"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeviceCommandDigest",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True
+                    ),
+                ),
+                ("command", models.CharField(max_length=255)),
+                ("digest", models.CharField(max_length=64)),
+                ("last_changed", models.DateTimeField()),
+                (
+                    "device",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="device_broker_digests",
+                        to="dcim.device",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("device", "command")},
+            },
+        ),
+    ]
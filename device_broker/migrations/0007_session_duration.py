@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("device_broker", "0006_device_command_digest"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="devicecommandresult",
+            old_name="duration",
+            new_name="session_duration",
+        ),
+        migrations.AlterField(
+            model_name="devicecommandresult",
+            name="session_duration",
+            field=models.FloatField(
+                blank=True, help_text="Seconds spent on the device session that ran the command.", null=True
+            ),
+        ),
+    ]
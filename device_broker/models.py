@@ -0,0 +1,203 @@
+"""Models for device_broker."""
+
+from typing import Optional
+
+from django.db import models
+from nautobot.apps.models import BaseManager, BaseModel, RestrictedQuerySet, extras_features
+
+from device_broker.choices import CommandOutputCompressionChoices, DeviceCommandResultStatusChoices
+from device_broker.compression import compress_output, decompress_output, output_digest
+
+# Number of recent latency samples kept per device for each of connecting and running a command.
+LATENCY_SAMPLES = 50
+
+
+class CommandOutputQuerySet(RestrictedQuerySet):
+    """QuerySet for CommandOutput that stores each distinct output once."""
+
+    def store(self, texts) -> list:
+        """Return the pk of the CommandOutput holding each of `texts`, creating the ones not yet stored.
+
+        Identical texts, within `texts` or already in the database, share one row. Only new texts are
+        compressed. Uses one query when every text is already stored and three otherwise.
+
+        Args:
+            texts (list[str]): Command outputs.
+
+        Returns:
+            list: CommandOutput pks, in the same order as `texts`.
+        """
+        digests = [output_digest(text) for text in texts]
+        pks = dict(self.filter(digest__in=set(digests)).values_list("digest", "pk"))
+        missing = {digest: text for digest, text in zip(digests, texts) if digest not in pks}
+        if missing:
+            # Another job may store the same output concurrently; the conflicting row is read back below.
+            self.bulk_create([self.model(output=text) for text in missing.values()], ignore_conflicts=True)
+            pks.update(self.filter(digest__in=missing).values_list("digest", "pk"))
+        return [pks[digest] for digest in digests]
+
+    def delete_unreferenced(self):
+        """Delete the outputs in this queryset that no DeviceCommandResult refers to any more."""
+        return self.filter(device_command_results__isnull=True).delete()
+
+
+class CommandOutput(BaseModel):
+    """Command output stored once per distinct content and shared by every DeviceCommandResult with that output.
+
+    Rows are identified by the SHA-256 `digest` of the output, so a command returning the same text run
+    after run, or on many devices, costs one row. The output is stored zlib-compressed when that saves
+    space and is read and written through `output`.
+    """
+
+    digest = models.CharField(max_length=64, unique=True, editable=False)
+    size = models.PositiveIntegerField(default=0, editable=False, help_text="Uncompressed size in bytes.")
+    data = models.BinaryField(blank=True, default=b"")
+    compression = models.CharField(
+        max_length=8,
+        choices=CommandOutputCompressionChoices,
+        default=CommandOutputCompressionChoices.COMPRESSION_NONE,
+        editable=False,
+    )
+
+    objects = BaseManager.from_queryset(CommandOutputQuerySet)()
+
+    natural_key_field_names = ["digest"]
+
+    def __str__(self):
+        """Stringify instance."""
+        return self.digest[:12]
+
+    @property
+    def output(self) -> str:
+        """The command output, decompressed."""
+        return decompress_output(self.data, self.compression)
+
+    @output.setter
+    def output(self, value: str):
+        """Store the command output and its digest, compressing it when that saves space."""
+        value = value or ""
+        self.digest = output_digest(value)
+        self.size = len(value.encode("utf-8"))
+        self.data, self.compression = compress_output(value)
+
+
+@extras_features("export_templates")
+class DeviceCommandResult(BaseModel):
+    """Output of one command run on one device by a Device Broker job.
+
+    Rows are written in batches with `bulk_create` and are deleted together with their JobResult. The
+    output itself lives in a shared CommandOutput and is read and written through `output`.
+    """
+
+    job_result = models.ForeignKey(
+        to="extras.JobResult",
+        on_delete=models.CASCADE,
+        related_name="device_command_results",
+    )
+    device = models.ForeignKey(
+        to="dcim.Device",
+        on_delete=models.CASCADE,
+        related_name="device_command_results",
+    )
+    command = models.CharField(max_length=255)
+    command_output = models.ForeignKey(
+        to="device_broker.CommandOutput",
+        on_delete=models.PROTECT,
+        related_name="device_command_results",
+    )
+    status = models.CharField(max_length=16, choices=DeviceCommandResultStatusChoices)
+    started = models.DateTimeField(null=True, blank=True, help_text="When the device session started.")
+    # Shared by every command of the session, as HTTP APIs and configuration mode send its commands in one batch.
+    session_duration = models.FloatField(
+        null=True, blank=True, help_text="Seconds spent on the device session that ran the command."
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    natural_key_field_names = ["pk"]
+
+    class Meta:
+        """Meta class."""
+
+        ordering = ["-created", "device", "command"]
+        indexes = [
+            models.Index(fields=["device", "command", "created"], name="device_broker_dcr_lookup_idx"),
+        ]
+
+    def __str__(self):
+        """Stringify instance."""
+        return f"{self.device} - {self.command}"
+
+    @property
+    def output(self) -> str:
+        """The command output, decompressed."""
+        return self.command_output.output
+
+    @output.setter
+    def output(self, value: str):
+        """Point at the CommandOutput holding `value`, storing it if it is new.
+
+        This queries the database; code writing many rows should use `CommandOutput.objects.store()`.
+        """
+        self.command_output_id = CommandOutput.objects.store([value or ""])[0]
+
+
+class DeviceLatency(BaseModel):
+    """Recent connect and per-command latencies observed on one device, from which its timeouts are derived.
+
+    Only sessions that connected are sampled, so a device that stops answering keeps the timeout derived
+    from its healthy history and fails fast. Rows are deleted together with their device.
+    """
+
+    device = models.OneToOneField(
+        to="dcim.Device",
+        on_delete=models.CASCADE,
+        related_name="device_broker_latency",
+    )
+    connect_samples = models.JSONField(default=list, help_text="Seconds taken to connect, oldest first.")
+    command_samples = models.JSONField(default=list, help_text="Seconds taken per command, oldest first.")
+
+    natural_key_field_names = ["pk"]
+
+    class Meta:
+        """Meta class."""
+
+        verbose_name_plural = "device latencies"
+
+    def __str__(self):
+        """Stringify instance."""
+        return f"{self.device} latency"
+
+    def record(self, connect: Optional[float] = None, command: Optional[float] = None):
+        """Append new samples, keeping the most recent `LATENCY_SAMPLES` of each."""
+        if connect is not None:
+            self.connect_samples = [*self.connect_samples, round(connect, 3)][-LATENCY_SAMPLES:]
+        if command is not None:
+            self.command_samples = [*self.command_samples, round(command, 3)][-LATENCY_SAMPLES:]
+
+
+class DeviceCommandDigest(BaseModel):
+    """Digest of the latest successful output of one command on one device, compared by delta-mode runs.
+
+    Kept apart from DeviceCommandResult, so the baseline survives the deletion of old job results and
+    is looked up with one indexed query per batch of devices. Rows are deleted together with their device.
+    """
+
+    device = models.ForeignKey(
+        to="dcim.Device",
+        on_delete=models.CASCADE,
+        related_name="device_broker_digests",
+    )
+    command = models.CharField(max_length=255)
+    digest = models.CharField(max_length=64)
+    last_changed = models.DateTimeField(help_text="When a run last saw this output change.")
+
+    natural_key_field_names = ["pk"]
+
+    class Meta:
+        """Meta class."""
+
+        unique_together = [["device", "command"]]
+
+    def __str__(self):
+        """Stringify instance."""
+        return f"{self.device} - {self.command}"
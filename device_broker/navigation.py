@@ -0,0 +1,18 @@
+"""Menu items."""
+
+from nautobot.apps.ui import NavMenuGroup, NavMenuItem, NavMenuTab
+
+items = (
+    NavMenuItem(
+        link="plugins:device_broker:devicecommandresult_list",
+        name="Device Command Results",
+        permissions=["device_broker.view_devicecommandresult"],
+    ),
+)
+
+menu_items = (
+    NavMenuTab(
+        name="Apps",
+        groups=(NavMenuGroup(name="Device Broker", items=tuple(items)),),
+    ),
+)
@@ -0,0 +1,69 @@
+"""Device Broker TCP reachability pre-flight sweep.
+
+Before any session is opened, every target's management port is probed concurrently from one event
+loop with non-blocking sockets, so devices that are down cost one short probe instead of a full
+connection timeout each. Settings come from `PLUGINS_CONFIG["device_broker"]["preflight"]`, overriding
+`PREFLIGHT_DEFAULTS`; `ports` maps a network driver to the port probed for its devices.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from typing import Hashable
+
+from django.conf import settings
+
+PREFLIGHT_DEFAULTS = {
+    "port": 22,
+    "ports": {},
+    "timeout": 3.0,
+    "concurrency": 1000,
+}
+
+
+def get_preflight_settings() -> dict:
+    """Return the pre-flight settings, `PREFLIGHT_DEFAULTS` overridden by the app configuration."""
+    return {**PREFLIGHT_DEFAULTS, **(settings.PLUGINS_CONFIG.get("device_broker", {}).get("preflight") or {})}
+
+
+async def probe(host: str, port: int, timeout: float) -> bool:
+    """Return True if a TCP connection to `host:port` is accepted within `timeout` seconds."""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    with contextlib.suppress(OSError):
+        await writer.wait_closed()
+    return True
+
+
+def sweep(addresses: dict[Hashable, tuple[str, int]], timeout: float, concurrency: int) -> set:
+    """Probe every address concurrently and return the keys of those that did not answer.
+
+    Runs its own event loop, so it must be called from a thread that is not already running one.
+
+    Args:
+        addresses: Mapping of key (e.g. a device pk) to `(host, port)`.
+        timeout: Seconds to wait for each connection.
+        concurrency: Maximum number of probes in flight at once.
+
+    Returns:
+        set: Keys of the addresses that refused or did not answer in time.
+    """
+
+    async def run():
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def limited_probe(host, port):
+            async with semaphore:
+                return await probe(host, port, timeout)
+
+        keys = list(addresses)
+        results = await asyncio.gather(*(limited_probe(*addresses[key]) for key in keys))
+        return {key for key, reachable in zip(keys, results) if not reachable}
+
+    if not addresses:
+        return set()
+    return asyncio.run(run())
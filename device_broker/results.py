@@ -0,0 +1,160 @@
+"""Device Broker result sink that spools per-device results to a job file attachment and result rows."""
+
+from __future__ import annotations
+
+import shutil
+import tempfile
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+from nautobot.extras.models import FileProxy
+
+from device_broker.execution import DeviceResult
+from device_broker.metrics import MetricsBatch, PhaseStats
+from device_broker.models import CommandOutput, DeviceCommandResult
+from device_broker.timeouts import LatencyRecorder
+
+# Separator written between consecutive device results.
+RESULT_SEPARATOR = b"\n\n"
+
+# Number of DeviceCommandResult rows buffered before they are written with one bulk insert.
+ROW_BATCH_SIZE = 500
+
+COMMAND_MAX_LENGTH = DeviceCommandResult._meta.get_field("command").max_length
+
+
+class ResultSink:
+    """Write device results to a temporary file and to DeviceCommandResult rows as they complete.
+
+    Only counters and one batch of rows are kept in memory, so the memory used by a run does not grow
+    with the number of devices or the size of their output. Use as a context manager so the temporary
+    file is always removed.
+    """
+
+    def __init__(self, job_result, batch_size: int = ROW_BATCH_SIZE):
+        """Open the temporary spool file and zero the counters.
+
+        Args:
+            job_result (JobResult): Job result the rows and the results file are attached to.
+            batch_size (int): Number of rows written per bulk insert.
+        """
+        self.job_result = job_result
+        self.batch_size = batch_size
+        self._file = tempfile.TemporaryFile()  # pylint: disable=consider-using-with
+        self._empty = True
+        self._rows = []
+        self._metrics = MetricsBatch()
+        self._latencies = LatencyRecorder()
+        self.counts = {DeviceResult.SUCCESS: 0, DeviceResult.FAILED: 0, DeviceResult.SKIPPED: 0}
+        self.timings = PhaseStats()
+
+    def __enter__(self):
+        """Return the sink."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Remove the temporary spool file."""
+        self.close()
+
+    def _separate(self):
+        """Write the separator unless this is the first entry."""
+        if not self._empty:
+            self._file.write(RESULT_SEPARATOR)
+        self._empty = False
+
+    def add(self, result: DeviceResult):
+        """Append one device result, count it by status, record its timings and latencies and queue a row per command."""
+        self.counts[result.status] += 1
+        self.add_text(result.text)
+        if result.device is None:
+            return
+        if result.timings:
+            platform, location = result.device.platform, result.device.location
+            self.timings.add(
+                getattr(platform, "name", ""), getattr(location, "name", ""), result.timings, result.reason
+            )
+            commands = len(result.outputs) if result.status == DeviceResult.SUCCESS else 0
+            if platform is not None:
+                self._metrics.add(platform.pk, result.timings, commands, result.reason)
+            self._latencies.add(result.device, result.timings, commands)
+        for command, output in result.outputs:
+            row = DeviceCommandResult(
+                job_result=self.job_result,
+                device_id=result.device.pk,
+                command=command[:COMMAND_MAX_LENGTH],
+                status=result.status,
+                started=result.started,
+                session_duration=result.duration,
+            )
+            self._rows.append((row, output or ""))
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def add_text(self, text: str):
+        """Append free text, such as a note about a failed shard, without counting it as a device."""
+        if text:
+            self._separate()
+            self._file.write(text.encode("utf-8"))
+
+    def merge(self, summary: dict, fileobj=None):
+        """Fold in the summary and results file produced by another sink, e.g. a shard sub-job.
+
+        Rows written by the other sink stay attached to its own job result, and it has already published
+        its own metrics.
+
+        Args:
+            summary (dict): Value returned by the other sink's `summary()`.
+            fileobj: Open binary file with the other sink's results, copied across in chunks.
+        """
+        for status in self.counts:
+            self.counts[status] += summary.get(status, 0)
+        self.timings.update(summary.get("timings", {}))
+        if fileobj is not None:
+            self._separate()
+            shutil.copyfileobj(fileobj, self._file)
+
+    def flush(self):
+        """Publish the queued metrics and latencies, store the queued outputs not seen before and write the queued rows."""
+        self._metrics.publish()
+        self._latencies.flush()
+        if self._rows:
+            rows = [row for row, _ in self._rows]
+            output_pks = CommandOutput.objects.store([output for _, output in self._rows])
+            for row, output_pk in zip(rows, output_pks):
+                row.command_output_id = output_pk
+            DeviceCommandResult.objects.bulk_create(rows, batch_size=self.batch_size)
+            self._rows = []
+
+    def summary(self) -> dict:
+        """Return the number of devices processed, broken down by status, and their phase timings."""
+        return {"devices": sum(self.counts.values()), **self.counts, "timings": self.timings.as_dict()}
+
+    def save(self, filename: str) -> FileProxy:
+        """Write any queued rows and attach the spooled results to the job result as a downloadable file.
+
+        The file is streamed into Nautobot's job file storage rather than read into memory, so it is not
+        subject to `JOB_CREATE_FILE_MAX_SIZE`.
+
+        Returns:
+            FileProxy: The created file record.
+        """
+        self.flush()
+        self._file.flush()
+        self._file.seek(0)
+        return FileProxy.objects.create(name=filename, job_result=self.job_result, file=File(self._file, name=filename))
+
+    def save_timings(self, filename: str) -> FileProxy:
+        """Attach the phase timings per platform and location to the job result as a CSV file.
+
+        Returns:
+            FileProxy: The created file record.
+        """
+        return FileProxy.objects.create(
+            name=filename,
+            job_result=self.job_result,
+            file=ContentFile(self.timings.to_csv().encode("utf-8"), name=filename),
+        )
+
+    def close(self):
+        """Remove the temporary spool file."""
+        self._file.close()
@@ -0,0 +1,60 @@
+"""Device Broker retry policy for device sessions that fail transiently.
+
+A failed session is retried when its failure reason (see `metrics.failure_reason`) and the phase it
+failed in are both retryable. By default only timeouts and connection errors raised while connecting
+are retried, so commands, and configuration in particular, never run twice. Backoff is exponential
+with full jitter. Settings come from `PLUGINS_CONFIG["device_broker"]["retry"]`, overriding
+`RETRY_DEFAULTS`; the number of attempts is a job input.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Optional
+
+from django.conf import settings
+
+RETRY_DEFAULTS = {
+    "backoff": 5.0,
+    "max_backoff": 60.0,
+    "reasons": ["timeout", "connection"],
+    "phases": ["connect"],
+}
+
+
+class RetryPolicy:
+    """Decide whether, and after how long, a failed device session is attempted again."""
+
+    def __init__(self, max_attempts: int = 1, **options):
+        """Initialize the policy.
+
+        Args:
+            max_attempts (int): Total attempts per device, including the first; 1 disables retries.
+            **options: Overrides of `RETRY_DEFAULTS`.
+        """
+        self.max_attempts = max(1, int(max_attempts or 1))
+        self.options = {**RETRY_DEFAULTS, **options}
+
+    @classmethod
+    def from_settings(cls, max_attempts: int = 1) -> RetryPolicy:
+        """Build the policy from `PLUGINS_CONFIG["device_broker"]["retry"]`."""
+        return cls(max_attempts, **(settings.PLUGINS_CONFIG.get("device_broker", {}).get("retry") or {}))
+
+    def backoff(self, attempt: int) -> float:
+        """Return a random delay of up to `backoff * 2 ** (attempt - 1)` seconds, capped at `max_backoff`."""
+        ceiling = min(self.options["max_backoff"], self.options["backoff"] * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)  # noqa: S311
+
+    def delay(self, reason: Optional[str], phase: Optional[str], attempt: int) -> Optional[float]:
+        """Return the seconds to wait before retrying a session, or None if it should not be retried.
+
+        Args:
+            reason (str | None): Why attempt number `attempt` failed, or None if it did not fail.
+            phase (str | None): Phase the session was in when it failed.
+            attempt (int): Number of the attempt that failed, starting at 1.
+        """
+        if not reason or attempt >= self.max_attempts:
+            return None
+        if reason not in self.options["reasons"] or phase not in self.options["phases"]:
+            return None
+        return self.backoff(attempt)
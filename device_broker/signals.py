@@ -0,0 +1,39 @@
+"""Device Broker signal handlers."""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from nautobot.dcim.models import Device
+from nautobot.extras.models import JobResult, Secret, SecretsGroup, SecretsGroupAssociation
+
+from device_broker.cache import credential_cache
+from device_broker.models import CommandOutput
+
+
+@receiver(post_save, sender=Secret)
+@receiver(post_delete, sender=Secret)
+@receiver(post_save, sender=SecretsGroup)
+@receiver(post_delete, sender=SecretsGroup)
+@receiver(post_save, sender=SecretsGroupAssociation)
+@receiver(post_delete, sender=SecretsGroupAssociation)
+@receiver(m2m_changed, sender=SecretsGroup.secrets.through)
+def invalidate_credential_cache(sender, **kwargs):  # pylint: disable=unused-argument
+    """Drop cached device credentials whenever a secret or secrets group changes."""
+    credential_cache.invalidate()
+
+
+@receiver(pre_delete, sender=JobResult)
+@receiver(pre_delete, sender=Device)
+def collect_command_outputs(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Remember the command outputs referenced by the results about to be deleted along with `instance`."""
+    instance._device_broker_command_output_pks = set(  # pylint: disable=protected-access
+        instance.device_command_results.values_list("command_output", flat=True)
+    )
+
+
+@receiver(post_delete, sender=JobResult)
+@receiver(post_delete, sender=Device)
+def delete_unreferenced_command_outputs(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Delete the command outputs that were only referenced by the results deleted along with `instance`."""
+    pks = getattr(instance, "_device_broker_command_output_pks", None)
+    if pks:
+        CommandOutput.objects.filter(pk__in=pks).delete_unreferenced()
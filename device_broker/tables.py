@@ -0,0 +1,27 @@
+"""Tables for device_broker."""
+
+import django_tables2 as tables
+from nautobot.apps.tables import BaseTable, ButtonsColumn, ToggleColumn
+
+from device_broker import models
+
+
+class DeviceCommandResultTable(BaseTable):
+    # pylint: disable=R0903
+    """Table for list view."""
+
+    pk = ToggleColumn()
+    device = tables.Column(linkify=True)
+    command = tables.Column(linkify=True)
+    status = tables.Column()
+    job_result = tables.Column(linkify=True, verbose_name="Job Result")
+    started = tables.DateTimeColumn()
+    session_duration = tables.Column(verbose_name="Session Duration (s)")
+    actions = ButtonsColumn(models.DeviceCommandResult, buttons=("delete",))
+
+    class Meta(BaseTable.Meta):
+        """Meta attributes."""
+
+        model = models.DeviceCommandResult
+        fields = ("pk", "device", "command", "status", "job_result", "started", "session_duration", "created")
+        default_columns = ("pk", "device", "command", "status", "job_result", "started", "session_duration", "actions")
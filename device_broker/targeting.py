@@ -0,0 +1,55 @@
+"""Device Broker targeting of devices through DynamicGroups and DeviceFilterSet expressions.
+
+Each source is compiled to a `Q` object over Device, so the job can combine every source into the
+one query that selects its devices. Every source is a primary key subquery, so a device matched
+through several of them, or through several related rows, is selected once. Filter-based and
+set-based DynamicGroups are evaluated live from their filters rather than from their cached members;
+static groups contribute their assigned members.
+A filter expression is a mapping of `DeviceFilterSet` parameters to a value or a list of values, for
+example `{"role": ["core"], "location": ["Region 1"], "status": "Active"}`. All of its parameters
+must match, and location filters include descendant locations.
+"""
+
+from __future__ import annotations
+
+from django.db.models import Q
+from django.utils.datastructures import MultiValueDict
+from nautobot.dcim.filters import DeviceFilterSet
+from nautobot.dcim.models import Device
+from nautobot.extras.choices import DynamicGroupTypeChoices
+
+
+def dynamic_group_query(group) -> Q:
+    """Return the query selecting the member devices of a DynamicGroup.
+
+    Raises:
+        ValueError: If the group's members are not devices.
+    """
+    if group.model is not Device:
+        raise ValueError(f"Dynamic group {group.name} does not contain devices")
+    if group.group_type == DynamicGroupTypeChoices.TYPE_STATIC:
+        return Q(pk__in=group.members.values("pk"))
+    # A primary key subquery, as filters across many-to-many relations such as tags would otherwise
+    # return a device once per matching related row when combined with other sources.
+    return Q(pk__in=Device.objects.filter(group.generate_query()).values("pk"))
+
+
+def device_filter_query(expression: dict) -> Q:
+    """Return the query selecting the devices that match a `DeviceFilterSet` expression.
+
+    Raises:
+        ValueError: If the expression is not a mapping, names unknown filters or has invalid values.
+    """
+    if not isinstance(expression, dict):
+        raise ValueError("The device filter must be a mapping of filter names to values")
+    data = MultiValueDict(
+        {name: list(value) if isinstance(value, (list, tuple)) else [value] for name, value in expression.items()}
+    )
+    filterset = DeviceFilterSet(data, queryset=Device.objects.all())
+    unknown = sorted(set(expression) - set(filterset.filters))
+    if unknown:
+        raise ValueError(f"Unknown device filters: {', '.join(unknown)}")
+    if not filterset.is_valid():
+        errors = "; ".join(f"{name}: {' '.join(messages)}" for name, messages in filterset.errors.items())
+        raise ValueError(f"Invalid device filter: {errors}")
+    return Q(pk__in=filterset.qs.values("pk"))
@@ -0,0 +1,79 @@
+"""Create fixtures for tests."""
+
+from django.contrib.contenttypes.models import ContentType
+from nautobot.dcim.models import Device, DeviceType, Location, LocationType, Manufacturer, Platform
+from nautobot.extras.models import JobResult, Role, Secret, SecretsGroup, SecretsGroupAssociation, Status
+from nautobot.ipam.models import IPAddress, Namespace, Prefix
+
+from device_broker.models import DeviceCommandResult
+
+
+def create_devices(count=6):
+    """Create `count` devices named broker-N at one location, on one platform, sharing one SecretsGroup.
+
+    The SecretsGroup reads its username and password from the BROKER_TEST_USERNAME and
+    BROKER_TEST_PASSWORD environment variables.
+
+    Returns:
+        tuple: The location, the platform and the list of devices.
+    """
+    status = Status.objects.get_for_model(Device).first()
+    location_type = LocationType.objects.create(name="Broker Site")
+    location_type.content_types.add(ContentType.objects.get_for_model(Device))
+    location = Location.objects.create(name="Broker Site 1", location_type=location_type, status=status)
+    platform = Platform.objects.create(name="Broker IOS", network_driver="cisco_ios")
+    manufacturer = Manufacturer.objects.create(name="Broker Manufacturer")
+    device_type = DeviceType.objects.create(manufacturer=manufacturer, model="Broker Model")
+    role = Role.objects.create(name="Broker Role")
+    role.content_types.add(ContentType.objects.get_for_model(Device))
+
+    secrets_group = SecretsGroup.objects.create(name="Broker Credentials")
+    for secret_type, variable in (("username", "BROKER_TEST_USERNAME"), ("password", "BROKER_TEST_PASSWORD")):
+        secret = Secret.objects.create(
+            name=f"Broker {secret_type}", provider="environment-variable", parameters={"variable": variable}
+        )
+        SecretsGroupAssociation.objects.create(
+            secrets_group=secrets_group, secret=secret, access_type="SSH", secret_type=secret_type
+        )
+
+    namespace = Namespace.objects.get(name="Global")
+    active = Status.objects.get(name="Active")
+    Prefix.objects.create(prefix="10.99.0.0/24", namespace=namespace, status=active)
+    devices = []
+    for index in range(count):
+        device = Device.objects.create(
+            name=f"broker-{index}",
+            device_type=device_type,
+            role=role,
+            location=location,
+            platform=platform,
+            secrets_group=secrets_group,
+            status=status,
+        )
+        device.primary_ip4 = IPAddress.objects.create(
+            address=f"10.99.0.{index + 1}/32", namespace=namespace, status=active
+        )
+        device.save()
+        devices.append(device)
+    return location, platform, devices
+
+
+def create_device_command_results():
+    """Create DeviceCommandResult rows for three devices across three job results.
+
+    Returns:
+        list[JobResult]: The job results.
+    """
+    _, _, devices = create_devices(count=3)
+    job_results = [JobResult.objects.create(name="Device Broker Job") for _ in range(3)]
+    for job_result, device, command, output, status in (
+        (job_results[0], devices[0], "show clock", "12:00", "success"),
+        (job_results[0], devices[0], "show ntp status", "synchronized", "success"),
+        (job_results[0], devices[1], "show clock", "Error - timed out", "failed"),
+        (job_results[1], devices[1], "show version", "No secrets group, skipped.", "skipped"),
+        (job_results[2], devices[2], "show version", "Version 15.2", "success"),
+    ):
+        DeviceCommandResult.objects.create(
+            job_result=job_result, device=device, command=command, output=output, status=status
+        )
+    return job_results
@@ -0,0 +1,34 @@
+"""Unit tests for device_broker API."""
+
+from nautobot.apps.testing import APIViewTestCases
+
+from device_broker import models
+from device_broker.tests import fixtures
+
+
+class DeviceCommandResultAPIViewTest(
+    APIViewTestCases.GetObjectViewTestCase,
+    APIViewTestCases.ListObjectsViewTestCase,
+):
+    # pylint: disable=too-many-ancestors
+    """Test the read-only API viewsets for DeviceCommandResult."""
+
+    model = models.DeviceCommandResult
+    choices_fields = ("status",)
+
+    @classmethod
+    def setUpTestData(cls):
+        fixtures.create_device_command_results()
+
+    def get_depth_fields(self):
+        """The shared CommandOutput is flattened into `output` and `output_digest` rather than nested."""
+        return [field for field in super().get_depth_fields() if field != "command_output"]
+
+    def test_output_is_returned_with_its_digest(self):
+        result = models.DeviceCommandResult.objects.get(command="show ntp status")
+        self.add_permissions("device_broker.view_devicecommandresult")
+
+        response = self.client.get(self._get_detail_url(result), **self.header)
+
+        self.assertEqual(response.data["output"], "synchronized")
+        self.assertEqual(response.data["output_digest"], result.command_output.digest)
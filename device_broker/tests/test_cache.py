@@ -0,0 +1,166 @@
+"""Test module for device broker caches."""
+
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import override_settings
+from nautobot.apps.testing import TestCase
+from nautobot.extras.models import Secret, SecretsGroup, SecretsGroupAssociation
+
+from device_broker.cache import CredentialCache, OutputCache, credential_cache
+from device_broker.jobs import DeviceBrokerJob
+from device_broker.tests import fixtures
+from device_broker.utils import get_group_credentials
+
+
+class TestCredentialCache(TestCase):
+    """Test cases for CredentialCache."""
+
+    def setUp(self):
+        self.cache = CredentialCache()
+
+    def test_hit_returns_copy_and_counts(self):
+        generation = self.cache.generation()
+        self.assertIsNone(self.cache.get("key", generation))
+        self.cache.set("key", {"username": "admin"}, ttl=60, generation=generation)
+
+        value = self.cache.get("key", generation)
+        value["username"] = "changed"
+
+        self.assertEqual(self.cache.get("key", generation), {"username": "admin"})
+        self.assertEqual(self.cache.stats(), {"hits": 2, "misses": 1, "size": 1})
+
+    @patch("device_broker.cache.time.monotonic")
+    def test_entries_expire_after_ttl(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        self.cache.set("key", {"username": "admin"}, ttl=30, generation=0)
+        mock_monotonic.return_value = 131.0
+        self.assertIsNone(self.cache.get("key", 0))
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_invalidate_reaches_other_processes_through_generation(self):
+        other_process = CredentialCache()
+        generation = other_process.generation()
+        other_process.set("key", {"username": "admin"}, ttl=60, generation=generation)
+
+        self.cache.invalidate()
+
+        self.assertIsNone(other_process.get("key", other_process.generation()))
+
+
+@override_settings(PLUGINS_CONFIG={"device_broker": {"credential_cache_ttl": 300}})
+@patch.dict("os.environ", {"BROKER_CACHE_USERNAME": "admin", "BROKER_CACHE_PASSWORD": "passw0rd"})
+class TestGroupCredentialCaching(TestCase):
+    """Test cases for credential caching in get_group_credentials."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = SecretsGroup.objects.create(name="Broker Cache Credentials")
+        for secret_type, variable in (("username", "BROKER_CACHE_USERNAME"), ("password", "BROKER_CACHE_PASSWORD")):
+            secret = Secret.objects.create(
+                name=f"Broker cache {secret_type}", provider="environment-variable", parameters={"variable": variable}
+            )
+            SecretsGroupAssociation.objects.create(
+                secrets_group=cls.group, secret=secret, access_type="SSH", secret_type=secret_type
+            )
+
+    def setUp(self):
+        credential_cache.invalidate()
+
+    def _device(self):
+        device = type("MockDevice", (), {})()
+        device.secrets_group = SecretsGroup.objects.get(pk=self.group.pk)
+        return device
+
+    def test_second_lookup_skips_secret_provider(self):
+        expected = {"username": "admin", "password": "passw0rd"}
+        self.assertEqual(get_group_credentials(self._device()), expected)
+        with patch.object(Secret, "get_value") as mock_get_value:
+            self.assertEqual(get_group_credentials(self._device()), expected)
+        mock_get_value.assert_not_called()
+
+    def test_secret_change_invalidates_cache(self):
+        get_group_credentials(self._device())
+        secret = Secret.objects.get(name="Broker cache username")
+        secret.parameters = {"variable": "BROKER_CACHE_PASSWORD"}
+        secret.save()
+
+        self.assertEqual(get_group_credentials(self._device())["username"], "passw0rd")
+
+    def test_templated_secrets_are_not_cached(self):
+        Secret.objects.filter(name="Broker cache username").update(parameters={"variable": "{{ obj.username_var }}"})
+        device = self._device()
+        device.username_var = "BROKER_CACHE_USERNAME"
+        get_group_credentials(device)
+        device = self._device()
+        device.username_var = "BROKER_CACHE_PASSWORD"
+
+        self.assertEqual(get_group_credentials(device)["username"], "passw0rd")
+
+
+class TestOutputCache(TestCase):
+    """Test cases for caching the outputs of read-only commands."""
+
+    def setUp(self):
+        cache.delete(OutputCache.key("device"))
+
+    def test_only_read_only_commands_are_cached(self):
+        output_cache = OutputCache("netmiko", [])
+        self.assertTrue(output_cache.is_read_only("  show   version"))
+        self.assertTrue(output_cache.is_read_only("display interface brief"))
+        self.assertFalse(output_cache.is_read_only("reload"))
+        self.assertFalse(output_cache.is_read_only("show running-config | redirect flash:backup.cfg"))
+        self.assertFalse(output_cache.is_read_only("show clock"))
+        self.assertFalse(OutputCache("netmiko", ["show version", "clear counters"]).servable)
+
+    def test_outputs_are_served_by_normalized_command_and_method(self):
+        OutputCache("netmiko", []).set("device", [("show version", "15.2"), ("clear counters", "")])
+
+        output_cache = OutputCache("netmiko", ["show  version"])
+        self.assertEqual(output_cache.get("device"), ["15.2"])
+        self.assertIsNone(OutputCache("scrapli", ["show version"]).get("device"))
+        self.assertIsNone(OutputCache("netmiko", ["show version", "show inventory"]).get("device"))
+        self.assertIsNone(OutputCache("netmiko", ["clear counters"]).get("device"))
+        self.assertEqual((output_cache.hits, output_cache.misses), (1, 0))
+
+        OutputCache.invalidate("device")
+        self.assertIsNone(output_cache.get("device"))
+
+    @patch("device_broker.cache.time.time")
+    def test_outputs_expire_after_ttl(self, mock_time):
+        mock_time.return_value = 1000.0
+        OutputCache("netmiko", [], ttl=60).set("device", [("show version", "15.2")])
+        mock_time.return_value = 1061.0
+        self.assertIsNone(OutputCache("netmiko", ["show version"]).get("device"))
+
+
+class TestJobOutputCache(TestCase):
+    """Test cases for serving job runs from the output cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        _, cls.platform, cls.devices = fixtures.create_devices(count=2)
+
+    def setUp(self):
+        self.job = DeviceBrokerJob()
+        self.job.logger = MagicMock()
+        for device in self.devices:
+            cache.delete(OutputCache.key(device.pk))
+
+    def test_cached_devices_need_no_credentials_or_session(self):
+        devices = list(self.job._get_devices(None, self.platform, None))
+        OutputCache("netmiko", []).set(devices[0].pk, [("show version", "15.2")])
+        output_cache = OutputCache("netmiko", ["show version"])
+
+        with patch("device_broker.jobs.get_group_credentials") as mock_credentials:
+            target = self.job._prepare_device(devices[0], "netmiko", output_cache=output_cache)
+        mock_credentials.assert_not_called()
+
+        result = self.job._process_device(target, ["show version"], False, connection_timeout=5)
+        self.assertEqual(result.status, "success")
+        self.assertEqual(result.outputs, [("show version", "15.2")])
+        self.assertEqual(result.text, f"{target.name} (cached output):\nCommand: show version\nOutput:\n15.2")
+        self.assertEqual(result.timings, {})
+        with patch("device_broker.jobs.get_group_credentials"):
+            target = self.job._prepare_device(devices[1], "netmiko", output_cache=output_cache)
+        self.assertIsNone(target.cached_outputs)
@@ -0,0 +1,54 @@
+"""Test module for delta mode, which reports only the outputs that changed since the previous run."""
+
+from nautobot.apps.testing import TestCase
+
+from device_broker.delta import DeltaFilter
+from device_broker.execution import DeviceResult
+from device_broker.jobs import _delta_result
+from device_broker.models import DeviceCommandDigest
+from device_broker.tests import fixtures
+
+
+class TestDeltaFilter(TestCase):
+    """Test cases for comparing outputs with the previous run's."""
+
+    @classmethod
+    def setUpTestData(cls):
+        _, _, cls.devices = fixtures.create_devices(count=2)
+
+    def _run(self, outputs, batch_size=1):
+        results = [
+            DeviceResult(device.name, DeviceResult.SUCCESS, "", device=device, outputs=pairs)
+            for device, pairs in zip(self.devices, outputs)
+        ]
+        results.append(DeviceResult("broker-x", DeviceResult.FAILED, "broker-x: Error", device=self.devices[0]))
+        delta = DeltaFilter(batch_size=batch_size)
+        changes = list(delta.changes(results))
+        self.assertEqual([result for result, _ in changes], results)
+        return delta, [changed for _, changed in changes]
+
+    def test_only_outputs_that_differ_from_the_previous_run_are_changed(self):
+        delta, changes = self._run([[("show version", "15.2"), ("show clock", "10:00")], [("show version", "16.1")]])
+        self.assertEqual(
+            changes, [[("show version", "15.2"), ("show clock", "10:00")], [("show version", "16.1")], None]
+        )
+        self.assertEqual((delta.changed, delta.compared), (3, 3))
+
+        delta, changes = self._run(
+            [[("show version", "15.2"), ("show clock", "10:05")], [("show version", "16.1")]], batch_size=10
+        )
+        self.assertEqual(changes, [[("show clock", "10:05")], [], None])
+        self.assertEqual((delta.changed, delta.compared), (1, 3))
+        self.assertEqual(DeviceCommandDigest.objects.filter(device=self.devices[0]).count(), 2)
+
+    def test_results_are_narrowed_to_the_changed_outputs(self):
+        result = DeviceResult("rtr1", DeviceResult.SUCCESS, "", outputs=[("show version", "15.2"), ("show clock", "1")])
+        self.assertEqual(
+            _delta_result(result, [("show clock", "1")]).text,
+            "rtr1 (1 of 2 outputs changed):\nCommand: show clock\nOutput:\n1",
+        )
+
+        result = DeviceResult("rtr1", DeviceResult.SUCCESS, "", outputs=[("show version", "15.2")])
+        result = _delta_result(result, [])
+        self.assertEqual(result.text, "rtr1: no changes since the previous run.")
+        self.assertEqual(result.outputs, [])
@@ -0,0 +1,144 @@
+"""Test module for the device broker concurrent execution engine."""
+
+import asyncio
+import logging
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from device_broker.execution import QueuedLogger, run_async, run_concurrently
+
+
+class TestRunConcurrently(unittest.TestCase):
+    """Test cases for run_concurrently."""
+
+    def test_results_follow_input_order(self):
+        # Earlier items sleep longer, so they complete last.
+        def work(item):
+            time.sleep((5 - item) * 0.01)
+            return item * 10
+
+        results = list(run_concurrently(work, range(5), max_workers=5, on_error=MagicMock()))
+        self.assertEqual(results, [0, 10, 20, 30, 40])
+
+    def test_exceptions_are_isolated_per_item(self):
+        def work(item):
+            if item == 2:
+                raise RuntimeError("boom")
+            return item
+
+        results = list(run_concurrently(work, range(4), max_workers=2, on_error=lambda item, exc: f"{item}: {exc}"))
+        self.assertEqual(results, [0, 1, "2: boom", 3])
+
+    def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def work(item):
+            with lock:
+                active.append(item)
+                peak.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.remove(item)
+            return item
+
+        results = list(run_concurrently(work, range(20), max_workers=3, on_error=MagicMock()))
+        self.assertEqual(results, list(range(20)))
+        self.assertLessEqual(max(peak), 3)
+
+    def test_items_are_consumed_lazily(self):
+        pulled = []
+
+        def items():
+            for item in range(100):
+                pulled.append(item)
+                yield item
+
+        results = run_concurrently(lambda item: item, items(), max_workers=2, on_error=MagicMock())
+        self.assertEqual(next(results), 0)
+        self.assertLess(len(pulled), 100)
+        results.close()
+
+    def test_failed_items_are_retried_behind_fresh_work_in_input_order(self):
+        calls = []
+
+        def work(item):
+            calls.append(item)
+            if item == 0 and calls.count(0) < 3:
+                raise RuntimeError("vty lines busy")
+            return item
+
+        def retry(item, result, attempt):
+            return 0.01 if isinstance(result, str) and attempt < 3 else None
+
+        results = list(
+            run_concurrently(work, range(4), max_workers=1, on_error=lambda item, exc: f"{item}: {exc}", retry=retry)
+        )
+        self.assertEqual(results, [0, 1, 2, 3])
+        # The worker moved on to fresh items while item 0 backed off.
+        self.assertEqual(calls[:2], [0, 1])
+        self.assertEqual(calls.count(0), 3)
+
+    def test_retries_stop_when_the_policy_gives_up(self):
+        def work(item):
+            raise RuntimeError("down")
+
+        retry = MagicMock(side_effect=lambda item, result, attempt: 0 if attempt < 2 else None)
+        results = list(run_concurrently(work, [7], max_workers=1, on_error=lambda item, exc: str(exc), retry=retry))
+        self.assertEqual(results, ["down"])
+        self.assertEqual(retry.call_count, 2)
+
+
+class TestRunAsync(unittest.TestCase):
+    """Test cases for run_async."""
+
+    def test_results_follow_input_order_and_errors_are_isolated(self):
+        async def work(item):
+            await asyncio.sleep((5 - item) * 0.01)
+            if item == 3:
+                raise RuntimeError("boom")
+            return item * 10
+
+        results = list(run_async(work, range(5), concurrency=5, on_error=lambda item, exc: f"{item}: {exc}"))
+        self.assertEqual(results, [0, 10, 20, "3: boom", 40])
+
+    def test_many_sessions_share_one_event_loop(self):
+        active = []
+        peak = []
+
+        async def work(item):
+            active.append(item)
+            peak.append(len(active))
+            await asyncio.sleep(0.05)
+            active.remove(item)
+            return item
+
+        results = list(run_async(work, range(500), concurrency=250, on_error=MagicMock()))
+        self.assertEqual(results, list(range(500)))
+        self.assertEqual(max(peak), 250)
+
+
+class TestQueuedLogger(unittest.TestCase):
+    """Test cases for QueuedLogger."""
+
+    def test_flush_replays_records_in_order_on_target_logger(self):
+        queued = QueuedLogger()
+        threads = [threading.Thread(target=queued.info, args=("Device %s", name)) for name in ("a", "b")]
+        for thread in threads:
+            thread.start()
+            thread.join()
+        queued.error("Failed %s", "c")
+
+        target = MagicMock()
+        queued.flush(target)
+        target.log.assert_any_call(logging.INFO, "Device %s", "a")
+        target.log.assert_any_call(logging.INFO, "Device %s", "b")
+        target.log.assert_called_with(logging.ERROR, "Failed %s", "c")
+        self.assertEqual(target.log.call_count, 3)
+
+        target.reset_mock()
+        queued.flush(target)
+        target.log.assert_not_called()
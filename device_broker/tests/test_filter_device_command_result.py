@@ -0,0 +1,36 @@
+"""Test DeviceCommandResult Filter."""
+
+from nautobot.apps.testing import FilterTestCases
+
+from device_broker import filters, models
+from device_broker.tests import fixtures
+
+
+class DeviceCommandResultFilterTestCase(FilterTestCases.FilterTestCase):
+    """DeviceCommandResult Filter Test Case."""
+
+    queryset = models.DeviceCommandResult.objects.all()
+    filterset = filters.DeviceCommandResultFilterSet
+    generic_filter_tests = (
+        ("command",),
+        ("device", "device__id"),
+        ("device", "device__name"),
+        ("job_result", "job_result__id"),
+        ("output_digest", "command_output__digest"),
+        ("status",),
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        """Setup test data for DeviceCommandResult Model."""
+        fixtures.create_device_command_results()
+
+    def test_q_search_command(self):
+        """Test using Q search with the command of DeviceCommandResult."""
+        params = {"q": "ntp"}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 1)
+
+    def test_q_invalid(self):
+        """Test using invalid Q search for DeviceCommandResult."""
+        params = {"q": "test-five"}
+        self.assertFalse(self.filterset(params, self.queryset).qs.exists())
@@ -0,0 +1,169 @@
+"""Test module for the HTTP API driver wrapper."""
+
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from device_broker.http_api import HttpApiAuthenticationError, HttpApiError, KeepAlivePool, keep_alive_pool
+from device_broker.metrics import failure_reason
+from device_broker.utils import get_platform_driver
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    """Answer eAPI, NX-API and RESTCONF requests over keep-alive connections and record them."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Keep the test output quiet."""
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Run eAPI or NX-API commands."""
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.client_address, self.path, body))
+        if self.headers["Authorization"] != "Basic YWRtaW46cGFzc3cwcmQ=":
+            self._reply(401, {})
+        elif self.path == "/command-api":
+            cmds = body["params"]["cmds"]
+            if "bogus" in cmds:
+                self._reply(200, {"error": {"code": 1002, "message": "invalid command"}})
+            elif body["params"]["format"] == "text":
+                self._reply(200, {"result": [{"output": f"{cmd}\n"} for cmd in cmds]})
+            else:
+                self._reply(200, {"result": [{"command": cmd} for cmd in cmds]})
+        else:
+            replies = [{"id": call["id"], "result": {"body": {"command": call["params"]["cmd"]}}} for call in body]
+            self._reply(200, list(reversed(replies)) if len(replies) > 1 else replies[0])
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Return a RESTCONF resource."""
+        self.server.requests.append((self.client_address, self.path, None))
+        self._reply(200, {"path": self.path})
+
+
+class TestKeepAlivePool(unittest.TestCase):
+    """Test cases for bounding the idle connections kept open."""
+
+    def test_expired_connections_of_every_host_are_closed_on_each_use(self):
+        pool = KeepAlivePool()
+        first, second, third = MagicMock(), MagicMock(), MagicMock()
+        with patch("device_broker.http_api.time.monotonic", return_value=100):
+            pool.put("a", first, max_idle_per_host=2, max_hosts=10, idle_timeout=30)
+        with patch("device_broker.http_api.time.monotonic", return_value=120):
+            pool.put("b", second, max_idle_per_host=2, max_hosts=10, idle_timeout=30)
+            first.close.assert_not_called()
+        with patch("device_broker.http_api.time.monotonic", return_value=140):
+            self.assertIsNone(pool.get("c", idle_timeout=30))
+            first.close.assert_called_once()
+            second.close.assert_not_called()
+            self.assertIs(pool.get("b", idle_timeout=30), second)
+            pool.put("c", third, max_idle_per_host=2, max_hosts=10, idle_timeout=30)
+        with patch("device_broker.http_api.time.monotonic", return_value=200):
+            self.assertIsNone(pool.get("a", idle_timeout=30))
+            third.close.assert_called_once()
+
+    def test_least_recently_used_hosts_are_evicted(self):
+        pool = KeepAlivePool()
+        connections = [MagicMock() for _ in range(3)]
+        for host, connection in zip("abc", connections):
+            pool.put(host, connection, max_idle_per_host=2, max_hosts=2, idle_timeout=30)
+        connections[0].close.assert_called_once()
+        self.assertIs(pool.get("c", idle_timeout=30), connections[2])
+
+
+class TestHttpApiDriver(SimpleTestCase):
+    """Test cases for batching commands and reusing keep-alive connections."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeApiHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.settings = override_settings(
+            PLUGINS_CONFIG={"device_broker": {"http_api": {"scheme": "http", "port": cls.server.server_port}}}
+        )
+        cls.settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests = []
+        keep_alive_pool.clear()
+        self.addCleanup(keep_alive_pool.clear)
+        self.credentials = {"username": "admin", "password": "passw0rd"}
+
+    def connect(self, network_driver, credentials=None):
+        platform = type("Platform", (), {"network_driver": network_driver})()
+        driver = get_platform_driver(platform, method="http_api")
+        return driver.connect("127.0.0.1", credentials or self.credentials, timeout=5)
+
+    def test_eapi_batches_commands_and_reuses_the_connection(self):
+        pooled = []
+        for _ in range(2):
+            connection = self.connect("arista_eos")
+            pooled.append(connection.pooled)
+            outputs = connection.send_commands(["show version", "show clock"])
+            connection.disconnect()
+
+        self.assertEqual(pooled, [False, True])
+
+        self.assertEqual(json.loads(outputs[1]), {"command": "show clock"})
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.server.requests[0][2]["params"]["cmds"], ["show version", "show clock"])
+        self.assertEqual(len({client for client, _, _ in self.server.requests}), 1)
+
+    def test_eapi_config_runs_in_one_request(self):
+        connection = self.connect("arista_eos")
+        output = connection.send_config(["interface Ethernet1", "description uplink"], save=True)
+        connection.disconnect()
+
+        self.assertEqual(
+            output, "configure\ninterface Ethernet1\ndescription uplink\nend\ncopy running-config startup-config\n"
+        )
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_nxapi_results_follow_command_order(self):
+        connection = self.connect("cisco_nxos")
+        outputs = connection.send_commands(["show version", "show clock"])
+        self.assertEqual(
+            [json.loads(output) for output in outputs], [{"command": "show version"}, {"command": "show clock"}]
+        )
+        self.assertEqual(json.loads(connection.send_command("show hostname")), {"command": "show hostname"})
+        self.assertEqual(self.server.requests[0][1], "/ins")
+
+    def test_restconf_paths_share_one_connection(self):
+        connection = self.connect("cisco_xe")
+        outputs = connection.send_commands(["ietf-interfaces:interfaces", "/Cisco-IOS-XE-native:native/hostname"])
+
+        self.assertEqual(json.loads(outputs[0]), {"path": "/restconf/data/ietf-interfaces:interfaces"})
+        self.assertEqual(len({client for client, _, _ in self.server.requests}), 1)
+        with self.assertRaises(NotImplementedError):
+            connection.send_config(["hostname rtr1"])
+
+    def test_errors_are_raised_and_classified(self):
+        connection = self.connect("arista_eos", credentials={"username": "admin", "password": "wrong"})
+        with self.assertRaises(HttpApiAuthenticationError) as raised:
+            connection.send_commands(["show version"])
+        self.assertEqual(failure_reason(raised.exception, "commands"), "authentication")
+
+        connection = self.connect("arista_eos")
+        with self.assertRaisesRegex(HttpApiError, "invalid command"):
+            connection.send_commands(["show version", "bogus"])
@@ -0,0 +1,503 @@
+"""Test module for the Device Broker job."""
+
+import asyncio
+import io
+import logging
+import time
+import unittest
+from unittest.mock import ANY, AsyncMock, MagicMock, PropertyMock, call, patch
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from nautobot.apps.testing import TestCase
+from nautobot.dcim.models import Device
+from nautobot.extras.choices import JobResultStatusChoices
+from nautobot.extras.models import Secret, SecretsGroup, SecretsGroupAssociation, Tag
+
+from device_broker.execution import DeviceResult, DeviceTarget
+from device_broker.jobs import DEVICE_CHUNK_SIZE, RESULTS_FILENAME, TIMINGS_FILENAME, DeviceBrokerJob
+from device_broker.limits import RateLimiter
+from device_broker.tests import fixtures
+from device_broker.timeouts import AdaptiveTimeouts
+
+
+def make_target(name="rtr1", connection=None):
+    """Build a DeviceTarget whose driver returns `connection`."""
+    driver = MagicMock()
+    driver.connect.return_value = connection or MagicMock()
+    device = MagicMock(**{"platform.name": "cisco_ios", "location.name": "Site-A"})
+    return DeviceTarget(device, name, host="10.0.0.1", credentials={"username": "u"}, driver=driver)
+
+
+class DeviceList(list):
+    """A list standing in for the device QuerySet returned by `_get_devices`."""
+
+    def __getitem__(self, index):
+        item = super().__getitem__(index)
+        return DeviceList(item) if isinstance(index, slice) else item
+
+    def exists(self):
+        return bool(self)
+
+    def count(self):
+        return len(self)
+
+    def iterator(self, chunk_size=None):
+        return iter(self)
+
+    def prefetch_related(self, *lookups):
+        return self
+
+    def values_list(self, field, flat=False):
+        return DeviceList(getattr(device, field) for device in self)
+
+
+def capture_results_files(test):
+    """Patch the result sink's storage so attached files are captured as text and no rows, metrics or latencies are stored."""
+    patcher = patch("device_broker.results.FileProxy")
+    file_proxy = patcher.start()
+    test.addCleanup(patcher.stop)
+    rows_patcher = patch("device_broker.results.DeviceCommandResult")
+    rows_patcher.start()
+    test.addCleanup(rows_patcher.stop)
+    metrics_patcher = patch("device_broker.results.MetricsBatch")
+    metrics_patcher.start()
+    test.addCleanup(metrics_patcher.stop)
+    latencies_patcher = patch("device_broker.results.LatencyRecorder")
+    latencies_patcher.start()
+    test.addCleanup(latencies_patcher.stop)
+    outputs_patcher = patch("device_broker.results.CommandOutput")
+    outputs_patcher.start().objects.store.side_effect = lambda texts: [None] * len(texts)
+    test.addCleanup(outputs_patcher.stop)
+    captured = {}
+
+    def create(name, job_result, file):
+        captured[name] = file.read().decode("utf-8")
+        return MagicMock()
+
+    file_proxy.objects.create.side_effect = create
+    return captured
+
+
+class TestDeviceBrokerJobProcessing(unittest.TestCase):
+    """Test cases for DeviceBrokerJob per-device processing."""
+
+    def setUp(self):
+        self.job = DeviceBrokerJob()
+        self.job.logger = MagicMock()
+
+    def test_process_device_runs_commands(self):
+        connection = MagicMock()
+        connection.send_commands.side_effect = lambda cmds: [f"{cmd} output" for cmd in cmds]
+        target = make_target(connection=connection)
+
+        result = self.job._process_device(target, ["show version"], False, connection_timeout=5)
+
+        target.driver.connect.assert_called_once_with(
+            host="10.0.0.1", credentials={"username": "u"}, timeout=5, command_timeout=None
+        )
+        self.assertEqual(result.status, DeviceResult.SUCCESS)
+        self.assertEqual(result.text, "rtr1:\nCommand: show version\nOutput:\nshow version output")
+        connection.disconnect.assert_called_once()
+
+    def test_derived_connection_timeout_is_capped_by_the_job_input_and_logged(self):
+        for derived, expected in ((2.5, 2.5), (120, 30), (30, 30)):
+            target = make_target()
+            target.timeout = derived
+            self.job.logger.reset_mock()
+
+            self.job._process_device(target, ["show version"], False, connection_timeout=30)
+
+            self.assertEqual(target.driver.connect.call_args.kwargs["timeout"], expected)
+            logged = call(
+                "Device %s: connection timeout %.1fs derived from its latency history (job input %ss).",
+                "rtr1",
+                expected,
+                30,
+            )
+            self.assertEqual(logged in self.job.logger.info.call_args_list, expected != 30)
+
+    def test_sessions_on_a_pooled_connection_time_no_connect_phase(self):
+        target = make_target(connection=MagicMock(pooled=True))
+
+        result = self.job._process_device(target, ["show version"], False, connection_timeout=5)
+
+        self.assertEqual(result.status, DeviceResult.SUCCESS)
+        self.assertEqual(list(result.timings), ["commands", "disconnect"])
+
+    def test_process_device_disconnects_after_error(self):
+        connection = MagicMock()
+        connection.send_commands.side_effect = RuntimeError("timed out")
+        target = make_target(connection=connection)
+
+        result = self.job._process_device(target, ["show version"], False, connection_timeout=5)
+
+        self.assertEqual(result.status, DeviceResult.FAILED)
+        self.assertEqual(result.text, "rtr1: Error - timed out")
+        self.assertEqual(result.reason, "command")
+        connection.disconnect.assert_called_once()
+
+    def test_process_device_times_each_phase_and_classifies_failures(self):
+        target = make_target()
+
+        result = self.job._process_device(target, ["show version"], False, connection_timeout=5)
+
+        self.assertEqual(list(result.timings), ["connect", "commands", "disconnect"])
+        self.assertIsNone(result.reason)
+
+        target = make_target()
+        target.driver.connect.side_effect = TimeoutError("connect timed out")
+        result = self.job._process_device(target, ["show version"], False, connection_timeout=5)
+
+        self.assertEqual(list(result.timings), ["connect"])
+        self.assertEqual(result.reason, "timeout")
+
+    def test_run_retries_devices_that_fail_to_connect(self):
+        capture_results_files(self)
+        self.job.job_result = MagicMock()
+        target = make_target("a")
+        connection = target.driver.connect.return_value
+        attempts = iter([0.3, 0])
+
+        def connect(**kwargs):
+            time.sleep(next(attempts))
+            if target.driver.connect.call_count == 1:
+                raise TimeoutError("connect timed out")
+            return connection
+
+        target.driver.connect.side_effect = connect
+        connection.send_commands.return_value = ["ok"]
+        self.job._get_devices = MagicMock(return_value=DeviceList(["a"]))
+        self.job._prepare_device = lambda device, *args: target
+
+        with patch("device_broker.retry.random.uniform", return_value=0):
+            summary = self.job.run(None, None, None, False, "show clock", max_attempts=2)
+
+        self.assertEqual(summary["success"], 1)
+        self.assertEqual(target.driver.connect.call_count, 2)
+        # Only the successful attempt's connect time is recorded, not the 0.3s the failed attempt took.
+        [(_, _, phase, count, total, _)] = [row for row in summary["timings"]["phases"] if row[2] == "connect"]
+        self.assertEqual((phase, count), ("connect", 1))
+        self.assertLess(total, 0.2)
+        self.job.logger.warning.assert_any_call(
+            "Device %s failed (%s) on attempt %d of %d, retrying in %.1fs.", "a", "timeout", 1, 2, 0
+        )
+
+    def test_process_device_returns_skip_reason(self):
+        target = DeviceTarget(MagicMock(), "rtr1", skip_reason="No platform defined, skipped.")
+        result = self.job._process_device(target, ["show version"], False, connection_timeout=5)
+        self.assertEqual(result.status, DeviceResult.SKIPPED)
+        self.assertEqual(result.text, "rtr1: No platform defined, skipped.")
+
+    def test_run_streams_results_in_device_order_and_logs_on_job_thread(self):
+        files = capture_results_files(self)
+        self.job.job_result = MagicMock()
+        targets = {name: make_target(name) for name in ("a", "b", "c")}
+        targets["d"] = DeviceTarget(MagicMock(), "d", skip_reason="No secrets group, skipped.")
+        self.job._get_devices = MagicMock(return_value=DeviceList(["a", "b", "c", "d"]))
+        self.job._prepare_device = lambda device, *args: targets[device]
+        for name in "abc":
+            targets[name].driver.connect.return_value.send_commands.return_value = ["ok"]
+        targets["c"].driver.connect.return_value.send_commands.side_effect = RuntimeError("timed out")
+
+        summary = self.job.run(None, None, None, False, "show clock", max_workers=3)
+
+        self.assertEqual(
+            {key: summary[key] for key in ("devices", "success", "failed", "skipped")},
+            {"devices": 4, "success": 2, "failed": 1, "skipped": 1},
+        )
+        self.assertEqual(summary["timings"]["failures"], [["cisco_ios", "Site-A", "command", 1]])
+        self.assertEqual(
+            [line.split(",")[:4] for line in files[TIMINGS_FILENAME].splitlines()],
+            [
+                ["platform", "location", "phase", "devices"],
+                ["cisco_ios", "Site-A", "connect", "3"],
+                ["cisco_ios", "Site-A", "commands", "3"],
+                ["cisco_ios", "Site-A", "disconnect", "2"],
+            ],
+        )
+        self.assertEqual(
+            files[RESULTS_FILENAME].split("\n\n"),
+            [
+                "a:\nCommand: show clock\nOutput:\nok",
+                "b:\nCommand: show clock\nOutput:\nok",
+                "c: Error - timed out",
+                "d: No secrets group, skipped.",
+            ],
+        )
+        self.job.logger.log.assert_any_call(logging.INFO, "Processing device: %s", "b")
+
+    def test_process_device_pushes_config_as_one_set(self):
+        connection = MagicMock()
+        connection.send_config.return_value = "config output"
+        target = make_target(connection=connection)
+        lines = ["interface Ethernet1", "description uplink"]
+
+        result = self.job._process_device(target, lines, True, connection_timeout=5, save_config=True)
+
+        connection.send_config.assert_called_once_with(lines, save=True)
+        connection.send_commands.assert_not_called()
+        self.assertEqual(result.text, "rtr1:\nConfiguration (2 lines)\nOutput:\nconfig output")
+        connection.disconnect.assert_called_once()
+
+    def test_process_device_async_awaits_driver(self):
+        connection = MagicMock()
+        connection.send_commands = AsyncMock(side_effect=lambda cmds: [f"{cmd} output" for cmd in cmds])
+        connection.send_config = AsyncMock(return_value="config output")
+        connection.disconnect = AsyncMock()
+        target = make_target()
+        target.driver.connect = AsyncMock(return_value=connection)
+
+        result = asyncio.run(self.job._process_device_async(target, ["show version"], False, connection_timeout=5))
+        config_result = asyncio.run(self.job._process_device_async(target, ["hostname r1"], True, connection_timeout=5))
+
+        self.assertEqual(result.text, "rtr1:\nCommand: show version\nOutput:\nshow version output")
+        self.assertEqual(config_result.text, "rtr1:\nConfiguration (1 lines)\nOutput:\nconfig output")
+        connection.send_config.assert_awaited_once_with(["hostname r1"], save=False)
+        self.assertEqual(connection.disconnect.await_count, 2)
+
+
+class TestDeviceBrokerJobSharding(unittest.TestCase):
+    """Test cases for splitting DeviceBrokerJob runs across Celery workers."""
+
+    def setUp(self):
+        self.job = DeviceBrokerJob()
+        self.job.logger = MagicMock()
+        for attr, value in (("job_model", "job-model"), ("user", "user"), ("celery_kwargs", {"queue": "q"})):
+            patcher = patch.object(DeviceBrokerJob, attr, new_callable=PropertyMock, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.job.job_result = MagicMock()
+
+    def _execute_shard(self, devices, *args, **kwargs):
+        sink = args[5]
+        for device in devices:
+            sink.add(DeviceResult(str(device.pk), DeviceResult.SUCCESS, f"device {device.pk} output"))
+
+    def _make_child(self, index, status=JobResultStatusChoices.STATUS_SUCCESS, output=b""):
+        child = MagicMock(pk=f"child-{index}", status=status)
+        child.result = {
+            "devices": 2,
+            "success": 1,
+            "failed": 1,
+            "skipped": 0,
+            "timings": {
+                "phases": [["eos", "Site-B", "connect", 2, 1.5, 1.0]],
+                "failures": [["eos", "Site-B", "timeout", 1]],
+            },
+        }
+        child.files.filter.return_value.first.return_value.file.open.return_value = io.BytesIO(output)
+        return child
+
+    @patch("device_broker.jobs.JobResult")
+    def test_run_dispatches_shards_and_merges_results_in_order(self, mock_job_result):
+        files = capture_results_files(self)
+        devices = [MagicMock(pk=pk) for pk in range(5)]
+        children = [self._make_child(2, output=b"shard 2 output"), self._make_child(3, output=b"shard 3 output")]
+        mock_job_result.enqueue_job.side_effect = children
+        mock_job_result.objects.filter.return_value.values_list.return_value = ["child-2", "child-3"]
+        self.job._get_devices = MagicMock(return_value=DeviceList(devices))
+        self.job._execute = MagicMock(side_effect=self._execute_shard)
+
+        summary = self.job.run(None, None, None, False, "show clock", max_workers=4, shard_size=2)
+
+        self.assertEqual(
+            summary,
+            {
+                "devices": 6,
+                "success": 4,
+                "failed": 2,
+                "skipped": 0,
+                "timings": {
+                    "phases": [["eos", "Site-B", "connect", 4, 3.0, 1.0]],
+                    "failures": [["eos", "Site-B", "timeout", 2]],
+                },
+            },
+        )
+        self.assertEqual(
+            files[RESULTS_FILENAME], "device 0 output\n\ndevice 1 output\n\nshard 2 output\n\nshard 3 output"
+        )
+        self.job._execute.assert_called_once_with(
+            devices[:2],
+            ["show clock"],
+            False,
+            30,
+            "netmiko",
+            4,
+            ANY,
+            save_config=False,
+            preflight=False,
+            max_attempts=1,
+            use_output_cache=False,
+            delta_only=False,
+        )
+        self.assertEqual(mock_job_result.enqueue_job.call_count, 2)
+        mock_job_result.enqueue_job.assert_any_call(
+            "job-model",
+            "user",
+            task_queue="q",
+            devices=["4"],
+            platform=None,
+            location=None,
+            dynamic_groups=None,
+            device_filter=None,
+            shard_size=0,
+            config_mode=False,
+            commands="show clock",
+            connection_timeout=30,
+            connection_method="netmiko",
+            max_workers=4,
+            save_config=False,
+            preflight=False,
+            max_attempts=1,
+            use_output_cache=False,
+            delta_only=False,
+        )
+
+    @patch("device_broker.jobs.JobResult")
+    def test_failed_shard_is_reported(self, mock_job_result):
+        files = capture_results_files(self)
+        mock_job_result.enqueue_job.return_value = self._make_child(2, status=JobResultStatusChoices.STATUS_FAILURE)
+        mock_job_result.objects.filter.return_value.values_list.return_value = ["child-2"]
+        self.job._get_devices = MagicMock(return_value=DeviceList([MagicMock(pk=1), MagicMock(pk=2)]))
+        self.job._execute = MagicMock(side_effect=self._execute_shard)
+
+        summary = self.job.run(None, None, None, False, "show clock", shard_size=1)
+
+        self.assertEqual(summary["devices"], 1)
+        self.assertEqual(files[RESULTS_FILENAME], "device 1 output\n\nShard 2: FAILURE - see job result child-2")
+        self.job.logger.error.assert_called_once()
+
+    @override_settings(PLUGINS_CONFIG={"device_broker": {"shard_timeout": 1}})
+    @patch("device_broker.jobs.time.sleep")
+    @patch("device_broker.jobs.JobResult")
+    def test_unfinished_shards_are_reported_after_the_timeout(self, mock_job_result, mock_sleep):
+        files = capture_results_files(self)
+        mock_job_result.enqueue_job.return_value = self._make_child(2, status=JobResultStatusChoices.STATUS_STARTED)
+        mock_job_result.objects.filter.return_value.values_list.return_value = []
+        self.job._get_devices = MagicMock(return_value=DeviceList([MagicMock(pk=1), MagicMock(pk=2)]))
+        self.job._execute = MagicMock(side_effect=self._execute_shard)
+
+        with patch("device_broker.jobs.time.monotonic", side_effect=[0, 0.5, 1.5]):
+            summary = self.job.run(None, None, None, False, "show clock", shard_size=1)
+
+        self.assertEqual(summary["devices"], 1)
+        self.assertEqual(
+            files[RESULTS_FILENAME], "device 1 output\n\nShard 2: timed out after 1s - see job result child-2"
+        )
+        mock_sleep.assert_called_once_with(0.5)
+        self.job.logger.error.assert_called_once()
+
+    def test_small_runs_are_not_sharded(self):
+        capture_results_files(self)
+        self.job._get_devices = MagicMock(return_value=DeviceList([MagicMock(pk=1)]))
+        self.job._execute = MagicMock(side_effect=self._execute_shard)
+        self.job._run_sharded = MagicMock()
+
+        self.assertEqual(self.job.run(None, None, None, False, "show clock", shard_size=5)["devices"], 1)
+        self.job._run_sharded.assert_not_called()
+        self.assertEqual(self.job.run(None, None, None, False, "show clock", shard_size=None)["devices"], 1)
+        self.job._run_sharded.assert_not_called()
+
+
+class TestDeviceBrokerJobQueries(TestCase):
+    """Test that device selection and preparation issue a constant number of queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location, cls.platform, devices = fixtures.create_devices()
+        tag = Tag.objects.create(name="Broker Core")
+        tag.content_types.add(ContentType.objects.get_for_model(Device))
+        for device in devices[::2]:
+            device.tags.add(tag)
+
+    def setUp(self):
+        self.job = DeviceBrokerJob()
+        self.job.logger = MagicMock()
+
+    def _prepare_all(self, devices):
+        limiter = RateLimiter.from_settings(self.job.logger)
+        timeouts = AdaptiveTimeouts.from_settings()
+        with CaptureQueriesContext(connection) as queries:
+            targets = [
+                self.job._prepare_device(device, "netmiko", limiter, timeouts)
+                for device in self.job._get_devices(devices, None, None).iterator(chunk_size=DEVICE_CHUNK_SIZE)
+            ]
+            for target in targets:
+                str(target.device), target.device.platform.name, target.device.location.name
+        return targets, len(queries)
+
+    @override_settings(
+        PLUGINS_CONFIG={
+            "device_broker": {
+                "rate_limits": [{"tag": "Broker Core", "max_concurrent": 1}, {"platform": "Broker IOS", "rate": 100}],
+            }
+        }
+    )
+    @patch.dict("os.environ", {"BROKER_TEST_USERNAME": "admin", "BROKER_TEST_PASSWORD": "passw0rd"})
+    def test_query_count_is_independent_of_device_count(self):
+        all_devices = list(Device.objects.filter(location=self.location))
+        self._prepare_all(all_devices[:1])  # Warm up per-process caches such as Constance settings.
+
+        targets_small, queries_small = self._prepare_all(all_devices[:2])
+        targets_large, queries_large = self._prepare_all(all_devices)
+
+        self.assertEqual(len(targets_small), 2)
+        self.assertEqual(len(targets_large), 6)
+        self.assertEqual(queries_small, queries_large)
+        self.assertEqual(targets_large[0].host, "10.99.0.1")
+        self.assertEqual(targets_large[0].credentials, {"username": "admin", "password": "passw0rd"})
+        self.assertEqual([len(target.limits) for target in targets_large[:2]], [2, 1])
+
+    def test_get_devices_reads_selected_devices_in_the_same_query(self):
+        selected = Device.objects.filter(name__in=["broker-4", "broker-2"])
+        with self.assertNumQueries(1):
+            names = list(self.job._get_devices(selected, None, None).values_list("name", flat=True))
+        self.assertEqual(names, ["broker-2", "broker-4"])
+
+    def test_get_devices_merges_sources_without_duplicates(self):
+        devices = list(Device.objects.filter(name__in=["broker-1", "broker-0"]))
+        selected = self.job._get_devices(devices, self.platform, self.location)
+        self.assertEqual([device.name for device in selected], [f"broker-{index}" for index in range(6)])
+
+
+class TestDeviceBrokerJobPreparation(TestCase):
+    """Test that a device failing to prepare fails on its own without stopping the run."""
+
+    @classmethod
+    def setUpTestData(cls):
+        _, cls.platform, devices = fixtures.create_devices(count=3)
+        broken = SecretsGroup.objects.create(name="Broker Broken Credentials")
+        secret = Secret.objects.create(
+            name="Broker missing", provider="environment-variable", parameters={"variable": "BROKER_TEST_MISSING"}
+        )
+        SecretsGroupAssociation.objects.create(
+            secrets_group=broken, secret=secret, access_type="SSH", secret_type="password"
+        )
+        devices[1].secrets_group = broken
+        devices[1].save()
+
+    def setUp(self):
+        self.job = DeviceBrokerJob()
+        self.job.logger = MagicMock()
+        self.job.job_result = MagicMock()
+
+    @override_settings(
+        PLUGINS_CONFIG={
+            "device_broker": {"simulation": {"connect_latency": 0, "command_latency": 0}, "credential_cache_ttl": 0}
+        }
+    )
+    @patch.dict("os.environ", {"BROKER_TEST_USERNAME": "admin", "BROKER_TEST_PASSWORD": "passw0rd"})
+    def test_device_whose_secret_raises_fails_alone(self):
+        files = capture_results_files(self)
+
+        summary = self.job.run(None, self.platform, None, False, "show version", connection_method="simulated")
+
+        self.assertEqual((summary["success"], summary["failed"]), (2, 1))
+        outputs = files[RESULTS_FILENAME].split("\n\n")
+        self.assertTrue(outputs[0].startswith("broker-0:"))
+        self.assertTrue(outputs[1].startswith("broker-1: Error - "))
+        self.assertTrue(outputs[2].startswith("broker-2:"))
+        self.job.logger.error.assert_any_call("Failed to prepare device %s: %s", "broker-1", ANY)
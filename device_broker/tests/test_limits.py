@@ -0,0 +1,127 @@
+"""Test module for device session rate limits and concurrency caps."""
+
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from django.contrib.contenttypes.models import ContentType
+from django.test import override_settings
+from nautobot.apps.testing import TestCase
+from nautobot.dcim.models import Device, Location, LocationType
+from nautobot.extras.models import Status, Tag
+
+from device_broker.execution import DeviceTarget, run_async, run_concurrently
+from device_broker.limits import ConnectionLimit, RateLimiter, TokenBucket, limited, limited_async
+from device_broker.tests import fixtures
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test cases for TokenBucket."""
+
+    @patch("device_broker.limits.time.monotonic")
+    def test_burst_is_free_then_callers_queue_at_the_rate(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        bucket = TokenBucket(rate=2, burst=2)
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0.0, 0.0, 0.5, 1.0])
+
+        mock_monotonic.return_value = 102.0
+        self.assertEqual(bucket.reserve(), 0.0)
+
+
+class TestLimitedSessions(unittest.TestCase):
+    """Test cases for the `limited` and `limited_async` wrappers."""
+
+    def test_concurrency_cap_holds_across_worker_threads(self):
+        limit = ConnectionLimit("tag tacacs", max_concurrent=2)
+        lock = threading.Lock()
+        active, peak = [], []
+
+        @limited
+        def session(target):
+            with lock:
+                active.append(target)
+                peak.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.remove(target)
+            return target.name
+
+        targets = [DeviceTarget(None, f"rtr{index}", limits=(limit,)) for index in range(8)]
+        results = list(run_concurrently(session, targets, max_workers=8, on_error=MagicMock()))
+
+        self.assertEqual(results, [f"rtr{index}" for index in range(8)])
+        self.assertLessEqual(max(peak), 2)
+        self.assertIn("throttle", targets[-1].timer.durations)
+
+    def test_rate_limit_spaces_session_starts_on_the_event_loop(self):
+        limit = ConnectionLimit("location EMEA", rate=50, max_concurrent=3)
+        starts = []
+
+        @limited_async
+        async def session(target):
+            starts.append(time.monotonic())
+            await asyncio.sleep(0)
+            return target.name
+
+        targets = [DeviceTarget(None, f"rtr{index}", limits=(limit,)) for index in range(5)]
+        results = list(run_async(session, targets, concurrency=5, on_error=MagicMock()))
+
+        self.assertEqual(results, [f"rtr{index}" for index in range(5)])
+        self.assertGreaterEqual(starts[-1] - starts[0], 0.07)
+
+    def test_targets_without_limits_are_not_throttled(self):
+        target = DeviceTarget(None, "rtr1")
+        self.assertEqual(limited(lambda target: target.name)(target), "rtr1")
+        self.assertNotIn("throttle", target.timer.durations)
+
+
+class TestRateLimiter(TestCase):
+    """Test cases for matching configured limits to devices."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location, cls.platform, cls.devices = fixtures.create_devices(count=3)
+        status = Status.objects.get(name="Active")
+        cls.region = Location.objects.create(
+            name="Broker Region",
+            location_type=LocationType.objects.create(name="Broker Region Type"),
+            status=status,
+        )
+        cls.location.location_type.parent = cls.region.location_type
+        cls.location.location_type.save()
+        cls.location.parent = cls.region
+        cls.location.save()
+        tag = Tag.objects.create(name="tacacs-lon")
+        tag.content_types.add(ContentType.objects.get_for_model(Device))
+        cls.devices[0].tags.add(tag)
+
+    def test_limits_match_descendant_locations_platforms_and_tags(self):
+        config = {
+            "rate_limits": [
+                {"location": "Broker Region", "rate": 10},
+                {"platform": "Broker IOS", "max_concurrent": 5},
+                {"tag": "tacacs-lon", "rate": 2, "burst": 4},
+            ]
+        }
+        with override_settings(PLUGINS_CONFIG={"device_broker": config}):
+            limiter = RateLimiter.from_settings()
+
+        devices = list(Device.objects.filter(pk__in=[device.pk for device in self.devices]).order_by("name"))
+        labels = [[limit.label for limit in limiter.limits_for(device)] for device in devices]
+        self.assertEqual(labels[0], ["location Broker Region", "platform Broker IOS", "tag tacacs-lon"])
+        self.assertEqual(labels[1], ["location Broker Region", "platform Broker IOS"])
+        self.assertIs(limiter.limits_for(devices[1])[0], limiter.limits_for(devices[2])[0])
+
+    def test_unknown_names_are_reported_and_invalid_scopes_rejected(self):
+        logger = MagicMock()
+        with override_settings(PLUGINS_CONFIG={"device_broker": {"rate_limits": [{"tag": "missing", "rate": 1}]}}):
+            limiter = RateLimiter.from_settings(logger)
+        self.assertEqual(limiter.limits_for(self.devices[0]), ())
+        logger.warning.assert_called_once()
+
+        config = {"rate_limits": [{"tag": "tacacs-lon", "platform": "Broker IOS", "rate": 1}]}
+        with override_settings(PLUGINS_CONFIG={"device_broker": config}):
+            with self.assertRaises(ValueError):
+                RateLimiter.from_settings()
@@ -0,0 +1,113 @@
+"""Test module for Device Broker timing instrumentation and Prometheus metrics."""
+
+import unittest
+
+from django.core.cache import cache
+from nautobot.apps.testing import TestCase
+
+from device_broker import metrics
+from device_broker.tests import fixtures
+
+
+class TestPhaseTimer(unittest.TestCase):
+    """Test cases for PhaseTimer."""
+
+    def test_phases_are_accumulated_and_the_failing_phase_is_kept(self):
+        timer = metrics.PhaseTimer()
+        with timer.phase("commands"):
+            pass
+        with timer.phase("commands"):
+            pass
+        self.assertIsNone(timer.current)
+
+        with self.assertRaises(RuntimeError):
+            with timer.phase("disconnect"):
+                raise RuntimeError("socket closed")
+
+        self.assertEqual(list(timer.durations), ["commands", "disconnect"])
+        self.assertEqual(timer.current, "disconnect")
+
+    def test_failure_reason(self):
+        class NetmikoAuthenticationException(Exception):
+            pass
+
+        class ScrapliTimeout(Exception):
+            pass
+
+        self.assertEqual(metrics.failure_reason(TimeoutError(), "commands"), "timeout")
+        self.assertEqual(metrics.failure_reason(ScrapliTimeout(), "connect"), "timeout")
+        self.assertEqual(metrics.failure_reason(NetmikoAuthenticationException(), "connect"), "authentication")
+        self.assertEqual(metrics.failure_reason(ConnectionRefusedError(), "connect"), "connection")
+        self.assertEqual(metrics.failure_reason(ValueError(), "config"), "command")
+        self.assertEqual(metrics.failure_reason(ValueError(), None), "other")
+
+
+class TestPhaseStats(unittest.TestCase):
+    """Test cases for PhaseStats."""
+
+    def test_stats_round_trip_and_merge(self):
+        stats = metrics.PhaseStats()
+        stats.add("ios", "Site-A", {"connect": 1.0, "commands": 2.0})
+        stats.add("ios", "Site-A", {"connect": 3.0}, reason="timeout")
+        other = metrics.PhaseStats()
+        other.update(stats.as_dict())
+        other.add("eos", "Site-B", {"connect": 0.5})
+
+        self.assertEqual(other.phase_means(), {"connect": 1.5, "commands": 2.0})
+        self.assertEqual(other.failure_counts(), {"timeout": 1})
+        self.assertEqual(
+            other.to_csv().splitlines(),
+            [
+                "platform,location,phase,devices,mean_seconds,max_seconds,total_seconds",
+                "eos,Site-B,connect,1,0.500,0.500,0.500",
+                "ios,Site-A,connect,2,2.000,3.000,4.000",
+                "ios,Site-A,commands,1,2.000,2.000,2.000",
+            ],
+        )
+
+
+class TestPrometheusMetrics(TestCase):
+    """Test cases for publishing counters and exposing them as Prometheus metrics."""
+
+    @classmethod
+    def setUpTestData(cls):
+        _, cls.platform, _ = fixtures.create_devices(count=1)
+
+    def setUp(self):
+        cache.delete_many(cache.keys(f"{metrics.METRICS_KEY_PREFIX}:*"))
+        self.addCleanup(lambda: cache.delete_many(cache.keys(f"{metrics.METRICS_KEY_PREFIX}:*")))
+
+    def _samples(self, generator):
+        """Return the samples yielded by `generator`, keyed by name and labels."""
+        return {
+            (sample.name, frozenset(sample.labels.items())): sample.value
+            for family in generator()
+            for sample in family.samples
+        }
+
+    def test_published_counters_are_exposed(self):
+        batch = metrics.MetricsBatch()
+        batch.add(self.platform.pk, {"connect": 0.2, "commands": 1.5}, commands=3)
+        batch.add(self.platform.pk, {"connect": 7.0}, commands=0, reason="timeout")
+        batch.publish()
+        self.assertEqual(batch.counters, {})
+        batch.add(self.platform.pk, {"connect": 0.05, "commands": 0.5}, commands=2)
+        batch.publish()
+
+        def key(name, **labels):
+            return (name, frozenset({"platform": self.platform.name, **labels}.items()))
+
+        latency = self._samples(metrics.metric_connect_latency)
+        self.assertEqual(latency[key("device_broker_connect_seconds_count")], 3)
+        self.assertAlmostEqual(latency[key("device_broker_connect_seconds_sum")], 7.25)
+        self.assertEqual(
+            [latency[key("device_broker_connect_seconds_bucket", le=le)] for le in ("0.1", "0.25", "5.0", "10.0")],
+            [1, 2, 2, 3],
+        )
+
+        commands = self._samples(metrics.metric_commands)
+        self.assertEqual(commands[key("device_broker_commands_total")], 5)
+        self.assertEqual(commands[key("device_broker_phase_seconds_total", phase="commands")], 2.0)
+
+        failures = self._samples(metrics.metric_failures)
+        self.assertEqual(failures, {key("device_broker_device_failures_total", reason="timeout"): 1})
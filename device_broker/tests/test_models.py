@@ -0,0 +1,84 @@
+"""Test DeviceCommandResult and CommandOutput."""
+
+from nautobot.apps.testing import TestCase
+from nautobot.extras.models import JobResult
+
+from device_broker import models
+from device_broker.choices import CommandOutputCompressionChoices
+from device_broker.tests import fixtures
+
+
+class TestDeviceCommandResult(TestCase):
+    """Test DeviceCommandResult model."""
+
+    @classmethod
+    def setUpTestData(cls):
+        _, _, devices = fixtures.create_devices(count=1)
+        cls.device = devices[0]
+        cls.job_result = JobResult.objects.create(name="Device Broker Job")
+
+    def _create(self, output, job_result=None):
+        result = models.DeviceCommandResult.objects.create(
+            job_result=job_result or self.job_result,
+            device=self.device,
+            command="show running-config",
+            output=output,
+            status="success",
+        )
+        return models.DeviceCommandResult.objects.get(pk=result.pk)
+
+    def test_large_output_is_compressed_and_read_back_transparently(self):
+        output = "".join(f"interface Ethernet{index}\n description uplink\n no shutdown\n!\n" for index in range(500))
+
+        result = self._create(output)
+
+        self.assertEqual(result.command_output.compression, CommandOutputCompressionChoices.COMPRESSION_ZLIB)
+        self.assertLess(len(result.command_output.data), len(output) // 10)
+        self.assertEqual(result.output, output)
+
+    def test_small_output_is_stored_uncompressed(self):
+        result = self._create("12:00:00.000 UTC Sat Oct 17 2026")
+
+        self.assertEqual(result.command_output.compression, CommandOutputCompressionChoices.COMPRESSION_NONE)
+        self.assertEqual(result.output, "12:00:00.000 UTC Sat Oct 17 2026")
+
+    def test_string_representation(self):
+        self.assertEqual(str(self._create("")), "broker-0 - show running-config")
+
+    def test_identical_outputs_are_stored_once(self):
+        first = self._create("Cisco IOS Software, Version 17.9.4")
+        second = self._create("Cisco IOS Software, Version 17.9.4")
+        third = self._create("Cisco IOS Software, Version 17.12.1")
+
+        self.assertEqual(first.command_output_id, second.command_output_id)
+        self.assertNotEqual(first.command_output_id, third.command_output_id)
+        self.assertEqual(models.CommandOutput.objects.count(), 2)
+        self.assertEqual(second.output, "Cisco IOS Software, Version 17.9.4")
+
+    def test_outputs_are_deleted_once_unreferenced(self):
+        job_results = [JobResult.objects.create(name="Device Broker Job") for _ in range(2)]
+        self._create("shared", job_result=job_results[0])
+        self._create("first run only", job_result=job_results[0])
+        self._create("shared", job_result=job_results[1])
+
+        job_results[0].delete()
+
+        self.assertEqual(list(models.CommandOutput.objects.values_list("size", flat=True)), [len("shared")])
+        job_results[1].delete()
+        self.assertFalse(models.CommandOutput.objects.exists())
+
+
+class TestCommandOutputQuerySet(TestCase):
+    """Test CommandOutput.objects.store()."""
+
+    def test_store_returns_one_pk_per_text_and_only_creates_new_ones(self):
+        existing = models.CommandOutput.objects.store(["show version output"])[0]
+
+        with self.assertNumQueries(3):
+            pks = models.CommandOutput.objects.store(["new", "show version output", "new"])
+
+        self.assertEqual(pks[1], existing)
+        self.assertEqual(pks[0], pks[2])
+        self.assertEqual(models.CommandOutput.objects.get(pk=pks[0]).output, "new")
+        with self.assertNumQueries(1):
+            self.assertEqual(models.CommandOutput.objects.store(["new", "show version output"]), [pks[0], existing])
@@ -0,0 +1,79 @@
+"""Test module for the TCP reachability pre-flight sweep."""
+
+import socket
+import unittest
+from unittest.mock import MagicMock, patch
+
+from django.test import override_settings
+from nautobot.apps.testing import TestCase
+from nautobot.dcim.models import Device
+
+from device_broker.jobs import DeviceBrokerJob
+from device_broker.preflight import sweep
+from device_broker.tests import fixtures
+from device_broker.tests.test_jobs import capture_results_files
+
+
+class TestSweep(unittest.TestCase):
+    """Test cases for probing addresses concurrently."""
+
+    def test_listening_ports_are_reachable_and_closed_ports_are_not(self):
+        listener = socket.create_server(("127.0.0.1", 0))
+        self.addCleanup(listener.close)
+        open_port = listener.getsockname()[1]
+        closed = socket.create_server(("127.0.0.1", 0))
+        closed_port = closed.getsockname()[1]
+        closed.close()
+
+        addresses = {"up": ("127.0.0.1", open_port), "down": ("127.0.0.1", closed_port)}
+        self.assertEqual(sweep(addresses, timeout=1, concurrency=1), {"down"})
+        self.assertEqual(sweep({}, timeout=1, concurrency=1), set())
+
+
+class TestJobPreflight(TestCase):
+    """Test cases for skipping the devices that fail the pre-flight check."""
+
+    @classmethod
+    def setUpTestData(cls):
+        _, cls.platform, _ = fixtures.create_devices(count=3)
+
+    def setUp(self):
+        self.job = DeviceBrokerJob()
+        self.job.logger = MagicMock()
+
+    @override_settings(PLUGINS_CONFIG={"device_broker": {"preflight": {"ports": {"cisco_ios": 2222}}}})
+    @patch("device_broker.jobs.sweep")
+    def test_unreachable_devices_are_skipped_before_resolving_credentials(self, mock_sweep):
+        devices = list(self.job._get_devices(None, self.platform, None))
+        mock_sweep.side_effect = lambda addresses, timeout, concurrency: {devices[1].pk}
+
+        unreachable = self.job._preflight(devices)
+        addresses = mock_sweep.call_args.args[0]
+        self.assertEqual(addresses[devices[0].pk], ("10.99.0.1", 2222))
+        self.assertEqual(unreachable, {devices[1].pk: 2222})
+
+        self.job._preflight(devices, "http_api")
+        self.assertEqual(mock_sweep.call_args.args[0][devices[0].pk], ("10.99.0.1", 2222))
+        with override_settings(PLUGINS_CONFIG={"device_broker": {}}):
+            self.job._preflight(devices, "http_api")
+        self.assertEqual(mock_sweep.call_args.args[0][devices[0].pk], ("10.99.0.1", 443))
+
+        with patch("device_broker.jobs.get_group_credentials") as mock_credentials:
+            target = self.job._prepare_device(devices[1], "netmiko", unreachable=unreachable)
+        self.assertEqual(target.skip_reason, "Unreachable: no answer on TCP port 2222, skipped.")
+        mock_credentials.assert_not_called()
+        self.assertIsInstance(target.device, Device)
+
+    @override_settings(PLUGINS_CONFIG={"device_broker": {"simulation": {"connect_latency": 0, "command_latency": 0}}})
+    @patch("device_broker.jobs.sweep")
+    def test_simulated_runs_probe_no_device(self, mock_sweep):
+        capture_results_files(self)
+        self.job.job_result = MagicMock()
+
+        with patch.dict("os.environ", {"BROKER_TEST_USERNAME": "admin", "BROKER_TEST_PASSWORD": "passw0rd"}):
+            summary = self.job.run(
+                None, self.platform, None, False, "show version", connection_method="simulated", preflight=True
+            )
+
+        self.assertEqual(summary["success"], 3)
+        mock_sweep.assert_not_called()
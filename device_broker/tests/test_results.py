@@ -0,0 +1,85 @@
+"""Test module for the Device Broker result sink."""
+
+import io
+
+from nautobot.apps.testing import TestCase
+from nautobot.extras.models import JobResult
+
+from device_broker.execution import DeviceResult
+from device_broker.models import CommandOutput, DeviceCommandResult
+from device_broker.results import ResultSink
+from device_broker.tests import fixtures
+
+
+class TestResultSink(TestCase):
+    """Test cases for spooling device results into a JobResult file and result rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        _, _, cls.devices = fixtures.create_devices(count=2)
+
+    def test_results_are_spooled_and_attached_to_the_job_result(self):
+        job_result = JobResult.objects.create(name="Device Broker Job")
+
+        with ResultSink(job_result) as sink:
+            sink.add(DeviceResult("rtr1", DeviceResult.SUCCESS, "rtr1:\nCommand: show clock\nOutput:\n12:00"))
+            sink.add(DeviceResult("rtr2", DeviceResult.SKIPPED, "rtr2: No platform defined, skipped."))
+            sink.merge({"devices": 1, "failed": 1}, io.BytesIO(b"rtr3: Error - timed out"))
+            file_proxy = sink.save("results.txt")
+            summary = sink.summary()
+
+        self.assertEqual(
+            summary,
+            {"devices": 3, "success": 1, "failed": 1, "skipped": 1, "timings": {"phases": [], "failures": []}},
+        )
+        self.assertEqual(list(job_result.files.all()), [file_proxy])
+        with file_proxy.file.open("rb") as fileobj:
+            self.assertEqual(
+                fileobj.read().decode("utf-8").split("\n\n"),
+                [
+                    "rtr1:\nCommand: show clock\nOutput:\n12:00",
+                    "rtr2: No platform defined, skipped.",
+                    "rtr3: Error - timed out",
+                ],
+            )
+
+    def test_command_rows_are_written_in_batches(self):
+        job_result = JobResult.objects.create(name="Device Broker Job")
+        outputs = [("show clock", "12:00"), ("show ntp status", "synchronized")]
+
+        with ResultSink(job_result, batch_size=4) as sink:
+            # Store the two new outputs (select, insert, select), then insert the result rows.
+            with self.assertNumQueries(4):
+                for device in self.devices:
+                    sink.add(
+                        DeviceResult(
+                            device.name, DeviceResult.SUCCESS, "", device=device, outputs=outputs, duration=2.5
+                        )
+                    )
+            self.assertEqual(DeviceCommandResult.objects.count(), 4)
+            with self.assertNumQueries(0):
+                sink.flush()
+
+            # Both outputs are now stored, so later batches only look them up.
+            with self.assertNumQueries(2):
+                for device in self.devices:
+                    sink.add(
+                        DeviceResult(
+                            device.name, DeviceResult.SUCCESS, "", device=device, outputs=outputs, duration=2.5
+                        )
+                    )
+            self.assertEqual(DeviceCommandResult.objects.count(), 8)
+            self.assertEqual(CommandOutput.objects.count(), 2)
+
+        rows = DeviceCommandResult.objects.filter(job_result=job_result, device=self.devices[1])
+        self.assertEqual(
+            sorted((row.command, row.output, row.status) for row in rows),
+            [
+                ("show clock", "12:00", "success"),
+                ("show clock", "12:00", "success"),
+                ("show ntp status", "synchronized", "success"),
+                ("show ntp status", "synchronized", "success"),
+            ],
+        )
+        # Every command row carries the duration of the session that ran it.
+        self.assertEqual(set(rows.values_list("session_duration", flat=True)), {2.5})
@@ -0,0 +1,37 @@
+"""Test module for the device session retry policy."""
+
+import unittest
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from device_broker.retry import RetryPolicy
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Test cases for RetryPolicy."""
+
+    def test_only_transient_connect_failures_are_retried(self):
+        policy = RetryPolicy(max_attempts=3)
+        self.assertIsNotNone(policy.delay("timeout", "connect", 1))
+        self.assertIsNotNone(policy.delay("connection", "connect", 2))
+        self.assertIsNone(policy.delay("connection", "connect", 3))
+        self.assertIsNone(policy.delay("timeout", "commands", 1))
+        self.assertIsNone(policy.delay("authentication", "connect", 1))
+        self.assertIsNone(policy.delay(None, None, 1))
+        self.assertIsNone(RetryPolicy().delay("timeout", "connect", 1))
+
+    @patch("device_broker.retry.random.uniform", side_effect=lambda low, high: high)
+    def test_backoff_doubles_up_to_the_cap(self, _):
+        policy = RetryPolicy(max_attempts=10, backoff=2, max_backoff=10)
+        self.assertEqual([policy.backoff(attempt) for attempt in range(1, 5)], [2, 4, 8, 10])
+
+
+class TestRetrySettings(SimpleTestCase):
+    """Test cases for configuring the retry policy."""
+
+    @override_settings(PLUGINS_CONFIG={"device_broker": {"retry": {"reasons": ["authentication"]}}})
+    def test_retryable_reasons_come_from_settings(self):
+        policy = RetryPolicy.from_settings(max_attempts=2)
+        self.assertIsNotNone(policy.delay("authentication", "connect", 1))
+        self.assertIsNone(policy.delay("timeout", "connect", 1))
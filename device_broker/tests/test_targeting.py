@@ -0,0 +1,112 @@
+"""Test module for targeting devices through DynamicGroups and DeviceFilterSet expressions."""
+
+from unittest.mock import MagicMock
+
+from django.contrib.contenttypes.models import ContentType
+from nautobot.apps.testing import TestCase
+from nautobot.dcim.models import Device, Location, LocationType
+from nautobot.extras.choices import DynamicGroupTypeChoices
+from nautobot.extras.models import DynamicGroup, Role, Status, Tag
+
+from device_broker.jobs import DeviceBrokerJob
+from device_broker.targeting import device_filter_query, dynamic_group_query
+from device_broker.tests import fixtures
+
+
+class TestTargeting(TestCase):
+    """Test cases for compiling dynamic groups and filter expressions into one device query."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location, _, cls.devices = fixtures.create_devices()
+        room_type = LocationType.objects.create(name="Broker Room", parent=cls.location.location_type)
+        room_type.content_types.add(ContentType.objects.get_for_model(Device))
+        room = Location.objects.create(
+            name="Broker Room 1", location_type=room_type, parent=cls.location, status=Status.objects.get(name="Active")
+        )
+        edge = Role.objects.create(name="Broker Edge")
+        edge.content_types.add(ContentType.objects.get_for_model(Device))
+        for index, device in enumerate(cls.devices):
+            device.location = room if index >= 4 else cls.location
+            device.role = edge if index in (0, 5) else device.role
+            device.save()
+
+        content_type = ContentType.objects.get_for_model(Device)
+        cls.edge_group = DynamicGroup.objects.create(
+            name="Broker Edge Devices", content_type=content_type, filter={"role": ["Broker Edge"]}
+        )
+        cls.static_group = DynamicGroup.objects.create(
+            name="Broker Pinned", content_type=content_type, group_type=DynamicGroupTypeChoices.TYPE_STATIC
+        )
+        cls.static_group.add_members([cls.devices[2]])
+        cls.all_group = DynamicGroup.objects.create(name="Broker Everything", content_type=content_type, filter={})
+        tags = {}
+        for name in ("Broker Core", "Broker Edge"):
+            tags[name] = Tag.objects.create(name=name)
+            tags[name].content_types.add(content_type)
+        cls.devices[1].tags.add(tags["Broker Core"], tags["Broker Edge"])
+        cls.devices[2].tags.add(tags["Broker Edge"])
+        cls.tag_groups = [
+            DynamicGroup.objects.create(name=f"{name} Tagged", content_type=content_type, filter={"tags": [name]})
+            for name in tags
+        ]
+
+    def _names(self, query):
+        return sorted(Device.objects.filter(query, name__startswith="broker-").values_list("name", flat=True))
+
+    def test_filter_expressions_combine_filters_and_include_descendant_locations(self):
+        self.assertEqual(len(self._names(device_filter_query({"location": ["Broker Site 1"]}))), 6)
+        self.assertEqual(self._names(device_filter_query({"location": "Broker Room 1"})), ["broker-4", "broker-5"])
+        self.assertEqual(
+            self._names(device_filter_query({"role": "Broker Edge", "location": ["Broker Room 1"]})), ["broker-5"]
+        )
+
+    def test_invalid_filter_expressions_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, "Unknown device filters: colour"):
+            device_filter_query({"colour": "blue"})
+        with self.assertRaisesRegex(ValueError, "Invalid device filter: role"):
+            device_filter_query({"role": ["No Such Role"]})
+        with self.assertRaisesRegex(ValueError, "mapping"):
+            device_filter_query(["role"])
+
+    def test_dynamic_groups_are_evaluated_from_their_definition(self):
+        self.assertEqual(self._names(dynamic_group_query(self.edge_group)), ["broker-0", "broker-5"])
+        self.assertEqual(self._names(dynamic_group_query(self.static_group)), ["broker-2"])
+        self.assertEqual(len(self._names(dynamic_group_query(self.all_group))), 6)
+
+        location_group = DynamicGroup.objects.create(
+            name="Broker Locations", content_type=ContentType.objects.get_for_model(Location)
+        )
+        with self.assertRaisesRegex(ValueError, "does not contain devices"):
+            dynamic_group_query(location_group)
+
+    def test_groups_matching_a_device_through_several_tags_select_it_once(self):
+        job = DeviceBrokerJob()
+        selected = job._get_devices(None, None, None, dynamic_groups=self.tag_groups)
+        self.assertEqual(list(selected.values_list("name", flat=True)), ["broker-1", "broker-2"])
+
+    def test_device_matched_by_every_source_is_selected_once(self):
+        job = DeviceBrokerJob()
+        selected = job._get_devices(
+            Device.objects.filter(name="broker-1"),
+            self.devices[1].platform,
+            self.location,
+            dynamic_groups=[*self.tag_groups, self.all_group],
+            device_filter={"tags": ["Broker Core", "Broker Edge"], "name": ["broker-1"]},
+        )
+        names = [device.name for device in selected.iterator(chunk_size=2)]
+        self.assertEqual(names, [f"broker-{index}" for index in range(6)])
+
+    def test_job_selects_the_union_of_every_source_in_one_query(self):
+        job = DeviceBrokerJob()
+        job.logger = MagicMock()
+        selected = job._get_devices(
+            [self.devices[3]],
+            None,
+            None,
+            dynamic_groups=[self.edge_group, self.static_group],
+            device_filter={"location": ["Broker Room 1"]},
+        )
+        with self.assertNumQueries(1):
+            names = list(selected.values_list("name", flat=True))
+        self.assertEqual(names, ["broker-0", "broker-2", "broker-3", "broker-4", "broker-5"])
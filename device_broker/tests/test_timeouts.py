@@ -0,0 +1,68 @@
+"""Test module for per-device timeouts derived from latency history."""
+
+import unittest
+
+from django.test import override_settings
+from nautobot.apps.testing import TestCase
+from nautobot.dcim.models import Device
+
+from device_broker.models import DeviceLatency
+from device_broker.tests import fixtures
+from device_broker.timeouts import AdaptiveTimeouts, LatencyRecorder
+
+
+class TestAdaptiveTimeoutDerivation(unittest.TestCase):
+    """Test cases for deriving a timeout from samples."""
+
+    def test_p99_times_factor_is_clamped_and_needs_enough_samples(self):
+        timeouts = AdaptiveTimeouts(factor=3, min_samples=5)
+        self.assertIsNone(timeouts.derive([0.2] * 4, floor=2, ceiling=120))
+        self.assertEqual(timeouts.derive([0.2] * 4 + [4.0], floor=2, ceiling=120), 12.0)
+        self.assertEqual(timeouts.derive([0.2] * 5, floor=2, ceiling=120), 2.0)
+        self.assertEqual(timeouts.derive([60.0] * 5, floor=2, ceiling=120), 120.0)
+
+
+class TestLatencyHistory(TestCase):
+    """Test cases for recording latencies and deriving timeouts from the stored history."""
+
+    @classmethod
+    def setUpTestData(cls):
+        _, _, cls.devices = fixtures.create_devices(count=2)
+
+    def _fetch(self, device):
+        return Device.objects.select_related("device_broker_latency").get(pk=device.pk)
+
+    def test_connected_sessions_are_recorded_and_drive_timeouts(self):
+        for _ in range(5):
+            recorder = LatencyRecorder()
+            recorder.add(self._fetch(self.devices[0]), {"connect": 1.5, "commands": 4.0, "disconnect": 0.1}, 2)
+            # The connect phase of a session that failed to connect is not a latency sample.
+            recorder.add(self._fetch(self.devices[1]), {"connect": 30.0}, 0)
+            recorder.flush()
+
+        latency = DeviceLatency.objects.get(device=self.devices[0])
+        self.assertEqual(latency.connect_samples, [1.5] * 5)
+        self.assertEqual(latency.command_samples, [2.0] * 5)
+        self.assertFalse(DeviceLatency.objects.filter(device=self.devices[1]).exists())
+
+        with override_settings(PLUGINS_CONFIG={"device_broker": {"adaptive_timeouts": {"command_floor": 1}}}):
+            timeouts = AdaptiveTimeouts.from_settings()
+        self.assertEqual(timeouts.timeouts_for(self._fetch(self.devices[0])), (4.5, 6.0))
+        self.assertEqual(timeouts.timeouts_for(self._fetch(self.devices[1])), (None, None))
+        self.assertEqual(AdaptiveTimeouts(enabled=False).timeouts_for(self._fetch(self.devices[0])), (None, None))
+
+    def test_sessions_without_a_connect_phase_record_only_command_latency(self):
+        recorder = LatencyRecorder()
+        recorder.add(self._fetch(self.devices[0]), {"commands": 3.0, "disconnect": 0.1}, 2)
+        recorder.flush()
+
+        latency = DeviceLatency.objects.get(device=self.devices[0])
+        self.assertEqual(latency.connect_samples, [])
+        self.assertEqual(latency.command_samples, [1.5])
+
+    def test_history_keeps_the_most_recent_samples(self):
+        latency = DeviceLatency(device=self.devices[0], connect_samples=[9.0] * 50)
+        latency.record(connect=0.5)
+        self.assertEqual(len(latency.connect_samples), 50)
+        self.assertEqual(latency.connect_samples[-1], 0.5)
+        self.assertEqual(latency.command_samples, [])
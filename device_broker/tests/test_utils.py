@@ -1,9 +1,20 @@
 """Test module for device broker utilities and driver functionality."""
 
+import asyncio
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from device_broker.utils import get_platform_driver
+from django.test import SimpleTestCase, override_settings
+
+from device_broker.utils import (
+    DRIVER_WRAPPERS,
+    DriverRegistry,
+    NapalmDriverWrapper,
+    NetmikoDriverWrapper,
+    SimulatedConnectionError,
+    _get_napalm_driver_class,
+    get_platform_driver,
+)
 
 
 class TestDeviceBrokerNetmikoDriver(unittest.TestCase):
@@ -44,6 +55,19 @@ class TestDeviceBrokerNetmikoDriver(unittest.TestCase):
         connection.disconnect()
         mock_conn.disconnect.assert_called_once()
 
+    def test_send_config_pushes_one_config_set_and_saves(self):
+        wrapper = NetmikoDriverWrapper("cisco_ios", "10.1.1.1", {})
+        wrapper.connection = MagicMock()
+        wrapper.connection.send_config_set.return_value = "CONFIG OUTPUT\n"
+        wrapper.connection.save_config.return_value = "SAVE OUTPUT"
+        lines = ["interface Gi0/1", "description uplink"]
+
+        output = wrapper.send_config(lines, save=True)
+
+        wrapper.connection.send_config_set.assert_called_once_with(lines, exit_config_mode=True)
+        wrapper.connection.send_command.assert_not_called()
+        self.assertEqual(output, "CONFIG OUTPUT\nSAVE OUTPUT")
+
     def test_platform_missing_or_blank_network_driver(self):
         # Platform with 'network_driver' as None
         class PlatformNone:  # pylint: disable=too-few-public-methods
@@ -69,3 +93,181 @@ class TestDeviceBrokerNetmikoDriver(unittest.TestCase):
 
         driver3 = get_platform_driver(PlatformBlank())
         self.assertIsNone(driver3)
+
+
+class TestDeviceBrokerScrapliDriver(unittest.TestCase):
+    """Test cases for the asyncio Scrapli driver backend."""
+
+    @patch("scrapli.AsyncScrapli")
+    def test_scrapli_driver_uses_platform_mapping_and_coroutines(self, mock_async_scrapli):
+        mock_conn = MagicMock()
+        mock_conn.open = AsyncMock()
+        mock_conn.close = AsyncMock()
+        mock_conn.acquire_priv = AsyncMock()
+        mock_conn.send_command = AsyncMock(return_value=MagicMock(result="SHOW VER OUTPUT"))
+        mock_async_scrapli.return_value = mock_conn
+
+        class MockPlatform:  # pylint: disable=too-few-public-methods
+            """Mock platform class exposing Nautobot's network driver mappings."""
+
+            network_driver = "cisco_ios"
+            network_driver_mappings = {"scrapli": "cisco_iosxe"}
+
+        driver = get_platform_driver(MockPlatform(), method="scrapli")
+
+        async def session():
+            connection = await driver.connect("10.1.1.1", {"username": "admin", "password": "passw0rd"}, timeout=5)
+            await connection.enter_config_mode()
+            output = await connection.send_command("show version")
+            await connection.disconnect()
+            return output
+
+        self.assertEqual(asyncio.run(session()), "SHOW VER OUTPUT")
+        mock_async_scrapli.assert_called_once_with(
+            platform="cisco_iosxe",
+            host="10.1.1.1",
+            auth_username="admin",
+            auth_password="passw0rd",
+            auth_strict_key=False,
+            transport="asyncssh",
+            timeout_socket=5,
+            timeout_transport=5,
+        )
+        mock_conn.acquire_priv.assert_awaited_once_with("configuration")
+        mock_conn.close.assert_awaited_once()
+
+
+SIMULATION_CONFIG = {
+    "device_broker": {
+        "simulation": {
+            "connect_latency": 0,
+            "command_latency": 0,
+            "outputs": {"show version": "$host runs $platform"},
+            "platforms": {"cisco_nxos": {"failure_rate": 1.0}, "arista_eos": {"connect_latency": 60}},
+        }
+    }
+}
+
+
+@override_settings(PLUGINS_CONFIG=SIMULATION_CONFIG)
+class TestSimulatedDriver(SimpleTestCase):
+    """Test cases for the simulated driver backend."""
+
+    @staticmethod
+    def platform(network_driver):
+        """Return a mock platform with the given network driver."""
+        return MagicMock(network_driver=network_driver)
+
+    def test_simulated_driver_returns_templated_outputs(self):
+        driver = get_platform_driver(self.platform("cisco_ios"), method="simulated")
+
+        async def session():
+            connection = await driver.connect("10.1.1.1", {}, timeout=5)
+            outputs = await connection.send_commands(["show version", "show clock"])
+            config = await connection.send_config(["hostname r1"], save=True)
+            await connection.disconnect()
+            return outputs, config
+
+        outputs, config = asyncio.run(session())
+        self.assertEqual(outputs[0], "10.1.1.1 runs cisco_ios")
+        self.assertEqual(outputs[1], "10.1.1.1# show clock\nSimulated output from cisco_ios.")
+        self.assertEqual(config, "10.1.1.1# hostname r1\nSimulated output from cisco_ios.")
+
+    def test_simulated_driver_applies_platform_failures(self):
+        failing = get_platform_driver(self.platform("cisco_nxos"), method="simulated")
+        with self.assertRaises(SimulatedConnectionError):
+            asyncio.run(failing.connect("10.1.1.2", {}))
+
+        slow = get_platform_driver(self.platform("arista_eos"), method="simulated")
+        with patch("device_broker.utils.asyncio.sleep", new=AsyncMock()) as mock_sleep:
+            with self.assertRaises(TimeoutError):
+                asyncio.run(slow.connect("10.1.1.3", {}, timeout=5))
+        mock_sleep.assert_awaited_once_with(5)
+
+
+class TestDriverFactoryRegistry(unittest.TestCase):
+    """Test cases for memoized driver factories."""
+
+    def test_factories_are_shared_per_network_driver_and_method(self):
+        class PlatformA:  # pylint: disable=too-few-public-methods
+            """Mock platform class for testing."""
+
+            network_driver = "arista_eos"
+
+        class PlatformB:  # pylint: disable=too-few-public-methods
+            """Second mock platform class with the same network driver."""
+
+            network_driver = "arista_eos"
+
+        self.assertIs(get_platform_driver(PlatformA()), get_platform_driver(PlatformB()))
+        self.assertIsNot(get_platform_driver(PlatformA()), get_platform_driver(PlatformA(), method="napalm"))
+        self.assertIs(get_platform_driver(PlatformA(), method="napalm").wrapper_cls, NapalmDriverWrapper)
+
+    @patch("napalm.get_network_driver")
+    def test_napalm_driver_class_is_resolved_once(self, mock_get_napalm_driver):
+        _get_napalm_driver_class.cache_clear()
+        self.addCleanup(_get_napalm_driver_class.cache_clear)
+
+        class MockPlatform:  # pylint: disable=too-few-public-methods
+            """Mock platform class for testing."""
+
+            network_driver = "eos"
+
+        driver = get_platform_driver(MockPlatform(), method="napalm")
+        for host in ("10.1.1.1", "10.1.1.2", "10.1.1.3"):
+            driver.connect(host, {"username": "admin", "password": "passw0rd"})
+
+        mock_get_napalm_driver.assert_called_once_with("eos")
+        self.assertEqual(mock_get_napalm_driver.return_value.call_count, 3)
+
+
+class TestDriverRegistry(unittest.TestCase):
+    """Test cases for connection methods registered through entry points."""
+
+    def setUp(self):
+        self.entry_point = MagicMock()
+        self.entry_point.name = "eapi"
+        self.entry_point.load.return_value = NapalmDriverWrapper
+        netmiko_override = MagicMock()
+        netmiko_override.name = "netmiko"
+        patcher = patch(
+            "device_broker.utils.importlib.metadata.entry_points",
+            return_value=MagicMock(**{"select.return_value": [self.entry_point, netmiko_override]}),
+        )
+        self.mock_entry_points = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.registry = DriverRegistry(DRIVER_WRAPPERS)
+
+    def test_entry_points_are_listed_without_being_imported(self):
+        self.assertEqual(self.registry.methods(), ["netmiko", "napalm", "scrapli", "simulated", "http_api", "eapi"])
+        self.assertEqual(self.registry.choices()[0], ("netmiko", "Netmiko"))
+        self.assertEqual(self.registry.choices()[-1], ("eapi", "eapi"))
+        self.entry_point.load.assert_not_called()
+        self.mock_entry_points.return_value.select.assert_called_once_with(group="device_broker.drivers")
+
+    def test_entry_points_are_imported_once_on_first_use(self):
+        self.assertIs(self.registry.get("eapi"), NapalmDriverWrapper)
+        self.assertIs(self.registry.get("eapi"), NapalmDriverWrapper)
+        self.entry_point.load.assert_called_once_with()
+        self.assertIs(self.registry.get("netmiko"), NetmikoDriverWrapper)
+        self.assertIsNone(self.registry.get("unknown"))
+
+    def test_asynchronous_wrappers_are_detected(self):
+        self.assertTrue(self.registry.is_async("scrapli"))
+        self.assertTrue(self.registry.is_async("simulated"))
+        self.assertFalse(self.registry.is_async("eapi"))
+        self.assertFalse(self.registry.is_async("unknown"))
+
+
+class TestDeviceBrokerNapalmDriver(unittest.TestCase):
+    """Test cases for the NAPALM driver wrapper."""
+
+    def test_send_commands_uses_one_cli_call(self):
+        wrapper = NapalmDriverWrapper("eos", "10.1.1.1", {})
+        wrapper.connection = MagicMock()
+        wrapper.connection.cli.return_value = {"show version": "VERSION", "show clock": "CLOCK"}
+
+        outputs = wrapper.send_commands(["show version", "show clock", "show version"])
+
+        wrapper.connection.cli.assert_called_once_with(["show version", "show clock"])
+        self.assertEqual(outputs, ["VERSION", "CLOCK", "VERSION"])
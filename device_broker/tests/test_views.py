@@ -0,0 +1,49 @@
+"""Unit tests for views."""
+
+from nautobot.apps.testing import ViewTestCases, post_data
+
+from device_broker import models
+from device_broker.tests import fixtures
+
+
+class DeviceCommandResultViewTest(
+    ViewTestCases.GetObjectViewTestCase,
+    ViewTestCases.ListObjectsViewTestCase,
+    ViewTestCases.DeleteObjectViewTestCase,
+    ViewTestCases.BulkDeleteObjectsViewTestCase,
+):
+    # pylint: disable=too-many-ancestors
+    """Test the DeviceCommandResult views."""
+
+    model = models.DeviceCommandResult
+
+    @classmethod
+    def setUpTestData(cls):
+        fixtures.create_device_command_results()
+
+    def test_delete_removes_outputs_no_longer_referenced(self):
+        self.add_permissions("device_broker.delete_devicecommandresult")
+        result = models.DeviceCommandResult.objects.get(command="show ntp status")
+        shared = models.DeviceCommandResult.objects.get(command="show version", status="success")
+        sharing = models.DeviceCommandResult.objects.create(
+            job_result=result.job_result, device=result.device, command="show version", output="Version 15.2"
+        )
+        self.assertEqual(sharing.command_output_id, shared.command_output_id)
+
+        self.assertHttpStatus(self.client.post(self._get_url("delete", result), post_data({"confirm": True})), 302)
+        self.assertHttpStatus(self.client.post(self._get_url("delete", shared), post_data({"confirm": True})), 302)
+
+        self.assertFalse(models.CommandOutput.objects.filter(pk=result.command_output_id).exists())
+        self.assertTrue(models.CommandOutput.objects.filter(pk=shared.command_output_id).exists())
+
+    def test_bulk_delete_removes_outputs_no_longer_referenced(self):
+        self.add_permissions("device_broker.delete_devicecommandresult")
+        results = list(models.DeviceCommandResult.objects.filter(command="show clock"))
+        data = {"pk": [result.pk for result in results], "confirm": True, "_confirm": True}
+
+        self.assertHttpStatus(self.client.post(self._get_url("bulk_delete"), data), 302)
+
+        self.assertFalse(
+            models.CommandOutput.objects.filter(pk__in=[result.command_output_id for result in results]).exists()
+        )
+        self.assertEqual(models.CommandOutput.objects.count(), models.DeviceCommandResult.objects.count())
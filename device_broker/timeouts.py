@@ -0,0 +1,120 @@
+"""Device Broker per-device timeouts derived from the latencies observed on earlier runs.
+
+Every session that connects records its connect latency and its mean latency per command in the
+device's DeviceLatency. Once a device has `min_samples` samples, its timeout is the p99 sample times
+`factor`, clamped between a floor and a ceiling; devices with less history use the job's connection
+timeout and the driver's default command timeout. A derived connection timeout never exceeds the
+job's Connection Timeout, which stays the upper bound the operator chose. Settings come from
+`PLUGINS_CONFIG["device_broker"]["adaptive_timeouts"]`, overriding `ADAPTIVE_TIMEOUT_DEFAULTS`.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+
+from device_broker.models import DeviceLatency
+
+# Phases that only start once a device has connected.
+SESSION_PHASES = ("commands", "config", "disconnect")
+
+ADAPTIVE_TIMEOUT_DEFAULTS = {
+    "enabled": True,
+    "factor": 3.0,
+    "min_samples": 5,
+    "connect_floor": 2.0,
+    "connect_ceiling": 120.0,
+    # Never cut commands shorter than Netmiko's default read timeout, so occasional heavy commands still complete.
+    "command_floor": 10.0,
+    "command_ceiling": 600.0,
+}
+
+
+def device_latency(device) -> Optional[DeviceLatency]:
+    """Return the latency history of `device`, or None if it has none yet.
+
+    Uses the relation cached by `select_related("device_broker_latency")` when available.
+    """
+    try:
+        return device.device_broker_latency
+    except ObjectDoesNotExist:
+        return None
+
+
+class AdaptiveTimeouts:
+    """Derive the connect and command timeouts of each device from its latency history."""
+
+    def __init__(self, **options):
+        """Initialize with `ADAPTIVE_TIMEOUT_DEFAULTS` overridden by `options`."""
+        self.options = {**ADAPTIVE_TIMEOUT_DEFAULTS, **options}
+
+    @classmethod
+    def from_settings(cls) -> AdaptiveTimeouts:
+        """Build from `PLUGINS_CONFIG["device_broker"]["adaptive_timeouts"]`."""
+        return cls(**(settings.PLUGINS_CONFIG.get("device_broker", {}).get("adaptive_timeouts") or {}))
+
+    @property
+    def enabled(self) -> bool:
+        """Whether timeouts are derived from history at all."""
+        return bool(self.options["enabled"])
+
+    def derive(self, samples: list, floor: float, ceiling: float) -> Optional[float]:
+        """Return the p99 of `samples` times the factor, clamped to `[floor, ceiling]`, or None with too few samples."""
+        if len(samples) < max(1, self.options["min_samples"]):
+            return None
+        ordered = sorted(samples)
+        p99 = ordered[max(0, math.ceil(0.99 * len(ordered)) - 1)]
+        return round(min(ceiling, max(floor, p99 * self.options["factor"])), 1)
+
+    def timeouts_for(self, device) -> tuple[Optional[float], Optional[float]]:
+        """Return `(connect_timeout, command_timeout)` for `device`, each None where there is too little history."""
+        latency = device_latency(device) if self.enabled else None
+        if latency is None:
+            return None, None
+        return (
+            self.derive(latency.connect_samples, self.options["connect_floor"], self.options["connect_ceiling"]),
+            self.derive(latency.command_samples, self.options["command_floor"], self.options["command_ceiling"]),
+        )
+
+
+class LatencyRecorder:
+    """Batch the latencies observed in device sessions and save them to each device's DeviceLatency."""
+
+    def __init__(self):
+        """Initialize an empty batch."""
+        self.pending = {}
+
+    def add(self, device, timings: dict, commands: int):
+        """Record the session of `device` if it connected.
+
+        Args:
+            device: Device the session ran on.
+            timings (dict): Seconds spent in each phase of the session.
+            commands (int): Number of commands whose time is included in the "commands" phase.
+        """
+        # The connect phase is timed even when it fails; only sessions that went on to a later phase connected.
+        # Sessions on a pooled connection have no connect phase, and record their command latency only.
+        if not any(phase in timings for phase in SESSION_PHASES):
+            return
+        latency = device_latency(device) or DeviceLatency(device=device)
+        command = timings["commands"] / commands if commands and "commands" in timings else None
+        latency.record(connect=timings.get("connect"), command=command)
+        self.pending[device.pk] = latency
+
+    def flush(self):
+        """Save the batched histories, with one query for existing rows and one for new ones."""
+        if not self.pending:
+            return
+        new = [latency for latency in self.pending.values() if latency._state.adding]  # pylint: disable=protected-access
+        existing = [latency for latency in self.pending.values() if not latency._state.adding]  # pylint: disable=protected-access
+        if existing:
+            DeviceLatency.objects.bulk_update(existing, ["connect_samples", "command_samples"])
+        if new:
+            # Another job may create the same device's row concurrently; its samples win.
+            DeviceLatency.objects.bulk_create(new, ignore_conflicts=True)
+            for latency in new:
+                latency._state.adding = False  # pylint: disable=protected-access
+        self.pending = {}
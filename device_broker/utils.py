@@ -1,18 +1,51 @@
-"""Device Broker utilities for network device platform drivers and connections."""
+"""Device Broker utilities for network device platform drivers and connections.
+
+Connection libraries (Netmiko, NAPALM, Scrapli) are imported by their driver wrapper when it first
+connects, so importing this module, and the job module with it, does not pay for loading them.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import functools
+import importlib.metadata
+import inspect
+import random
+import threading
+from string import Template
 from typing import Optional
 
-from napalm import get_network_driver as get_napalm_driver
+from django.conf import settings
 from nautobot.dcim.models import Device
-from netmiko import ConnectHandler
+
+from device_broker.cache import credential_cache
+from device_broker.http_api import HttpApiDriverWrapper
+
+# Entry point group through which other packages register driver wrappers as additional connection methods.
+DRIVER_ENTRY_POINT_GROUP = "device_broker.drivers"
+
+# Behaviour of the "simulated" connection method, overridden by PLUGINS_CONFIG["device_broker"]["simulation"].
+SIMULATION_DEFAULTS = {
+    "connect_latency": 1.0,
+    "command_latency": 0.2,
+    "jitter": 0.0,
+    "failure_rate": 0.0,
+    "outputs": {},
+    "default_output": "$host# $command\nSimulated output from $platform.",
+}
+
+
+def _is_templated(secret) -> bool:
+    """Return True if the secret's parameters are Jinja templates rendered per device."""
+    return any("{{" in str(value) or "{%" in str(value) for value in (secret.parameters or {}).values())
 
 
 def get_group_credentials(device: Device) -> dict[str, str]:
     """Resolve secrets for a device from its SecretsGroup.
 
     Returns a mapping of secret_type -> secret value, preferring CLI-like access types.
+    Uses prefetched `secrets_group_associations__secret` when available. Results are served from
+    `credential_cache` for `credential_cache_ttl` seconds, unless a secret is templated per device.
     """
     creds: dict[str, str] = {}
     group = getattr(device, "secrets_group", None)
@@ -26,37 +59,49 @@ def get_group_credentials(device: Device) -> dict[str, str]:
     preferred = ("ssh", "network", "cli", "https", "http")
     access_types = {a.access_type for a in assocs}
     chosen_access_type = next((a for a in preferred if a in access_types), None) or next(iter(access_types))
-
-    secret_types = [a.secret_type for a in assocs if a.access_type == chosen_access_type]
-
-    for secret_type in secret_types:
-        value: str | None = group.get_secret_value(
-            access_type=chosen_access_type,
-            secret_type=secret_type,
-            obj=device,
-        )
+    chosen = [a for a in assocs if a.access_type == chosen_access_type]
+
+    ttl = settings.PLUGINS_CONFIG.get("device_broker", {}).get("credential_cache_ttl", 0)
+    cacheable = ttl > 0 and not any(_is_templated(a.secret) for a in chosen)
+    cache_key = (group.pk, chosen_access_type)
+    if cacheable:
+        generation = credential_cache.generation()
+        cached = credential_cache.get(cache_key, generation)
+        if cached is not None:
+            return cached
+
+    for assoc in chosen:
+        value: str | None = assoc.secret.get_value(obj=device)
         if value:
-            creds[secret_type] = value
+            creds[assoc.secret_type] = value
 
+    if cacheable:
+        credential_cache.set(cache_key, creds, ttl, generation)
     return creds
 
 
 class NetmikoDriverWrapper:
     """Wrapper class for Netmiko connection handling with device platforms."""
 
-    def __init__(self, device_type, host, credentials, timeout: Optional[int] = None):
+    label = "Netmiko"
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self, device_type, host, credentials, timeout: Optional[float] = None, command_timeout: Optional[float] = None
+    ):
         """Initialize the NetmikoDriverWrapper with connection parameters.
 
         Args:
             device_type (str): The Netmiko device type identifier.
             host (str): The host IP address or hostname.
             credentials (dict): Dictionary containing username and password.
-            timeout (int | None): TCP connection timeout in seconds.
+            timeout (float | None): TCP connection timeout in seconds.
+            command_timeout (float | None): Seconds to wait for each command's output, Netmiko's default if None.
         """
         self.device_type = device_type
         self.host = host
         self.credentials = credentials
         self.timeout = timeout
+        self.command_timeout = command_timeout
         self.connection = None
 
     def connect(self):
@@ -73,6 +118,8 @@ class NetmikoDriverWrapper:
         }
         if self.timeout is not None:
             params["timeout"] = self.timeout
+        from netmiko import ConnectHandler  # pylint: disable=import-outside-toplevel
+
         self.connection = ConnectHandler(**params)
         return self
 
@@ -89,17 +136,67 @@ class NetmikoDriverWrapper:
         Returns:
             str: The command output from the device.
         """
+        if self.command_timeout is not None:
+            return self.connection.send_command(cmd, read_timeout=self.command_timeout)
         return self.connection.send_command(cmd)
 
+    def send_commands(self, cmds: list[str]) -> list[str]:
+        """Send several commands in order and return their outputs.
+
+        Args:
+            cmds (list[str]): The commands to send to the device.
+
+        Returns:
+            list[str]: The output of each command, in the order given.
+        """
+        return [self.send_command(cmd) for cmd in cmds]
+
+    def send_config(self, cmds: list[str], exit_config_mode: bool = True, save: bool = False) -> str:
+        """Push configuration lines as one stream with Netmiko's `send_config_set`.
+
+        `send_config_set` enters configuration mode itself and does not wait for a prompt after every
+        line, so large change sets are sent without a round trip per line.
+
+        Args:
+            cmds (list[str]): The configuration lines to send.
+            exit_config_mode (bool): Leave configuration mode once the lines are sent.
+            save (bool): Save the running configuration afterwards.
+
+        Returns:
+            str: The device output for the whole configuration set (and the save, if requested).
+        """
+        kwargs = {"read_timeout": self.command_timeout} if self.command_timeout is not None else {}
+        output = self.connection.send_config_set(cmds, exit_config_mode=exit_config_mode, **kwargs)
+        if save:
+            output += self.connection.save_config()
+        return output
+
     def disconnect(self):
         """Disconnect from the network device."""
         self.connection.disconnect()
 
 
+@functools.lru_cache(maxsize=None)
+def _get_napalm_driver_class(napalm_driver_name: str):
+    """Import and return a NAPALM driver class once per process."""
+    from napalm import get_network_driver  # pylint: disable=import-outside-toplevel
+
+    return get_network_driver(napalm_driver_name)
+
+
 class NapalmDriverWrapper:
     """Wrapper for NAPALM connection handling and command execution."""
 
-    def __init__(self, napalm_driver_name: str, host: str, credentials: dict, timeout: Optional[int] = None):
+    label = "NAPALM"
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        napalm_driver_name: str,
+        host: str,
+        credentials: dict,
+        timeout: Optional[float] = None,
+        command_timeout: Optional[float] = None,
+    ):
         """Initialize the NAPALM driver wrapper.
 
         Args:
@@ -107,6 +204,7 @@ class NapalmDriverWrapper:
             host: Target hostname or IP address.
             credentials: Mapping with "username" and "password".
             timeout: TCP connection timeout in seconds.
+            command_timeout: Unused; NAPALM has no generic per-command timeout.
         """
         self.napalm_driver_name = napalm_driver_name
         self.host = host
@@ -116,7 +214,7 @@ class NapalmDriverWrapper:
 
     def connect(self):
         """Open a NAPALM connection using the requested driver."""
-        driver_cls = get_napalm_driver(self.napalm_driver_name)
+        driver_cls = _get_napalm_driver_class(self.napalm_driver_name)
         optional_args = {}
         if self.timeout is not None:
             optional_args["timeout"] = self.timeout
@@ -149,32 +247,432 @@ class NapalmDriverWrapper:
             return self.connection.cli([cmd]).get(cmd, "")
         raise NotImplementedError("send_command is not supported by this NAPALM driver")
 
+    def send_commands(self, cmds: list[str]) -> list[str]:
+        """Execute several raw commands with a single call to the driver's CLI method.
+
+        NAPALM's `cli()` accepts a list, and API-based drivers such as eAPI and NX-API run the whole
+        list in one round trip.
+
+        Args:
+            cmds: The commands to execute.
+
+        Returns:
+            The output of each command, in the order given.
+
+        Raises:
+            NotImplementedError: If the underlying driver doesn't support CLI execution.
+        """
+        if not hasattr(self.connection, "cli"):
+            raise NotImplementedError("send_commands is not supported by this NAPALM driver")
+        if not cmds:
+            return []
+        outputs = self.connection.cli(list(dict.fromkeys(cmds)))
+        return [outputs.get(cmd, "") for cmd in cmds]
+
+    def send_config(self, cmds: list[str], exit_config_mode: bool = True, save: bool = False) -> str:
+        """Send configuration lines through the driver's CLI method.
+
+        NAPALM has no generic way to enter configuration mode or save the configuration outside its
+        candidate-config workflow, so the lines are sent as CLI commands and `exit_config_mode` is ignored.
+
+        Args:
+            cmds: The configuration lines to send.
+            exit_config_mode: Unused; accepted for compatibility with the other driver wrappers.
+            save: Not supported by this wrapper.
+
+        Returns:
+            The output of every line, joined by newlines.
+
+        Raises:
+            NotImplementedError: If `save` is requested.
+        """
+        if save:
+            raise NotImplementedError("Saving the configuration is not supported by the NAPALM driver wrapper")
+        return "\n".join(self.send_commands(cmds))
+
     def disconnect(self):
         """Close the NAPALM connection."""
         self.connection.close()
 
 
+class AsyncScrapliDriverWrapper:
+    """Wrapper for asyncio-native Scrapli connections over the asyncssh transport.
+
+    Every method is a coroutine, so a single event loop can drive thousands of sessions concurrently.
+    Scrapli and asyncssh are optional dependencies and are only imported when a connection is opened.
+    """
+
+    label = "Scrapli (asyncio)"
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        scrapli_platform: str,
+        host: str,
+        credentials: dict,
+        timeout: Optional[float] = None,
+        command_timeout: Optional[float] = None,
+    ):
+        """Initialize the Scrapli driver wrapper.
+
+        Args:
+            scrapli_platform: The Scrapli platform name (e.g., "cisco_iosxe", "arista_eos").
+            host: Target hostname or IP address.
+            credentials: Mapping with "username" and "password".
+            timeout: TCP connection timeout in seconds.
+            command_timeout: Seconds to wait for each command's output, Scrapli's default if None.
+        """
+        self.scrapli_platform = scrapli_platform
+        self.host = host
+        self.credentials = credentials
+        self.timeout = timeout
+        self.command_timeout = command_timeout
+        self.connection = None
+
+    async def connect(self):
+        """Open an asyncssh-backed Scrapli connection."""
+        from scrapli import AsyncScrapli  # pylint: disable=import-outside-toplevel
+
+        params = {
+            "platform": self.scrapli_platform,
+            "host": self.host,
+            "auth_username": self.credentials.get("username"),
+            "auth_password": self.credentials.get("password"),
+            "auth_strict_key": False,
+            "transport": "asyncssh",
+        }
+        if self.timeout is not None:
+            params["timeout_socket"] = self.timeout
+            params["timeout_transport"] = self.timeout
+        if self.command_timeout is not None:
+            params["timeout_ops"] = self.command_timeout
+        self.connection = AsyncScrapli(**params)
+        await self.connection.open()
+        return self
+
+    async def enter_config_mode(self):
+        """Enter configuration mode on the network device."""
+        await self.connection.acquire_priv("configuration")
+
+    async def send_command(self, cmd: str) -> str:
+        """Send a command to the network device and return the output.
+
+        Args:
+            cmd: The command to send to the device.
+
+        Returns:
+            The command output from the device.
+        """
+        response = await self.connection.send_command(cmd)
+        return response.result
+
+    async def send_commands(self, cmds: list[str]) -> list[str]:
+        """Send several commands in order and return their outputs.
+
+        Args:
+            cmds: The commands to send to the device.
+
+        Returns:
+            The output of each command, in the order given.
+        """
+        if not cmds:
+            return []
+        responses = await self.connection.send_commands(cmds)
+        return [response.result for response in responses]
+
+    async def send_config(self, cmds: list[str], exit_config_mode: bool = True, save: bool = False) -> str:
+        """Push configuration lines with Scrapli's `send_configs`, which enters configuration mode itself.
+
+        Args:
+            cmds: The configuration lines to send.
+            exit_config_mode: Return to the default privilege level once the lines are sent.
+            save: Not supported by this wrapper.
+
+        Returns:
+            The output of every line, joined by newlines.
+
+        Raises:
+            NotImplementedError: If `save` is requested.
+        """
+        if save:
+            raise NotImplementedError("Saving the configuration is not supported by the Scrapli driver wrapper")
+        responses = await self.connection.send_configs(cmds)
+        if exit_config_mode:
+            await self.connection.acquire_priv(self.connection.default_desired_privilege_level)
+        return "\n".join(response.result for response in responses)
+
+    async def disconnect(self):
+        """Close the Scrapli connection."""
+        await self.connection.close()
+
+
+class SimulatedConnectionError(ConnectionError):
+    """Raised by `SimulatedDriverWrapper` for connections that the simulation decides should fail."""
+
+
+def get_simulation_settings(platform: str) -> dict:
+    """Return the simulation settings for a network driver.
+
+    `PLUGINS_CONFIG["device_broker"]["simulation"]` overrides `SIMULATION_DEFAULTS`, and its optional
+    `platforms` mapping overrides both per network driver, for example::
+
+        "simulation": {
+            "command_latency": 0.5,
+            "jitter": 0.2,
+            "platforms": {"cisco_ios": {"failure_rate": 0.01, "outputs": {"show version": "Cisco IOS ..."}}},
+        }
+    """
+    config = settings.PLUGINS_CONFIG.get("device_broker", {}).get("simulation") or {}
+    overrides = (config.get("platforms") or {}).get(platform) or {}
+    result = {**SIMULATION_DEFAULTS, **config, **overrides}
+    result["outputs"] = {**SIMULATION_DEFAULTS["outputs"], **config.get("outputs", {}), **overrides.get("outputs", {})}
+    result.pop("platforms", None)
+    return result
+
+
+class SimulatedDriverWrapper:
+    """Driver wrapper that never opens a connection, for load testing against real Nautobot data.
+
+    Every call waits for its configured latency, plus or minus up to `jitter` seconds, and commands
+    return canned outputs from the `outputs` setting, or `default_output` for any other command. Outputs
+    are `string.Template` strings; `$host`, `$command` and `$platform` are substituted. A `failure_rate`
+    fraction of connections fail with `SimulatedConnectionError` once the connect latency has passed.
+    Every method is a coroutine, so one event loop can simulate tens of thousands of sessions.
+    """
+
+    label = "Simulated (no device connections)"
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        platform: str,
+        host: str,
+        credentials: dict,
+        timeout: Optional[float] = None,
+        command_timeout: Optional[float] = None,
+    ):
+        """Initialize the simulated driver wrapper.
+
+        Args:
+            platform: The network driver of the device's platform, used to look up its settings.
+            host: Target hostname or IP address, only used in outputs.
+            credentials: Unused; accepted for compatibility with the other driver wrappers.
+            timeout: Connect latencies longer than this raise `TimeoutError`, as a real connection would.
+            command_timeout: Command latencies longer than this raise `TimeoutError`.
+        """
+        self.platform = platform
+        self.host = host
+        self.credentials = credentials
+        self.timeout = timeout
+        self.command_timeout = command_timeout
+        self.settings = get_simulation_settings(platform)
+
+    def _delay(self, latency: float) -> float:
+        """Return `latency` seconds plus or minus a uniformly random share of the configured jitter."""
+        jitter = self.settings["jitter"]
+        return max(0.0, latency + random.uniform(-jitter, jitter))  # noqa: S311
+
+    async def _wait(self, latency: float, timeout: Optional[float], action: str):
+        """Sleep for a jittered `latency`, or for `timeout` and raise `TimeoutError` if that is shorter."""
+        delay = self._delay(latency)
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            raise TimeoutError(f"Simulated {action} on {self.host} timed out after {timeout} seconds")
+        await asyncio.sleep(delay)
+
+    def _output(self, cmd: str) -> str:
+        """Return the simulated output of `cmd`."""
+        template = self.settings["outputs"].get(cmd, self.settings["default_output"])
+        return Template(template).safe_substitute(host=self.host, command=cmd, platform=self.platform)
+
+    async def connect(self):
+        """Simulate opening a connection.
+
+        Raises:
+            TimeoutError: If the simulated connect latency exceeds the connection timeout.
+            SimulatedConnectionError: For the `failure_rate` fraction of connections.
+        """
+        await self._wait(self.settings["connect_latency"], self.timeout, "connection")
+        if random.random() < self.settings["failure_rate"]:  # noqa: S311
+            raise SimulatedConnectionError(f"Simulated connection failure to {self.host}")
+        return self
+
+    async def enter_config_mode(self):
+        """Simulate entering configuration mode."""
+        await self._wait(self.settings["command_latency"], self.command_timeout, "command")
+
+    async def send_command(self, cmd: str) -> str:
+        """Simulate sending a command and return its output.
+
+        Args:
+            cmd: The command to send.
+
+        Returns:
+            The simulated command output.
+
+        Raises:
+            TimeoutError: If the simulated command latency exceeds the command timeout.
+        """
+        await self._wait(self.settings["command_latency"], self.command_timeout, "command")
+        return self._output(cmd)
+
+    async def send_commands(self, cmds: list[str]) -> list[str]:
+        """Simulate sending several commands in order and return their outputs.
+
+        Args:
+            cmds: The commands to send.
+
+        Returns:
+            The simulated output of each command, in the order given.
+        """
+        return [await self.send_command(cmd) for cmd in cmds]
+
+    async def send_config(self, cmds: list[str], exit_config_mode: bool = True, save: bool = False) -> str:
+        """Simulate pushing configuration lines, taking one command latency for the whole set.
+
+        Args:
+            cmds: The configuration lines to send.
+            exit_config_mode: Unused; accepted for compatibility with the other driver wrappers.
+            save: Simulate saving the configuration, taking one more command latency.
+
+        Returns:
+            The simulated output of every line, joined by newlines.
+        """
+        await self._wait(self.settings["command_latency"], self.command_timeout, "configuration")
+        if save:
+            await self._wait(self.settings["command_latency"], self.command_timeout, "save")
+        return "\n".join(self._output(cmd) for cmd in cmds)
+
+    async def disconnect(self):
+        """Simulate closing the connection; returns immediately."""
+
+
+# Wrapper class of each built-in connection method.
+DRIVER_WRAPPERS = {
+    "netmiko": NetmikoDriverWrapper,
+    "napalm": NapalmDriverWrapper,
+    "scrapli": AsyncScrapliDriverWrapper,
+    "simulated": SimulatedDriverWrapper,
+    "http_api": HttpApiDriverWrapper,
+}
+
+
+class DriverRegistry:
+    """Driver wrapper class of every connection method: the built-in ones and those registered through entry points.
+
+    Another package adds a connection method by declaring an entry point in the `device_broker.drivers`
+    group, named after the method and referring to a wrapper class with the same interface as
+    `NetmikoDriverWrapper` (or `SimulatedDriverWrapper` for coroutine wrappers). Entry points are listed
+    when the job form is built but only imported the first time their method is used. Built-in methods
+    cannot be replaced.
+    """
+
+    def __init__(self, builtins: dict, group: str = DRIVER_ENTRY_POINT_GROUP):
+        """Initialize the registry.
+
+        Args:
+            builtins (dict): Mapping of connection method to wrapper class.
+            group (str): Entry point group searched for other connection methods.
+        """
+        self.group = group
+        self._wrappers = dict(builtins)
+        self._entry_points = None
+        self._lock = threading.Lock()
+
+    def entry_points(self) -> dict:
+        """Return the entry points registering other connection methods, by method, without importing them."""
+        if self._entry_points is None:
+            found = importlib.metadata.entry_points()
+            # Python 3.9 returns a dict of groups; later versions have `select()`.
+            found = found.select(group=self.group) if hasattr(found, "select") else found.get(self.group, ())
+            self._entry_points = {entry_point.name: entry_point for entry_point in found}
+        return self._entry_points
+
+    def methods(self) -> list[str]:
+        """Return every connection method, built-in methods first."""
+        return [*self._wrappers, *(name for name in self.entry_points() if name not in self._wrappers)]
+
+    def choices(self) -> list[tuple[str, str]]:
+        """Return `(method, label)` pairs for the job form; methods from entry points are labelled with their name."""
+        return [
+            (method, self._wrappers[method].label if method in self._wrappers else method) for method in self.methods()
+        ]
+
+    def get(self, method: str):
+        """Return the wrapper class of `method`, importing it on first use, or None if the method is unknown."""
+        wrapper_cls = self._wrappers.get(method)
+        if wrapper_cls is None and method in self.entry_points():
+            with self._lock:
+                wrapper_cls = self._wrappers.get(method)
+                if wrapper_cls is None:
+                    wrapper_cls = self._wrappers[method] = self.entry_points()[method].load()
+        return wrapper_cls
+
+    def is_async(self, method: str) -> bool:
+        """Whether the wrapper of `method` exposes coroutines instead of blocking calls."""
+        wrapper_cls = self.get(method) or NetmikoDriverWrapper
+        return inspect.iscoroutinefunction(wrapper_cls.connect)
+
+
+driver_registry = DriverRegistry(DRIVER_WRAPPERS)
+
+# Platform.network_driver_mappings key holding the library-specific driver name, per connection method.
+DRIVER_MAPPING_KEYS = {
+    "scrapli": "scrapli",
+}
+
+_driver_factories: dict[tuple[str, str], DriverFactory] = {}
+
+
+class DriverFactory:  # pylint: disable=too-few-public-methods
+    """Open connections for one network driver through one wrapper class.
+
+    Factories are stateless and shared by every device with the same `(network_driver, method)`.
+    """
+
+    def __init__(self, wrapper_cls, driver_name: str):
+        """Initialize the factory.
+
+        Args:
+            wrapper_cls: Driver wrapper class to instantiate per connection.
+            driver_name (str): Library-specific driver name passed to the wrapper.
+        """
+        self.wrapper_cls = wrapper_cls
+        self.driver_name = driver_name
+
+    def connect(self, host, credentials, timeout: Optional[float] = None, command_timeout: Optional[float] = None):
+        """Open a connection and return the connected wrapper (or a coroutine resolving to it)."""
+        wrapper = self.wrapper_cls(
+            self.driver_name, host, credentials, timeout=timeout, command_timeout=command_timeout
+        )
+        return wrapper.connect()
+
+
 def get_platform_driver(platform, method: str = "netmiko"):
-    """Return a driver factory object for the given platform and method.
+    """Return the driver factory for the given platform and method.
+
+    Factories are resolved once per `(network_driver, method)` and memoized for the life of the process.
 
     Args:
         platform: Nautobot Platform instance (expects `network_driver` attribute).
-        method: Connection method, either "netmiko" or "napalm".
+        method: Connection method, one of "netmiko", "napalm", "scrapli", "simulated", "http_api" or a method
+            registered through an entry point. Unknown methods fall back to Netmiko.
 
     Returns:
-        A lightweight object exposing a static `connect(host, credentials, timeout)` method, or None.
+        A DriverFactory exposing `connect(host, credentials, timeout, command_timeout)`, or None.
+        For asynchronous methods (see `DriverRegistry.is_async`), `connect` returns a coroutine resolving
+        to the connected wrapper.
     """
     device_type = getattr(platform, "network_driver", None)
     if not device_type:
         return None
 
     method_normalized = (method or "netmiko").lower()
-
-    def driver_factory(host, credentials, timeout: Optional[int] = None):
-        if method_normalized == "napalm":
-            wrapper = NapalmDriverWrapper(device_type, host, credentials, timeout=timeout)
-        else:
-            wrapper = NetmikoDriverWrapper(device_type, host, credentials, timeout=timeout)
-        return wrapper.connect()
-
-    return type("DynamicDriver", (), {"connect": staticmethod(driver_factory)})
+    key = (device_type, method_normalized)
+    factory = _driver_factories.get(key)
+    if factory is None:
+        driver_name = device_type
+        mapping_key = DRIVER_MAPPING_KEYS.get(method_normalized)
+        if mapping_key:
+            driver_name = (getattr(platform, "network_driver_mappings", None) or {}).get(mapping_key) or device_type
+        wrapper_cls = driver_registry.get(method_normalized) or NetmikoDriverWrapper
+        factory = _driver_factories.setdefault(key, DriverFactory(wrapper_cls, driver_name))
+    return factory
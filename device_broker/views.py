@@ -0,0 +1,44 @@
+"""Views for device_broker."""
+
+from nautobot.apps.views import (
+    ObjectBulkDestroyViewMixin,
+    ObjectDestroyViewMixin,
+    ObjectDetailViewMixin,
+    ObjectListViewMixin,
+)
+
+from device_broker import filters, forms, models, tables
+from device_broker.api import serializers
+
+
+class DeviceCommandResultUIViewSet(  # pylint: disable=abstract-method
+    ObjectListViewMixin,
+    ObjectDetailViewMixin,
+    ObjectDestroyViewMixin,
+    ObjectBulkDestroyViewMixin,
+):
+    """ViewSet for DeviceCommandResult views; results are created by the Device Broker job, never by hand."""
+
+    filterset_class = filters.DeviceCommandResultFilterSet
+    filterset_form_class = forms.DeviceCommandResultFilterForm
+    lookup_field = "pk"
+    queryset = models.DeviceCommandResult.objects.select_related("device", "job_result")
+    serializer_class = serializers.DeviceCommandResultSerializer
+    table_class = tables.DeviceCommandResultTable
+    action_buttons = ("export",)
+
+    def _process_destroy_form(self, form):
+        """Delete the result, then its command output unless other results still share it."""
+        pks = {self.obj.command_output_id}
+        super()._process_destroy_form(form)
+        models.CommandOutput.objects.filter(pk__in=pks).delete_unreferenced()
+
+    def _process_bulk_destroy_form(self, form):
+        """Delete the selected results, then the command outputs that only they referenced."""
+        if self.request.POST.get("_all"):
+            queryset = self._get_bulk_edit_delete_all_queryset(self.request)
+        else:
+            queryset = self.get_queryset().filter(pk__in=self.pk_list)
+        pks = set(queryset.values_list("command_output", flat=True))
+        super()._process_bulk_destroy_form(form)
+        models.CommandOutput.objects.filter(pk__in=pks).delete_unreferenced()
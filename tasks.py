@@ -895,6 +895,32 @@ def unittest_coverage(context):
     run_command(context, command)
 
 
+@task(
+    help={
+        "devices": "Comma-separated numbers of fake devices to run the job against (default: 10,100,1000)",
+        "method": "Connection method, netmiko or scrapli (default: netmiko)",
+        "max_workers": "Job max_workers value (default: 100)",
+        "latency": "Seconds each fake device waits before answering a command (default: 0.05)",
+        "output_size": "Bytes of output each fake device returns per command (default: 2000)",
+    }
+)
+def benchmark(  # noqa: PLR0913
+    context,
+    devices="10,100,1000",
+    method="netmiko",
+    max_workers=100,
+    latency=0.05,
+    output_size=2000,
+):
+    """Benchmark end-to-end job throughput against local fake SSH devices."""
+    command = (
+        f"python benchmarks/throughput.py --devices={devices} --method={method} --max-workers={max_workers}"
+        f" --latency={latency} --output-size={output_size}"
+    )
+
+    run_command(context, command)
+
+
 @task
 def coverage_lcov(context):
     """Generate an LCOV coverage report."""